@@ -0,0 +1,76 @@
+"""
+Batch endpoints with JSON bodies against Arrow IPC and MessagePack columns.
+
+Each format posts the same records to /predict/performance/batch and
+/predict/insight/batch through the app in-process, so the timings cover body
+parsing, validation, scoring and response encoding but no network. Formats
+whose package is not installed are skipped.
+
+Run from the `be` directory:
+
+    python -m benchmarks.columnar [iterations]
+"""
+import sys
+
+import numpy as np
+
+from benchmarks.stages import sample_records, time_calls
+from benchmarks.stats import print_table, summarize
+from inference import columnar
+from inference.features import PERFORMANCE_ORDER
+
+BATCH_SIZES = (1000, 10000)
+ENDPOINTS = ("performance", "insight")
+
+
+def json_body(endpoint: str, records) -> list:
+    if endpoint == "insight":
+        return [{"perf": p.model_dump(), "cluster": c.model_dump()} for p, c in records]
+    return [p.model_dump() for p, _ in records]
+
+
+def columnar_body(fmt: str, records) -> bytes:
+    X = np.array([[getattr(p, name) for name in PERFORMANCE_ORDER] for p, _ in records], dtype=np.float64)
+    return columnar.write_columns({name: X[:, j].copy() for j, name in enumerate(PERFORMANCE_ORDER)}, fmt)
+
+
+def poster(client, path: str, body_arg: str, headers=None):
+    """
+    Request function for time_calls, posting its argument to `path` as the
+    `body_arg` ("json" or "content") keyword of client.post
+    """
+    return lambda body: client.post(path, headers=headers, **{body_arg: body}).raise_for_status()
+
+
+def run_columnar(client, iterations: int = 20) -> dict:
+    results = {}
+    formats = [fmt for fmt in columnar.MEDIA_TYPES if columnar.available(fmt)]
+    for size in BATCH_SIZES:
+        records = sample_records(size)
+        for endpoint in ENDPOINTS:
+            path = f"/predict/{endpoint}/batch"
+            body = json_body(endpoint, records)
+            results[f"{endpoint}[{size}].json"] = summarize(
+                time_calls(poster(client, path, "json"), [body], iterations)
+            )
+            for fmt in formats:
+                headers = {"content-type": columnar.MEDIA_TYPES[fmt]}
+                content = columnar_body(fmt, records)
+                results[f"{endpoint}[{size}].{fmt}"] = summarize(
+                    time_calls(poster(client, path, "content", headers), [content], iterations)
+                )
+    return results
+
+
+def main_benchmark(iterations=20):
+    from fastapi.testclient import TestClient
+
+    import main
+
+    with TestClient(main.app) as client:
+        results = run_columnar(client, iterations)
+    print_table(f"batch requests by body format, {iterations} requests each", results)
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,52 @@
+"""
+Compiled performance model against the sklearn estimator it came from.
+
+Both are timed on the same rows, one row per call and in batches, and the
+largest difference between their predictions is reported. The model is
+compiled in memory from the pickle, so no export is needed.
+
+Run from the `be` directory:
+
+    python -m benchmarks.compiled [iterations]
+"""
+import os
+import sys
+
+import joblib
+
+from benchmarks.stages import sample_records, time_calls
+from benchmarks.stats import print_table, summarize
+from inference.compiled import check_parity, compile_model, parity_inputs
+from inference.features import PERFORMANCE_ORDER, FeatureAssembler
+
+BATCH_SIZES = (100, 1000)
+
+
+def run_compiled(model_dir: str = "models", iterations: int = 1000) -> dict:
+    model = joblib.load(os.path.join(model_dir, "performance_predictor_model.pkl"))
+    compiled = compile_model(model)
+
+    assembler = FeatureAssembler(PERFORMANCE_ORDER)
+    X = assembler.matrix([p for p, _ in sample_records(max(BATCH_SIZES))])
+    rows = [X[i:i + 1] for i in range(256)]
+
+    results = {}
+    for name, predictor in (("sklearn", model), ("compiled", compiled)):
+        results[f"{name}.predict"] = summarize(time_calls(predictor.predict, rows, iterations))
+        for size in BATCH_SIZES:
+            results[f"{name}.predict[{size}]"] = summarize(
+                time_calls(predictor.predict, [X[:size]], max(20, iterations // 20))
+            )
+
+    max_diff = max(check_parity(model, compiled, X), check_parity(model, compiled, parity_inputs(compiled)))
+    return {"model": type(model).__name__, "max_abs_diff": max_diff, "latency": results}
+
+
+def main_benchmark(iterations=1000):
+    result = run_compiled(os.getenv("MODEL_DIR", "models"), iterations)
+    print_table(f"performance model latency ({result['model']}), {iterations} single-row calls", result["latency"])
+    print(f"\nLargest difference to sklearn: {result['max_abs_diff']:.3g}")
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
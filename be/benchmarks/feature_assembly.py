@@ -0,0 +1,99 @@
+"""
+Per-request latency of the DataFrame path versus the NumPy fast path.
+
+Run from the `be` directory:
+
+    python -m benchmarks.feature_assembly [iterations]
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import main
+from schema.user_features import ClusteringFeatures, PerformanceFeatures
+
+PERF_SAMPLE = PerformanceFeatures(
+    avg_minutes_per_module=20,
+    consistency_score=5,
+    total_activities=30,
+    weekend_ratio=0.3,
+    study_time_category=2,
+    total_active_days=15,
+)
+CLUSTER_SAMPLE = ClusteringFeatures(
+    avg_minutes_per_module=20,
+    consistency_score=5,
+    total_activities=30,
+    weekend_ratio=0.3,
+)
+
+BUNDLE = main.registry.current
+# The served bundle does not keep the sklearn persona models, load them for the baseline
+KMEANS_MODEL = joblib.load(os.path.join(BUNDLE.model_dir, "kmeans_persona_model.pkl"))
+SCALER = joblib.load(os.path.join(BUNDLE.model_dir, "scaler_clustering.pkl"))
+
+
+def dataframe_performance(features):
+    df = pd.DataFrame([[features.model_dump()[col] for col in main.PERFORMANCE_ORDER]],
+                      columns=main.PERFORMANCE_ORDER)
+    return float(BUNDLE.performance_model.predict(df)[0])
+
+
+def numpy_performance(features):
+    return float(BUNDLE.performance_model.predict(BUNDLE.performance_features.row(features))[0])
+
+
+def dataframe_persona(features):
+    df = pd.DataFrame([[features.model_dump()[col] for col in main.CLUSTER_ORDER]],
+                      columns=main.CLUSTER_ORDER)
+    return int(KMEANS_MODEL.predict(SCALER.transform(df))[0])
+
+
+def numpy_persona(features):
+    return int(KMEANS_MODEL.predict(SCALER.transform(BUNDLE.cluster_features.row(features)))[0])
+
+
+def compiled_persona(features):
+    return int(BUNDLE.persona_assigner.assign(BUNDLE.cluster_features.row(features))[0][0])
+
+
+def measure(fn, features, iterations):
+    fn(features)  # warm-up
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(features)
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def report(name, baseline, fast):
+    base_med, fast_med = np.median(baseline), np.median(fast)
+    print(f"{name:<12} dataframe {base_med:9.1f} us   numpy {fast_med:9.1f} us   "
+          f"speedup {base_med / fast_med:5.2f}x")
+
+
+def main_benchmark(iterations=2000):
+    assert dataframe_performance(PERF_SAMPLE) == numpy_performance(PERF_SAMPLE)
+    assert dataframe_persona(CLUSTER_SAMPLE) == numpy_persona(CLUSTER_SAMPLE)
+    assert dataframe_persona(CLUSTER_SAMPLE) == compiled_persona(CLUSTER_SAMPLE)
+
+    print(f"median latency per request over {iterations} iterations")
+    report("performance",
+           measure(dataframe_performance, PERF_SAMPLE, iterations),
+           measure(numpy_performance, PERF_SAMPLE, iterations))
+    report("persona",
+           measure(dataframe_persona, CLUSTER_SAMPLE, iterations),
+           measure(numpy_persona, CLUSTER_SAMPLE, iterations))
+    report("persona*",
+           measure(dataframe_persona, CLUSTER_SAMPLE, iterations),
+           measure(compiled_persona, CLUSTER_SAMPLE, iterations))
+    print("* compiled persona assigner instead of scaler.transform + kmeans_model.predict")
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,210 @@
+"""
+In-process load test of every API endpoint through an ASGI client.
+
+The app is driven with httpx.ASGITransport inside one event loop (no
+network, no uvicorn), `concurrency` requests in flight per endpoint. POST
+bodies are drawn at random so the result cache sees realistic misses.
+Responses other than 2xx are counted as errors. The admin endpoints are
+left out: they need a token and reloading models would skew the numbers.
+Learner events are written under "bench-" ids to an in-memory learner store
+unless LEARNER_DB is set explicitly.
+
+Run from the `be` directory:
+
+    python -m benchmarks.load [--requests 500] [--concurrency 16] [--endpoint /analyze]
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.stats import print_table, summarize
+
+SKIPPED_PREFIXES = ("/admin/", "/docs", "/redoc", "/openapi.json")
+INSIGHT_BATCH_SIZE = 100
+BENCH_LEARNERS = 1000
+
+
+def perf_payload(rng) -> dict:
+    return {
+        "total_activities": round(float(rng.uniform(1, 200)), 2),
+        "avg_minutes_per_module": round(float(rng.uniform(1, 60)), 2),
+        "consistency_score": round(float(rng.uniform(1, 10)), 2),
+        "weekend_ratio": round(float(rng.uniform(0, 1)), 2),
+        "study_time_category": int(rng.integers(1, 4)),
+        "total_active_days": int(rng.integers(1, 60)),
+    }
+
+
+def cluster_payload(rng) -> dict:
+    perf = perf_payload(rng)
+    del perf["study_time_category"], perf["total_active_days"]
+    return perf
+
+
+def insight_payload(rng) -> dict:
+    return {"perf": perf_payload(rng), "cluster": cluster_payload(rng)}
+
+
+def what_if_payload(rng) -> dict:
+    return {
+        "perf": perf_payload(rng),
+        "sweeps": [
+            {"feature": "total_activities", "start": 1, "stop": 200, "steps": 50},
+            {"feature": "consistency_score", "start": 1, "stop": 10, "steps": 50},
+        ],
+    }
+
+
+def stream_payload(rng) -> bytes:
+    return "".join(
+        json.dumps({"id": i, **perf_payload(rng)}) + "\n" for i in range(INSIGHT_BATCH_SIZE)
+    ).encode()
+
+
+def events_payload(rng) -> list:
+    start = datetime.datetime(2025, 1, 1)
+    return [
+        {
+            "learner_id": learner_id(rng),
+            "timestamp": (start + datetime.timedelta(minutes=int(rng.integers(0, 60 * 24 * 90)))).isoformat(),
+            "minutes": round(float(rng.uniform(1, 60)), 1),
+        }
+        for _ in range(INSIGHT_BATCH_SIZE)
+    ]
+
+
+def learner_id(rng) -> str:
+    return f"bench-{int(rng.integers(0, BENCH_LEARNERS))}"
+
+
+# Placeholders in paths, filled per request
+PATH_PARAMS = {"learner_id": learner_id}
+
+# (method, path) -> body factory taking a numpy Generator, None for no body.
+# Factories returning bytes are sent as the raw request body.
+ENDPOINTS = {
+    ("GET", "/"): None,
+    ("GET", "/sample-data"): None,
+    ("GET", "/persona-samples"): None,
+    ("GET", "/debug/generate-test-data"): None,
+    ("GET", "/health"): None,
+    ("GET", "/cache/stats"): None,
+    ("GET", "/batching/stats"): None,
+    ("GET", "/metrics"): None,
+    ("GET", "/benchmark/stats"): None,
+    ("POST", "/predict/performance"): perf_payload,
+    ("POST", "/predict/persona"): cluster_payload,
+    ("POST", "/predict/insight"): insight_payload,
+    ("POST", "/predict/performance/batch"):
+        lambda rng: [perf_payload(rng) for _ in range(INSIGHT_BATCH_SIZE)],
+    ("POST", "/predict/persona/batch"):
+        lambda rng: [cluster_payload(rng) for _ in range(INSIGHT_BATCH_SIZE)],
+    ("POST", "/predict/insight/batch"):
+        lambda rng: [insight_payload(rng) for _ in range(INSIGHT_BATCH_SIZE)],
+    ("POST", "/predict/what-if"): what_if_payload,
+    ("POST", "/predict/stream"): stream_payload,
+    ("POST", "/compare/performance"): perf_payload,
+    ("POST", "/analyze"): insight_payload,
+    # Ingestion first, so the learners read back below exist
+    ("POST", "/learners/events"): events_payload,
+    ("GET", "/learners/{learner_id}/insight"): None,
+}
+
+
+def uncovered_routes(app):
+    """
+    API routes that have no entry in ENDPOINTS and are not skipped on purpose
+    """
+    missing = []
+    for route in app.routes:
+        if route.path.startswith(SKIPPED_PREFIXES):
+            continue
+        for method in getattr(route, "methods", None) or ():
+            if method != "HEAD" and (method, route.path) not in ENDPOINTS:
+                missing.append(f"{method} {route.path}")
+    return missing
+
+
+async def load_endpoint(client, method: str, path: str, body, requests: int, concurrency: int,
+                        warmup: int = 20, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    params = [name for name in PATH_PARAMS if f"{{{name}}}" in path]
+    bodies = [
+        (path.format(**{name: PATH_PARAMS[name](rng) for name in params}) if params else path,
+         body(rng) if body else None)
+        for _ in range(requests + warmup)
+    ]
+
+    async def send(url, payload):
+        if payload is None:
+            return await client.request(method, url)
+        if isinstance(payload, bytes):
+            return await client.request(method, url, content=payload)
+        return await client.request(method, url, json=payload)
+
+    for url, payload in bodies[:warmup]:
+        await send(url, payload)
+
+    queue = iter(bodies[warmup:])
+    timings = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for url, payload in queue:
+            start = time.perf_counter()
+            response = await send(url, payload)
+            timings.append(time.perf_counter() - start)
+            if not 200 <= response.status_code < 300:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = summarize(timings, elapsed)
+    result["errors"] = errors
+    result["concurrency"] = concurrency
+    return result
+
+
+async def run_load(app, requests: int = 500, concurrency: int = 16, only=None) -> dict:
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for (method, path), body in ENDPOINTS.items():
+                if only and path not in only:
+                    continue
+                results[f"{method} {path}"] = await load_endpoint(
+                    client, method, path, body, requests, concurrency
+                )
+    return results
+
+
+def main_benchmark(argv=None):
+    parser = argparse.ArgumentParser(description="In-process ASGI load test of the API endpoints")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoint", action="append", help="only these paths (repeatable)")
+    args = parser.parse_args(argv)
+
+    # Keep the synthetic learners out of the real store
+    os.environ.setdefault("LEARNER_DB", ":memory:")
+    import main
+
+    for route in uncovered_routes(main.app):
+        print(f"warning: no load profile for {route}, skipped")
+
+    results = asyncio.run(run_load(main.app, args.requests, args.concurrency, args.endpoint))
+    print_table(f"endpoint latency, {args.requests} requests at concurrency {args.concurrency}", results)
+
+
+if __name__ == "__main__":
+    main_benchmark()
@@ -0,0 +1,123 @@
+"""
+Per-worker memory of `uvicorn --workers N` versus the pre-fork launcher.
+
+Both servers are started with the same number of workers and driven until
+every worker has loaded the performance model. Memory is then read from
+/proc/<pid>/smaps_rollup (Linux only):
+
+    rss      resident pages, shared pages counted in full by every worker
+    pss      resident pages with shared pages split between the processes
+    private  pages only this worker maps (what it would free on exit)
+
+RSS hides sharing by design, so the pre-fork savings show up in pss and
+private. The launcher's parent holds the shared copy and is reported apart.
+
+Run from the `be` directory:
+
+    python -m benchmarks.memory [workers]
+"""
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+FIELDS = {"Rss": "rss", "Pss": "pss", "Private_Clean": "private", "Private_Dirty": "private"}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memory(pid: int) -> dict:
+    """
+    rss, pss and private memory of a process in MiB
+    """
+    usage = {"rss": 0, "pss": 0, "private": 0}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in FIELDS:
+                usage[FIELDS[name]] += int(rest.split()[0])
+    return {k: v / 1024 for k, v in usage.items()}
+
+
+def children(pid: int):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def cmdline(pid: int) -> str:
+    with open(f"/proc/{pid}/cmdline", "rb") as f:
+        return f.read().replace(b"\0", b" ").decode()
+
+
+def wait_until_warm(port: int, workers: int, timeout: float = 120):
+    """
+    Send requests until `workers` consecutive /health responses report a
+    loaded performance model, i.e. every worker has finished loading
+    """
+    url = f"http://127.0.0.1:{port}/health"
+    deadline = time.time() + timeout
+    streak = 0
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as r:
+                loaded = b'"performance_model":"loaded"' in r.read()
+        except OSError:
+            loaded = False
+        streak = streak + 1 if loaded else 0
+        if streak >= workers * 5:
+            return
+        time.sleep(0.05)
+    raise TimeoutError("workers did not finish loading the models")
+
+
+def measure(command, port: int, workers: int):
+    proc = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_warm(port, workers)
+        time.sleep(1)
+        worker_pids = [
+            pid for pid in children(proc.pid)
+            if "resource_tracker" not in cmdline(pid)
+        ]
+        return memory(proc.pid), [memory(pid) for pid in worker_pids]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+
+def report(name, parent, workers):
+    total_pss = parent["pss"] + sum(w["pss"] for w in workers)
+    avg = {k: sum(w[k] for w in workers) / len(workers) for k in ("rss", "pss", "private")}
+    print(f"{name:<10} {len(workers):>7} {avg['rss']:>10.1f} {avg['pss']:>10.1f} {avg['private']:>10.1f}"
+          f" {parent['pss']:>10.1f} {total_pss:>10.1f}")
+
+
+def main_benchmark(workers=4):
+    env_python = sys.executable
+
+    port = free_port()
+    uvicorn_mem = measure(
+        [env_python, "-W", "ignore", "-m", "uvicorn", "main:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        port, workers)
+
+    port = free_port()
+    prefork_mem = measure(
+        [env_python, "-W", "ignore", "serve.py", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        port, workers)
+
+    print("MiB; worker columns are averages per worker")
+    print(f"{'':<10} {'workers':>7} {'rss':>10} {'pss':>10} {'private':>10} {'parent pss':>10} {'total pss':>10}")
+    report("uvicorn", *uvicorn_mem)
+    report("prefork", *prefork_mem)
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 4)
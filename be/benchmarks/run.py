@@ -0,0 +1,96 @@
+"""
+Run the benchmark suite, save the results as JSON and flag regressions.
+
+Stage micro-benchmarks (benchmarks.stages) and the endpoint load test
+(benchmarks.load) are run once each. With --baseline, every p50/p95/p99 that
+grew by more than --threshold, and every throughput that fell by more than
+--threshold, is reported and the exit status is 1. Learner events from the
+load test go to an in-memory store unless LEARNER_DB is set explicitly.
+
+Run from the `be` directory:
+
+    python -m benchmarks.run --output bench.json
+    python -m benchmarks.run --baseline bench.json --output bench-new.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import sys
+
+from benchmarks.load import run_load, uncovered_routes
+from benchmarks.stages import run_stages
+from benchmarks.stats import compare, print_table
+
+
+def main_benchmark(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark suite with baseline comparison")
+    parser.add_argument("--iterations", type=int, default=2000, help="calls per stage micro-benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--output", help="write results to this JSON file")
+    parser.add_argument("--baseline", help="compare against a previous results file")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="relative change counted as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--skip-stages", action="store_true")
+    parser.add_argument("--skip-load", action="store_true")
+    args = parser.parse_args(argv)
+
+    # Keep the load test's synthetic learners out of the real store
+    os.environ.setdefault("LEARNER_DB", ":memory:")
+    import main
+
+    bundle = main.registry.current
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now(datetime.UTC).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "model_version": bundle.version,
+            "iterations": args.iterations,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "stages": {},
+        "endpoints": {},
+    }
+
+    if not args.skip_stages:
+        results["stages"] = run_stages(bundle, args.iterations)
+        print_table(f"stage latency, {args.iterations} calls", results["stages"])
+
+    if not args.skip_load:
+        for route in uncovered_routes(main.app):
+            print(f"warning: no load profile for {route}, skipped")
+        results["endpoints"] = asyncio.run(run_load(main.app, args.requests, args.concurrency))
+        print_table(f"endpoint latency, {args.requests} requests at concurrency {args.concurrency}",
+                    results["endpoints"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(results, baseline, args.threshold)
+    if not regressions:
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%})")
+        return 0
+
+    print(f"\n{len(regressions)} regression(s) against {args.baseline} (threshold {args.threshold:.0%})")
+    for section, name, key, before, now in regressions:
+        change = (now - before) / before
+        print(f"  {section}/{name} {key}: {before} -> {now} ({change:+.1%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main_benchmark())
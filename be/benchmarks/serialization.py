@@ -0,0 +1,79 @@
+"""
+Response serialization cost of the hot endpoints, old path against new.
+
+The old path is what FastAPI does with a plain dict: jsonable_encoder, then
+JSONResponse. The new path is FastJSONResponse on the slotted response
+dataclasses, with insight and recommendation text pre-serialized. Both
+encode the same payloads, built from sample records scored once up front.
+
+Run from the `be` directory:
+
+    python -m benchmarks.serialization [iterations]
+"""
+import json
+import sys
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from benchmarks.stages import sample_records, time_calls
+from benchmarks.stats import print_table, summarize
+from inference.serialization import FastJSONResponse, dumps, orjson
+
+BATCH_SIZE = 100
+
+
+def build_payloads(main, bundle) -> dict:
+    """
+    Insight, insight batch, comparison and analysis payloads as the
+    endpoints build them
+    """
+    records = sample_records(BATCH_SIZE)
+    perf_X = bundle.performance_features.matrix([p for p, _ in records])
+    cluster_X = bundle.cluster_features.matrix([c for _, c in records])
+    preds, labels, _, recommendations = bundle.score_matrices(perf_X, cluster_X)
+    recommendations = main.recommendation_engine.templates_for(recommendations)
+    insights = [
+        main.build_insight(bundle, perf, cluster, pred, label, recs)
+        for (perf, cluster), pred, label, recs in zip(records, preds.tolist(), labels.tolist(), recommendations)
+    ]
+
+    perf, cluster = records[0]
+    bench_perfs = bundle.centroid_performance(perf.study_time_category, perf.total_active_days)
+    comparison = main.build_comparison(bundle, perf, float(preds[0]), bench_perfs)
+    analysis = main.build_insight(
+        bundle, perf, cluster, float(preds[0]), int(labels[0]), recommendations[0],
+        result=main.AnalysisResult, centroid_distances=[1.0, 2.0, 3.0], comparison=comparison
+    )
+
+    return {
+        "insight": insights[0],
+        f"insight_batch[{BATCH_SIZE}]": main.BatchResult(predictions=insights, total=BATCH_SIZE),
+        "comparison": comparison,
+        "analysis": analysis,
+    }
+
+
+def run_serialization(main, bundle, iterations: int = 2000) -> dict:
+    results = {}
+    for name, payload in build_payloads(main, bundle).items():
+        # The same payload as the plain dicts the handlers used to return
+        plain = json.loads(dumps(payload))
+        n = iterations if "batch" not in name else max(20, iterations // 50)
+        results[f"{name}.jsonable_encoder"] = summarize(
+            time_calls(lambda p: JSONResponse(jsonable_encoder(p)), [plain], n)
+        )
+        results[f"{name}.fast_json"] = summarize(time_calls(FastJSONResponse, [payload], n))
+    return results
+
+
+def main_benchmark(iterations=2000):
+    import main
+
+    encoder = "orjson" if orjson is not None else "json (orjson not installed)"
+    results = run_serialization(main, main.registry.current, iterations)
+    print_table(f"response serialization, {iterations} calls, encoder {encoder}", results)
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,125 @@
+"""
+Micro-benchmarks of each stage of the inference path, outside the API.
+
+Every stage is timed call by call on a fixed set of varied inputs: feature
+assembly, the sklearn scaler and KMeans, the compiled persona assigner, the
+performance model (single row and batch), the recommendation rules and,
+when an index is loaded, the population percentile lookups.
+
+Run from the `be` directory:
+
+    python -m benchmarks.stages [iterations]
+"""
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+
+from benchmarks.stats import print_table, summarize
+from inference.bundle import ModelBundle
+from inference.features import CLUSTER_ORDER
+from inference.recommendations import generate_recommendations, recommendation_engine
+from schema.user_features import ClusteringFeatures, PerformanceFeatures
+
+BATCH_SIZE = 1000
+
+
+def sample_records(n: int, seed: int = 0):
+    """
+    n varied (PerformanceFeatures, ClusteringFeatures) pairs around typical values
+    """
+    rng = np.random.default_rng(seed)
+    records = []
+    for _ in range(n):
+        perf = PerformanceFeatures(
+            total_activities=float(rng.uniform(1, 200)),
+            avg_minutes_per_module=float(rng.uniform(1, 60)),
+            consistency_score=float(rng.uniform(1, 10)),
+            weekend_ratio=float(rng.uniform(0, 1)),
+            study_time_category=int(rng.integers(1, 4)),
+            total_active_days=int(rng.integers(1, 60)),
+        )
+        cluster = ClusteringFeatures(**{name: getattr(perf, name) for name in CLUSTER_ORDER})
+        records.append((perf, cluster))
+    return records
+
+
+def time_calls(fn, inputs, iterations: int):
+    """
+    Time `iterations` calls of fn, cycling through inputs, after one warm-up
+    """
+    fn(inputs[0])
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        arg = inputs[i % len(inputs)]
+        start = time.perf_counter()
+        fn(arg)
+        timings[i] = time.perf_counter() - start
+    return timings
+
+
+def run_stages(bundle: ModelBundle, iterations: int = 2000) -> dict:
+    kmeans_model = joblib.load(os.path.join(bundle.model_dir, "kmeans_persona_model.pkl"))
+    scaler = joblib.load(os.path.join(bundle.model_dir, "scaler_clustering.pkl"))
+
+    records = sample_records(256)
+    perfs = [p for p, _ in records]
+    clusters = [c for _, c in records]
+    perf_rows = [bundle.performance_features.row(p).copy() for p in perfs]
+    cluster_rows = [bundle.cluster_features.row(c).copy() for c in clusters]
+    scaled_rows = [scaler.transform(row) for row in cluster_rows]
+
+    batch = sample_records(BATCH_SIZE, seed=1)
+    perf_X = bundle.performance_features.matrix([p for p, _ in batch])
+    cluster_X = bundle.cluster_features.matrix([c for _, c in batch])
+    batch_iterations = max(20, iterations // 50)
+
+    preds = [float(bundle.performance_model.predict(row)[0]) for row in perf_rows]
+    personas = [
+        bundle.persona_mapping.get(str(int(bundle.persona_assigner.assign(row)[0][0])), "Unknown Persona")
+        for row in cluster_rows
+    ]
+    recommendation_inputs = [
+        (p.dict(), c.dict(), pred, persona) for p, c, pred, persona in zip(perfs, clusters, preds, personas)
+    ]
+    _, _, _, template_indices = bundle.score_matrices(perf_X, cluster_X)
+
+    stages = {
+        "feature_assembly.row": (lambda p: bundle.performance_features.row(p), perfs, iterations),
+        f"feature_assembly.matrix[{BATCH_SIZE}]":
+            (lambda rs: bundle.performance_features.matrix(rs), [[p for p, _ in batch]], batch_iterations),
+        "scaler.transform": (scaler.transform, cluster_rows, iterations),
+        "kmeans.predict": (kmeans_model.predict, scaled_rows, iterations),
+        "persona_assigner.assign": (bundle.persona_assigner.assign, cluster_rows, iterations),
+        f"persona_assigner.assign[{BATCH_SIZE}]": (bundle.persona_assigner.assign, [cluster_X], batch_iterations),
+        "performance_model.predict": (bundle.performance_model.predict, perf_rows, iterations),
+        f"performance_model.predict[{BATCH_SIZE}]": (bundle.performance_model.predict, [perf_X], batch_iterations),
+        "generate_recommendations": (lambda a: generate_recommendations(*a), recommendation_inputs, iterations),
+        f"recommendation_engine.templates[{BATCH_SIZE}]":
+            (recommendation_engine.templates_for, [template_indices], batch_iterations),
+    }
+
+    if bundle.population is not None:
+        feature_dicts = [p.dict() for p in perfs]
+        stages["population.percentile"] = (
+            lambda pred: bundle.population.percentile("predicted_performance", pred), preds, iterations
+        )
+        stages["population.feature_percentiles"] = (
+            bundle.population.feature_percentiles, feature_dicts, iterations
+        )
+
+    return {
+        name: summarize(time_calls(fn, inputs, n))
+        for name, (fn, inputs, n) in stages.items()
+    }
+
+
+def main_benchmark(iterations=2000):
+    bundle = ModelBundle.load(os.getenv("MODEL_DIR", "models"))
+    print_table(f"stage latency, {iterations} calls (batches: {BATCH_SIZE} rows)", run_stages(bundle, iterations))
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,75 @@
+"""
+Import-to-first-response time of the API with native and pickle model loading.
+
+Every run starts a fresh interpreter that imports `main`, starts the app and
+sends a persona and a performance request, timing each step from just before
+`import main`. The models are read from MODEL_DIR as in production.
+
+Run from the `be` directory:
+
+    python -m benchmarks.startup [runs]
+"""
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+CHILD = r"""
+import asyncio, json, time
+import httpx
+
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+
+perf = {"avg_minutes_per_module": 20, "consistency_score": 5, "total_activities": 30,
+        "weekend_ratio": 0.3, "study_time_category": 2, "total_active_days": 15}
+cluster = {k: perf[k] for k in main.CLUSTER_ORDER}
+
+async def first_responses():
+    async with main.app.router.lifespan_context(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            r = await client.post("/predict/persona", json=cluster)
+            r.raise_for_status()
+            persona = time.perf_counter()
+            r = await client.post("/predict/performance", json=perf)
+            r.raise_for_status()
+            performance = time.perf_counter()
+    return persona, performance
+
+persona, performance = asyncio.run(first_responses())
+print(json.dumps({
+    "import": imported - start,
+    "persona": persona - start,
+    "performance": performance - start,
+}))
+"""
+
+STEPS = ("import", "persona", "performance")
+
+
+def run_once(model_format: str) -> dict:
+    env = dict(os.environ, MODEL_FORMAT=model_format, PYTHONWARNINGS="ignore")
+    out = subprocess.run([sys.executable, "-c", CHILD], env=env, check=True,
+                         capture_output=True, text=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main_benchmark(runs=5):
+    results = {}
+    for model_format in ("pickle", "native"):
+        timings = [run_once(model_format) for _ in range(runs)]
+        results[model_format] = {step: float(np.median([t[step] for t in timings])) for step in STEPS}
+
+    print(f"median seconds since `import main` over {runs} fresh processes")
+    print(f"{'':<10}" + "".join(f"{step:>14}" for step in STEPS))
+    for model_format, medians in results.items():
+        print(f"{model_format:<10}" + "".join(f"{medians[step]:>14.3f}" for step in STEPS))
+    print("persona / performance: first successful response of /predict/persona, /predict/performance")
+
+
+if __name__ == "__main__":
+    main_benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
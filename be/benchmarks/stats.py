@@ -0,0 +1,55 @@
+"""
+Latency summaries and baseline comparison shared by the benchmark suite.
+"""
+import numpy as np
+
+# Metrics where a larger value is worse; everything else (throughput) is better larger
+LATENCY_KEYS = ("p50", "p95", "p99")
+THROUGHPUT_KEY = "per_sec"
+
+
+def summarize(seconds, elapsed: float | None = None) -> dict:
+    """
+    p50/p95/p99/mean in milliseconds plus operations per second. Throughput
+    is taken from `elapsed` wall time when given (concurrent runs), else
+    from the sum of the individual timings.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    p50, p95, p99 = np.percentile(seconds, [50, 95, 99]) * 1000
+    total = elapsed if elapsed is not None else seconds.sum()
+    return {
+        "n": int(seconds.size),
+        "p50": round(float(p50), 4),
+        "p95": round(float(p95), 4),
+        "p99": round(float(p99), 4),
+        "mean": round(float(seconds.mean() * 1000), 4),
+        THROUGHPUT_KEY: round(float(seconds.size / total), 1) if total else 0.0,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """
+    Regressions of `results` against `baseline`, section by section: a
+    latency percentile more than `threshold` (relative) above the baseline,
+    or throughput more than `threshold` below it. Entries missing from
+    either side are skipped.
+    """
+    regressions = []
+    for section in ("stages", "endpoints"):
+        current, previous = results.get(section, {}), baseline.get(section, {})
+        for name in sorted(set(current) & set(previous)):
+            now, before = current[name], previous[name]
+            for key in LATENCY_KEYS:
+                if before.get(key) and now[key] > before[key] * (1 + threshold):
+                    regressions.append((section, name, key, before[key], now[key]))
+            if before.get(THROUGHPUT_KEY) and now[THROUGHPUT_KEY] < before[THROUGHPUT_KEY] * (1 - threshold):
+                regressions.append((section, name, THROUGHPUT_KEY, before[THROUGHPUT_KEY], now[THROUGHPUT_KEY]))
+    return regressions
+
+
+def print_table(title: str, rows: dict):
+    print(f"\n{title}")
+    print(f"{'':<36} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'per sec':>12} {'errors':>7}")
+    for name, r in rows.items():
+        print(f"{name:<36} {r['p50']:>10.4f} {r['p95']:>10.4f} {r['p99']:>10.4f} "
+              f"{r[THROUGHPUT_KEY]:>12,.1f} {r.get('errors', 0):>7}")
@@ -0,0 +1,119 @@
+import os
+
+# --------------------
+# BATCH PREDICTION
+# --------------------
+# Upper bound on the number of records accepted by the /predict/*/batch
+# endpoints. One feature matrix is built per request, so this caps memory use.
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "10000"))
+
+# --------------------
+# STREAMING
+# --------------------
+# /predict/stream scores NDJSON input STREAM_CHUNK_SIZE lines at a time, with
+# one chunk scoring while the next is read. Longer lines are rejected.
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "1000"))
+STREAM_MAX_LINE_BYTES = int(os.getenv("STREAM_MAX_LINE_BYTES", "65536"))
+
+# --------------------
+# INFERENCE EXECUTOR
+# --------------------
+# Model calls run on a bounded thread pool so they never block the event loop.
+# Requests beyond INFERENCE_WORKERS running + INFERENCE_QUEUE_DEPTH waiting jobs
+# are rejected with 429.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+INFERENCE_QUEUE_DEPTH = int(os.getenv("INFERENCE_QUEUE_DEPTH", "64"))
+
+# --------------------
+# MICRO-BATCHING
+# --------------------
+# Concurrent /predict/performance and /predict/persona requests arriving within
+# MICROBATCH_WINDOW_MS of each other (or until MICROBATCH_MAX_SIZE records are
+# collected) share one model call. The window only opens while a batch is
+# already being scored; a request arriving at an idle service goes straight
+# to the model. Set the window to 0 to disable batching.
+MICROBATCH_WINDOW_MS = float(os.getenv("MICROBATCH_WINDOW_MS", "2"))
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+
+# --------------------
+# MODELS
+# --------------------
+MODEL_DIR = os.getenv("MODEL_DIR", "models")
+
+# "native" serves personas from the exported persona_bundle.npz (see
+# inference/native.py) and the performance model from its compiled
+# performance_model.npz (inference/compiled.py), or else unpickles it only
+# when it is first needed, so sklearn is not imported at startup. "pickle"
+# loads every model with joblib up front. A missing or stale .npz falls back
+# to pickles.
+MODEL_FORMAT = os.getenv("MODEL_FORMAT", "native")
+
+# Number of (study_time_category, total_active_days) keys whose centroid
+# performance predictions are memoized for /compare/performance
+CENTROID_CACHE_SIZE = int(os.getenv("CENTROID_CACHE_SIZE", "1024"))
+
+# --------------------
+# MODEL REGISTRY
+# --------------------
+# New model versions are loaded in the background and swapped in after a
+# warm-up prediction. MODEL_HISTORY bundles stay loaded for rollback.
+# MODEL_WATCH_INTERVAL > 0 polls MODEL_DIR every that many seconds and reloads
+# when the files change. The /admin/models endpoints require the X-Admin-Token
+# header to match ADMIN_TOKEN and are disabled when it is unset.
+MODEL_HISTORY = int(os.getenv("MODEL_HISTORY", "3"))
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "0"))
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+# --------------------
+# RESULT CACHE
+# --------------------
+# Performance and persona outputs are cached per model version, keyed on the
+# feature values rounded to multiples of RESULT_CACHE_QUANTUM. Set
+# RESULT_CACHE_SIZE to 0 to disable. RESULT_CACHE_BACKEND optionally adds a
+# shared store: "memory" (in-process stand-in) or a redis:// URL.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "600"))
+RESULT_CACHE_QUANTUM = float(os.getenv("RESULT_CACHE_QUANTUM", "1e-6"))
+RESULT_CACHE_BACKEND = os.getenv("RESULT_CACHE_BACKEND", "")
+
+# --------------------
+# LEARNER STORE
+# --------------------
+# SQLite database holding per-learner activity aggregates fed by
+# /learners/events. ":memory:" keeps them for the life of the process only.
+LEARNER_DB = os.getenv("LEARNER_DB", "learners.db")
+
+# Insights of stored learners are precomputed every INSIGHT_PRECOMPUTE_INTERVAL
+# seconds for learners whose aggregates changed or who have none for the
+# active model version, INSIGHT_PRECOMPUTE_CHUNK learners per model call.
+# Off by default (0); e.g. 300 turns it on. Workers sharing LEARNER_DB take
+# turns through a lease in the database.
+INSIGHT_PRECOMPUTE_INTERVAL = float(os.getenv("INSIGHT_PRECOMPUTE_INTERVAL", "0"))
+INSIGHT_PRECOMPUTE_CHUNK = int(os.getenv("INSIGHT_PRECOMPUTE_CHUNK", "1000"))
+
+# --------------------
+# STATIC RESPONSES
+# --------------------
+# /sample-data, /persona-samples, /benchmark/stats and /debug/generate-test-data
+# only change with the model version. They are sent with an ETag and may be
+# cached for STATIC_MAX_AGE seconds before clients revalidate.
+STATIC_MAX_AGE = int(os.getenv("STATIC_MAX_AGE", "300"))
+
+# --------------------
+# METRICS
+# --------------------
+# Prometheus metrics on /metrics: per-route request counts, latency and
+# in-flight requests, plus per-stage timings of the inference path. When
+# disabled, no timing code runs and /metrics returns 404.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# --------------------
+# PROFILING
+# --------------------
+# On-demand request profiles, kept in memory (the last PROFILE_HISTORY). A
+# request is profiled when it sends X-Profile: sample|cprofile together with
+# a valid X-Admin-Token, or when picked by the settings made through
+# POST /admin/profiling. Stacks are sampled every PROFILE_SAMPLE_INTERVAL_MS.
+# Without ADMIN_TOKEN profiling is unavailable and costs nothing.
+PROFILE_HISTORY = int(os.getenv("PROFILE_HISTORY", "50"))
+PROFILE_SAMPLE_INTERVAL_MS = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "1"))
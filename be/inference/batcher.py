@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from inference.metrics import Histogram
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+QUEUE_WAIT_BUCKETS = (0.0005, 0.001, 0.002, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+
+class MicroBatcher:
+    """
+    Coalesce concurrent single-record requests into one model call.
+
+    A record arriving while no batch is in flight is scored right away, so
+    an idle service adds no latency. Otherwise the first record to arrive
+    opens a window of `window_ms`; everything submitted before it closes, or
+    until `max_batch_size` records are collected, is scored by a single
+    `score_batch(records)` call on `run` (the inference executor). Results
+    are fanned back out to the waiting coroutines in submission order.
+    `score_batch` must return one result per record, in order. A failure of
+    the batch is raised in every waiter.
+    """
+
+    def __init__(self, score_batch, run, max_batch_size: int, window_ms: float):
+        self._score_batch = score_batch
+        self._run = run
+        self.max_batch_size = max_batch_size
+        self.window = window_ms / 1000.0
+
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+        # Batches being scored; cleared before their results are fanned out,
+        # so a waiter submitting again sees an idle batcher
+        self._in_flight = 0
+
+        self.batch_size = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait = Histogram(QUEUE_WAIT_BUCKETS)
+
+    async def submit(self, record):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((record, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size or not self._in_flight:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        self.batch_size.observe(len(batch))
+        self._in_flight += 1
+        task = asyncio.get_running_loop().create_task(self._run_batch(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _score(self, batch):
+        # Runs on the executor thread: queue wait covers both the batching
+        # window and any time spent waiting for a free worker
+        started = time.perf_counter()
+        for _, _, submitted in batch:
+            self.queue_wait.observe(started - submitted)
+        return self._score_batch([record for record, _, _ in batch])
+
+    async def _run_batch(self, batch):
+        try:
+            results = await self._run(self._score, batch)
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "window_ms": self.window * 1000.0,
+            "max_batch_size": self.max_batch_size,
+            "batch_size": self.batch_size.snapshot(),
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
@@ -0,0 +1,195 @@
+"""
+Offline bulk scoring of learner feature files.
+
+Streams a CSV or Parquet file in fixed-size chunks through the performance
+model, the persona assigner and the recommendation rules, and appends the
+results to a CSV or Parquet file as each chunk finishes, so memory use does
+not grow with the input size. Rows with missing or non-finite features are
+skipped and counted; pass --id-column to match results back to the input.
+Run from the `be` directory:
+
+    python -m inference.bulk cohort.parquet scores.parquet --workers 4
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from inference.bundle import ModelBundle
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER
+from inference.recommendations import recommendation_engine
+
+RESULT_COLUMNS = ["predicted_performance", "persona_cluster", "persona_label", "recommendations"]
+
+# Bundle of the current process, loaded once per pool worker
+_bundle = None
+
+
+def _load_bundle(model_dir: str):
+    global _bundle
+    _bundle = ModelBundle.load(model_dir)
+
+
+def file_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".parquet", ".pq"):
+        return "parquet"
+    if ext == ".csv":
+        return "csv"
+    raise ValueError(f"Unsupported file type: {path} (expected .csv or .parquet)")
+
+
+def read_chunks(path: str, chunk_size: int, columns):
+    """
+    Yield DataFrames of at most chunk_size rows with only the given columns
+    """
+    if file_format(path) == "csv":
+        yield from pd.read_csv(path, usecols=columns, chunksize=chunk_size)
+        return
+
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(path)
+    missing = [c for c in columns if c not in parquet.schema_arrow.names]
+    if missing:
+        raise ValueError(f"Missing columns in {path}: {missing}")
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+        yield batch.to_pandas()
+
+
+class ResultWriter:
+    """
+    Append result chunks to a CSV or Parquet file
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.format = file_format(path)
+        self._parquet = None
+        self._started = False
+
+    def write(self, df: pd.DataFrame):
+        if self.format == "csv":
+            df.to_csv(self.path, mode="a" if self._started else "w", header=not self._started, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        self._started = True
+
+    def close(self):
+        if self._parquet is not None:
+            self._parquet.close()
+
+
+def score_chunk(chunk: pd.DataFrame, id_column: str | None = None):
+    """
+    Score one chunk with the process-local bundle. Rows with a missing or
+    non-finite feature are left out; returns the results and their count.
+    """
+    perf_X = chunk[PERFORMANCE_ORDER].to_numpy(dtype=np.float64)
+    complete = np.isfinite(perf_X).all(axis=1)
+    skipped = int(len(chunk) - complete.sum())
+    if skipped:
+        chunk = chunk[complete]
+        perf_X = perf_X[complete]
+    if not len(chunk):
+        return pd.DataFrame(columns=([id_column] if id_column else []) + RESULT_COLUMNS), skipped
+
+    perf_X = np.ascontiguousarray(perf_X)
+    cluster_X = np.ascontiguousarray(chunk[CLUSTER_ORDER].to_numpy(dtype=np.float64))
+    preds, labels, _, recommendations = _bundle.score_matrices(perf_X, cluster_X)
+
+    labels = labels.tolist()
+    persona_labels = [_bundle.persona_mapping.get(str(c), "Unknown Persona") for c in labels]
+    titles = [
+        json.dumps([t["title"] for t in recs], ensure_ascii=False)
+        for recs in recommendation_engine.templates_for(recommendations)
+    ]
+
+    result = pd.DataFrame({
+        "predicted_performance": preds,
+        "persona_cluster": labels,
+        "persona_label": persona_labels,
+        "recommendations": titles,
+    })
+    if id_column:
+        result.insert(0, id_column, chunk[id_column].to_numpy())
+    return result, skipped
+
+
+def run(input_path: str, output_path: str, chunk_size: int = 50_000, workers: int = 1,
+        id_column: str | None = None, model_dir: str = "models"):
+    """
+    Score input_path into output_path. Returns the number of rows scored and
+    the number skipped for missing or non-finite features.
+    """
+    columns = list(PERFORMANCE_ORDER) + ([id_column] if id_column else [])
+    chunks = read_chunks(input_path, chunk_size, columns)
+    writer = ResultWriter(output_path)
+    rows = skipped = 0
+
+    def write(scored):
+        nonlocal rows, skipped
+        result, n_skipped = scored
+        skipped += n_skipped
+        # An empty chunk would give the Parquet file untyped columns
+        if len(result):
+            writer.write(result)
+            rows += len(result)
+
+    try:
+        if workers <= 1:
+            _load_bundle(model_dir)
+            for chunk in chunks:
+                write(score_chunk(chunk, id_column))
+        else:
+            # At most two chunks per worker are in flight, and results are
+            # written in input order as soon as the oldest one is done
+            with ProcessPoolExecutor(max_workers=workers, initializer=_load_bundle, initargs=(model_dir,)) as pool:
+                in_flight = deque()
+                for chunk in chunks:
+                    in_flight.append(pool.submit(score_chunk, chunk, id_column))
+                    if len(in_flight) >= workers * 2:
+                        write(in_flight.popleft().result())
+                while in_flight:
+                    write(in_flight.popleft().result())
+        if rows == 0:
+            writer.write(pd.DataFrame(columns=([id_column] if id_column else []) + RESULT_COLUMNS))
+        return rows, skipped
+    finally:
+        writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of learner features in chunks")
+    parser.add_argument("input", help="CSV or Parquet file with the PERFORMANCE_ORDER feature columns")
+    parser.add_argument("output", help="CSV or Parquet file to write results to")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="rows per chunk (default 50000)")
+    parser.add_argument("--workers", type=int, default=1, help="scoring processes (default 1, in-process)")
+    parser.add_argument("--id-column", help="input column copied through to the output")
+    parser.add_argument("--model-dir", default="models", help="directory with the model files")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    rows, skipped = run(args.input, args.output, args.chunk_size, args.workers, args.id_column, args.model_dir)
+    elapsed = time.perf_counter() - start
+
+    print(f"Scored {rows} rows in {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} rows/sec)",
+          file=sys.stderr)
+    if skipped:
+        print(f"Skipped {skipped} rows with missing or non-finite features", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
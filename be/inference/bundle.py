@@ -0,0 +1,262 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from inference.cache import LRUCache
+from inference.centroids import CentroidStats
+from inference.compiled import load_performance_model
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER, FeatureAssembler, check_feature_names
+from inference.metrics import stage
+from inference.native import digest_files, load_persona_bundle
+from inference.persona import PersonaAssigner
+from inference.population import load_population_index
+from inference.recommendations import INPUTS as RECOMMENDATION_INPUTS, recommendation_engine
+
+
+MODEL_FILES = (
+    "performance_predictor_model.pkl",
+    "kmeans_persona_model.pkl",
+    "scaler_clustering.pkl",
+    "persona_mapping.json",
+)
+
+
+def model_fingerprint(model_dir: str) -> str:
+    """
+    Short content hash of the model files, used as the bundle version
+    """
+    return digest_files(model_dir, MODEL_FILES)
+
+
+class ModelBundle:
+    """
+    The fitted models plus everything derived from them at load time.
+
+    Feature assemblers, the compiled persona assigner, centroid statistics
+    and the centroid prediction cache all belong to one bundle. Loading a new
+    bundle therefore rebuilds every derived artifact, and replacing the
+    bundle is the only thing needed to invalidate them.
+
+    The performance model can be given as a loader instead of an estimator;
+    it is then unpickled (importing sklearn) on first use. The optional
+    population index ranks learners against a reference population.
+
+    The score_* methods block and are meant to run on the inference executor.
+    """
+
+    def __init__(self, performance_model, persona_assigner: PersonaAssigner, cluster_centers,
+                 persona_mapping: dict, version: str = "dev", centroid_cache_size: int = 1024,
+                 model_dir: str | None = None, performance_loader=None, population=None):
+        self.version = version
+        self.model_dir = model_dir
+        self.loaded_at = time.time()
+        self.persona_assigner = persona_assigner
+        self.cluster_centers = np.asarray(cluster_centers, dtype=np.float64)
+        self.persona_mapping = persona_mapping
+        self.population = population
+
+        self._performance_model = None
+        self._performance_loader = performance_loader
+        self._performance_lock = threading.Lock()
+        if performance_model is not None:
+            self._set_performance_model(performance_model)
+
+        # Feature names are checked against the fitted models when they are
+        # bound, so scoring can pass plain NumPy rows instead of DataFrames
+        self.performance_features = FeatureAssembler(PERFORMANCE_ORDER)
+        self.cluster_features = FeatureAssembler(CLUSTER_ORDER)
+
+        self.centroids = CentroidStats.from_centers(self.cluster_centers, persona_mapping)
+        self.centroid_performance_cache = LRUCache(centroid_cache_size)
+
+        # Centroid rows in PERFORMANCE_ORDER; the two columns the centroids do
+        # not cover are filled in per comparison
+        self._centroid_rows = np.zeros((len(self.centroids.centroids), len(PERFORMANCE_ORDER)))
+        for col, name in enumerate(PERFORMANCE_ORDER):
+            if name in CLUSTER_ORDER:
+                self._centroid_rows[:, col] = self.cluster_centers[:, CLUSTER_ORDER.index(name)]
+        self._study_time_col = PERFORMANCE_ORDER.index("study_time_category")
+        self._active_days_col = PERFORMANCE_ORDER.index("total_active_days")
+
+        # Persona code of every cluster label, for the recommendation rules
+        self._label_persona_codes = np.array([
+            recommendation_engine.persona_code(persona_mapping.get(str(cluster_id), "Unknown Persona"))
+            for cluster_id in range(self.persona_assigner.n_clusters)
+        ])
+
+    def _set_performance_model(self, model):
+        check_feature_names(model, PERFORMANCE_ORDER)
+        self._performance_model = model
+
+    @property
+    def performance_model(self):
+        model = self._performance_model
+        if model is None:
+            with self._performance_lock:
+                if self._performance_model is None:
+                    self._set_performance_model(self._performance_loader())
+                model = self._performance_model
+        return model
+
+    @property
+    def performance_model_loaded(self) -> bool:
+        return self._performance_model is not None
+
+    @classmethod
+    def from_sklearn(cls, performance_model, kmeans_model, scaler, persona_mapping: dict, **kwargs):
+        """
+        Build a bundle from fitted sklearn objects. Scaler + KMeans are
+        compiled into a single distance computation, verified against the
+        sklearn path before serving.
+        """
+        check_feature_names(scaler, CLUSTER_ORDER)
+        persona_assigner = PersonaAssigner.from_models(scaler, kmeans_model)
+        persona_assigner.check_parity(scaler, kmeans_model)
+        return cls(performance_model, persona_assigner, kmeans_model.cluster_centers_, persona_mapping, **kwargs)
+
+    @classmethod
+    def load(cls, model_dir: str = "models", native: bool = True, **kwargs):
+        """
+        Load the bundle in model_dir. With native=True the persona models
+        come from the exported .npz when it is up to date, the performance
+        model from its compiled .npz when there is one, and otherwise the
+        performance model is only unpickled when it is first needed.
+        """
+        kwargs.setdefault("version", model_fingerprint(model_dir))
+        kwargs.setdefault("model_dir", model_dir)
+        kwargs.setdefault("population", load_population_index(model_dir))
+        performance_path = os.path.join(model_dir, "performance_predictor_model.pkl")
+
+        persona = load_persona_bundle(model_dir) if native else None
+        if persona is not None:
+            persona_assigner, cluster_centers, persona_mapping = persona
+
+            compiled = load_performance_model(model_dir)
+            if compiled is not None:
+                return cls(compiled, persona_assigner, cluster_centers, persona_mapping, **kwargs)
+
+            def load_pickled_performance_model():
+                import joblib
+                return joblib.load(performance_path)
+
+            return cls(None, persona_assigner, cluster_centers, persona_mapping,
+                       performance_loader=load_pickled_performance_model, **kwargs)
+
+        import joblib
+
+        performance_model = joblib.load(performance_path)
+        kmeans_model = joblib.load(os.path.join(model_dir, "kmeans_persona_model.pkl"))
+        scaler = joblib.load(os.path.join(model_dir, "scaler_clustering.pkl"))
+
+        with open(os.path.join(model_dir, "persona_mapping.json"), "r") as f:
+            persona_mapping = json.load(f)
+
+        return cls.from_sklearn(performance_model, kmeans_model, scaler, persona_mapping, **kwargs)
+
+    def warm_up(self):
+        """
+        Run the full pipeline once on the centroids so the first request on
+        this bundle does not pay for lazy initialisation, and refuse bundles
+        that cannot produce finite outputs
+        """
+        perf_X = self._centroid_rows.copy()
+        perf_X[:, self._study_time_col] = 2
+        perf_X[:, self._active_days_col] = 15
+        cluster_X = self.persona_assigner.raw_centroids
+
+        perf_preds, _, distances, _ = self.score_matrices(perf_X, cluster_X)
+        if not (np.isfinite(perf_preds).all() and np.isfinite(distances).all()):
+            raise ValueError(f"Model bundle {self.version} produced non-finite warm-up predictions")
+        self.centroid_performance(2, 15)
+
+    def score_performance(self, features) -> float:
+        with stage("feature_assembly"):
+            X = self.performance_features.row(features)
+        with stage("performance_predict"):
+            return float(self.performance_model.predict(X)[0])
+
+    def score_persona(self, features):
+        with stage("feature_assembly"):
+            X = self.cluster_features.row(features)
+        with stage("persona_assign"):
+            labels, distances = self.persona_assigner.assign(X)
+            return int(labels[0]), distances[0].tolist()
+
+    def score_performance_batch(self, records):
+        with stage("feature_assembly"):
+            X = self.performance_features.matrix(records)
+        with stage("performance_predict"):
+            return self.performance_model.predict(X)
+
+    def score_persona_batch(self, records):
+        with stage("feature_assembly"):
+            X = self.cluster_features.matrix(records)
+        with stage("persona_assign"):
+            return self.persona_assigner.assign(X)
+
+    def score_matrices(self, perf_X: np.ndarray, cluster_X: np.ndarray):
+        """
+        Run the full pipeline on feature matrices in PERFORMANCE_ORDER and
+        CLUSTER_ORDER. Returns predicted performance, cluster labels, centroid
+        distances and the recommendation template indices of every row.
+        """
+        with stage("performance_predict"):
+            perf_preds = self.performance_model.predict(perf_X)
+        with stage("persona_assign"):
+            labels, distances = self.persona_assigner.assign(cluster_X)
+
+        perf_col = PERFORMANCE_ORDER.index
+        inputs = {
+            "consistency_score": perf_X[:, perf_col("consistency_score")],
+            "total_activities": perf_X[:, perf_col("total_activities")],
+            "avg_minutes_per_module": perf_X[:, perf_col("avg_minutes_per_module")],
+            "weekend_ratio": cluster_X[:, CLUSTER_ORDER.index("weekend_ratio")],
+            "predicted_performance": perf_preds,
+            "persona": self._label_persona_codes[labels],
+        }
+        with stage("recommendations"):
+            X = np.column_stack([inputs[name] for name in RECOMMENDATION_INPUTS])
+            recommendations = recommendation_engine.evaluate(X)
+
+        return perf_preds, labels, distances, recommendations
+
+    def score_insight_batch(self, records):
+        """
+        Performance, persona and recommendations for a batch of
+        InsightFeatures, each computed once for the whole batch
+        """
+        with stage("feature_assembly"):
+            perf_X = self.performance_features.matrix([r.perf for r in records])
+            cluster_X = self.cluster_features.matrix([r.cluster for r in records])
+
+        perf_preds, labels, _, recommendations = self.score_matrices(perf_X, cluster_X)
+        with stage("recommendations"):
+            return perf_preds, labels, recommendation_engine.templates_for(recommendations)
+
+    def cached_centroid_performance(self, study_time_category: float, total_active_days: float):
+        """
+        Memoized centroid predictions for this key, or None on a miss
+        """
+        return self.centroid_performance_cache.get((study_time_category, total_active_days))
+
+    def centroid_performance(self, study_time_category: float, total_active_days: float):
+        """
+        Predicted performance of every centroid for the given study time
+        category and active days, in one model call, memoized in a bounded LRU
+        """
+        key = (study_time_category, total_active_days)
+        cached = self.centroid_performance_cache.get(key)
+        if cached is not None:
+            return cached
+
+        rows = self._centroid_rows.copy()
+        rows[:, self._study_time_col] = study_time_category
+        rows[:, self._active_days_col] = total_active_days
+
+        with stage("centroid_predict"):
+            preds = tuple(float(p) for p in self.performance_model.predict(rows))
+        self.centroid_performance_cache.put(key, preds)
+        return preds
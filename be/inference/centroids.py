@@ -0,0 +1,97 @@
+from collections.abc import Mapping
+from dataclasses import dataclass
+from types import MappingProxyType
+
+
+def freeze(value):
+    """
+    Recursively turn dicts and lists into read-only mappings and tuples
+    """
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def build_benchmark_stats(centroids) -> dict:
+    """
+    Response body of /benchmark/stats
+    """
+    benchmark_data = [
+        {
+            "cluster_id": c.cluster_id,
+            "persona": c.persona,
+            "avg_activities": round(c.total_activities, 2),
+            "avg_minutes_per_module": round(c.avg_minutes_per_module, 2),
+            "avg_consistency": round(c.consistency_score, 2),
+            "avg_weekend_ratio": round(c.weekend_ratio, 2)
+        }
+        for c in centroids
+    ]
+
+    # Overall averages are taken over the rounded per-persona values
+    n = len(benchmark_data)
+    overall_avg = {
+        key: round(sum(b[key] for b in benchmark_data) / n, 2)
+        for key in ("avg_activities", "avg_minutes_per_module", "avg_consistency", "avg_weekend_ratio")
+    }
+
+    return {
+        "benchmark_by_persona": benchmark_data,
+        "overall_average": overall_avg,
+        "total_personas": n
+    }
+
+
+@dataclass(frozen=True)
+class PersonaCentroid:
+    cluster_id: int
+    persona: str
+    total_activities: float
+    avg_minutes_per_module: float
+    consistency_score: float
+    weekend_ratio: float
+
+
+@dataclass(frozen=True)
+class CentroidStats:
+    """
+    Immutable statistics derived from the KMeans centroids.
+
+    Computed once per model load; the benchmark and comparison endpoints only
+    read from it. Centroid values are taken in CLUSTER_ORDER, as stored in
+    kmeans_model.cluster_centers_.
+    """
+
+    centroids: tuple[PersonaCentroid, ...]
+    avg_activities: float
+    avg_minutes_per_module: float
+    avg_consistency: float
+    avg_weekend_ratio: float
+    benchmark_stats: Mapping
+
+    @classmethod
+    def from_centers(cls, cluster_centers, persona_mapping: dict):
+        centroids = tuple(
+            PersonaCentroid(
+                cluster_id=cluster_id,
+                persona=persona_mapping.get(str(cluster_id), "Unknown"),
+                total_activities=float(centroid[0]),
+                avg_minutes_per_module=float(centroid[1]),
+                consistency_score=float(centroid[2]),
+                weekend_ratio=float(centroid[3]),
+            )
+            for cluster_id, centroid in enumerate(cluster_centers.tolist())
+        )
+
+        n = len(centroids)
+        return cls(
+            centroids=centroids,
+            avg_activities=sum(c.total_activities for c in centroids) / n,
+            avg_minutes_per_module=sum(c.avg_minutes_per_module for c in centroids) / n,
+            avg_consistency=sum(c.consistency_score for c in centroids) / n,
+            avg_weekend_ratio=sum(c.weekend_ratio for c in centroids) / n,
+            benchmark_stats=freeze(build_benchmark_stats(centroids)),
+        )
+
@@ -0,0 +1,225 @@
+"""
+Columnar request and response bodies for the batch endpoints.
+
+Bulk clients can send Arrow IPC streams (application/vnd.apache.arrow.stream)
+or MessagePack maps of columns (application/msgpack) instead of JSON arrays of
+objects. A batch is checked against the expected feature order once, as a
+schema, and becomes the float64 matrix fed to the models directly:
+
+- Arrow with one `features` column of fixed-size lists (one float64 list of
+  the model's features per row) is used without copying when it arrives
+  as a single record batch.
+- Arrow or MessagePack with one column per feature name is copied once,
+  column by column, into the matrix. Extra columns are ignored.
+
+Results go back as columns in the request's format, or in the columnar
+format named in Accept: an Arrow record batch, or a MessagePack map of lists.
+pyarrow and msgpack are optional; a format whose package is missing is
+answered with 415 (request body) or 406 (Accept).
+"""
+import importlib.util
+
+import numpy as np
+
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER
+from inference.metrics import stage
+from inference.recommendations import recommendation_engine
+
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+MSGPACK = "application/msgpack"
+
+FORMATS = {
+    ARROW_STREAM: "arrow",
+    MSGPACK: "msgpack",
+    "application/x-msgpack": "msgpack",
+}
+MEDIA_TYPES = {"arrow": ARROW_STREAM, "msgpack": MSGPACK}
+PACKAGES = {"arrow": "pyarrow", "msgpack": "msgpack"}
+
+# Single column holding each row's features as one fixed-size list
+FEATURES_COLUMN = "features"
+
+_CLUSTER_COLUMNS = [PERFORMANCE_ORDER.index(name) for name in CLUSTER_ORDER]
+
+
+def available(fmt: str) -> bool:
+    """
+    True when the package behind a columnar format is installed
+    """
+    return importlib.util.find_spec(PACKAGES[fmt]) is not None
+
+
+def request_format(content_type: str):
+    """
+    "arrow", "msgpack" or None (JSON) for a Content-Type header
+    """
+    if not content_type:
+        return None
+    return FORMATS.get(content_type.split(";")[0].strip().lower())
+
+
+def response_format(accept: str, default: str) -> str:
+    """
+    Columnar format asked for in the Accept header, else `default`
+    """
+    for part in (accept or "").split(","):
+        fmt = FORMATS.get(part.split(";")[0].strip().lower())
+        if fmt is not None:
+            return fmt
+    return default
+
+
+def _check_finite(X: np.ndarray) -> np.ndarray:
+    if not np.isfinite(X).all():
+        raise ValueError("Features must be finite numbers")
+    return X
+
+
+def _arrow_matrix(body: bytes, order) -> np.ndarray:
+    import pyarrow as pa
+
+    try:
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+    except pa.ArrowInvalid as e:
+        raise ValueError(f"Invalid Arrow IPC stream: {e}")
+    schema = table.schema
+
+    if FEATURES_COLUMN in schema.names:
+        field = schema.field(FEATURES_COLUMN)
+        if not (pa.types.is_fixed_size_list(field.type) and field.type.list_size == len(order)
+                and pa.types.is_floating(field.type.value_type)):
+            raise ValueError(
+                f"Column {FEATURES_COLUMN} must be a fixed-size list of {len(order)} floats in the order {list(order)}"
+            )
+        column = table.column(FEATURES_COLUMN).combine_chunks()
+        if column.null_count or column.flatten().null_count:
+            raise ValueError(f"Column {FEATURES_COLUMN} contains nulls")
+        values = column.flatten().to_numpy(zero_copy_only=False)
+        return _check_finite(values.astype(np.float64, copy=False).reshape(-1, len(order)))
+
+    missing = [name for name in order if name not in schema.names]
+    if missing:
+        raise ValueError(f"Missing columns {missing}")
+    for name in order:
+        field = schema.field(name)
+        if not (pa.types.is_integer(field.type) or pa.types.is_floating(field.type)):
+            raise ValueError(f"Column {name} must be numeric, got {field.type}")
+        if table.column(name).null_count:
+            raise ValueError(f"Column {name} contains nulls")
+
+    X = np.empty((table.num_rows, len(order)), dtype=np.float64)
+    for j, name in enumerate(order):
+        X[:, j] = table.column(name).to_numpy()
+    return _check_finite(X)
+
+
+def _msgpack_matrix(body: bytes, order) -> np.ndarray:
+    import msgpack
+
+    try:
+        columns = msgpack.unpackb(body)
+    except Exception as e:
+        raise ValueError(f"Invalid MessagePack body: {e}")
+    if not isinstance(columns, dict):
+        raise ValueError("MessagePack body must be a map of columns")
+
+    try:
+        if FEATURES_COLUMN in columns:
+            X = np.asarray(columns[FEATURES_COLUMN], dtype=np.float64)
+            if X.ndim != 2 or X.shape[1] != len(order):
+                raise ValueError(f"{FEATURES_COLUMN} must be rows of {len(order)} numbers in the order {list(order)}")
+            return _check_finite(X)
+
+        missing = [name for name in order if name not in columns]
+        if missing:
+            raise ValueError(f"Missing columns {missing}")
+        lengths = {len(columns[name]) for name in order}
+        if len(lengths) != 1:
+            raise ValueError("All columns must have the same length")
+
+        X = np.empty((lengths.pop(), len(order)), dtype=np.float64)
+        for j, name in enumerate(order):
+            X[:, j] = columns[name]
+    except (TypeError, ValueError) as e:
+        raise ValueError(str(e))
+    return _check_finite(X)
+
+
+def read_matrix(body: bytes, fmt: str, order) -> np.ndarray:
+    """
+    Feature matrix in `order` from a columnar body. Raises ValueError for
+    bodies that do not match the schema.
+    """
+    with stage("feature_assembly"):
+        if fmt == "arrow":
+            return _arrow_matrix(body, order)
+        return _msgpack_matrix(body, order)
+
+
+def _arrow_array(values):
+    import pyarrow as pa
+
+    if isinstance(values, np.ndarray) and values.ndim == 2:
+        return pa.FixedSizeListArray.from_arrays(pa.array(values.reshape(-1)), values.shape[1])
+    return pa.array(values)
+
+
+def write_columns(columns: dict, fmt: str) -> bytes:
+    """
+    Serialize result columns (NumPy arrays or lists) as an Arrow IPC stream
+    with one record batch, or as a MessagePack map of lists
+    """
+    if fmt == "arrow":
+        import pyarrow as pa
+
+        batch = pa.record_batch({name: _arrow_array(values) for name, values in columns.items()})
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+    import msgpack
+
+    return msgpack.packb({
+        name: values.tolist() if isinstance(values, np.ndarray) else values
+        for name, values in columns.items()
+    })
+
+
+# --------------------
+# SCORING
+# --------------------
+# Each takes a matrix from read_matrix and returns the encoded response body
+def score_performance(bundle, X: np.ndarray, fmt: str) -> bytes:
+    with stage("performance_predict"):
+        preds = np.asarray(bundle.performance_model.predict(X), dtype=np.float64)
+    return write_columns({"predicted_performance": preds}, fmt)
+
+
+def score_persona(bundle, X: np.ndarray, fmt: str) -> bytes:
+    with stage("persona_assign"):
+        labels, distances = bundle.persona_assigner.assign(X)
+    mapping = bundle.persona_mapping
+    return write_columns({
+        "cluster": labels,
+        "persona": [mapping.get(str(label), "Unknown Persona") for label in labels.tolist()],
+        "centroid_distances": np.asarray(distances, dtype=np.float64),
+    }, fmt)
+
+
+def score_insight(bundle, X: np.ndarray, fmt: str) -> bytes:
+    """
+    Rows hold the performance features; cluster features are taken from
+    the same values, as for /predict/stream
+    """
+    cluster_X = np.ascontiguousarray(X[:, _CLUSTER_COLUMNS])
+    preds, labels, _, recommendations = bundle.score_matrices(X, cluster_X)
+    mapping = bundle.persona_mapping
+    return write_columns({
+        "predicted_performance": np.asarray(preds, dtype=np.float64),
+        "persona_cluster": labels,
+        "persona_label": [mapping.get(str(label), "Unknown Persona") for label in labels.tolist()],
+        "recommendations": [
+            [t["title"] for t in recs] for recs in recommendation_engine.templates_for(recommendations)
+        ],
+    }, fmt)
@@ -0,0 +1,299 @@
+"""
+Compiled, sklearn-free form of the performance predictor.
+
+Tree ensembles (random forests, extra trees, gradient boosting, single
+decision trees) are flattened into one set of node arrays and evaluated
+for all rows and all trees at once, one tree level per step. Linear models
+keep their coefficient vector. The export is a single uncompressed .npz
+next to the pickle; serving loads it with NumPy alone. Like the persona
+bundle it records a hash of the pickle and is ignored once that changes.
+
+Tolerance: tree decisions are identical to sklearn's. Inputs are cast to
+float32 as sklearn does, and float64 thresholds are rounded down to float32,
+which keeps every comparison unchanged. Leaf values are accumulated in
+float64, tree by tree, in sklearn's order, so predictions agree to within
+TOLERANCE (they are normally bit-identical). The export refuses to write a
+model that does not.
+
+Export from the `be` directory:
+
+    python -m inference.compiled [--model-dir models]
+"""
+import argparse
+import os
+
+import numpy as np
+
+from inference.features import PERFORMANCE_ORDER, check_feature_names
+from inference.native import digest_files
+
+PERFORMANCE_BUNDLE = "performance_model.npz"
+PERFORMANCE_SOURCES = ("performance_predictor_model.pkl",)
+FORMAT_VERSION = 1
+
+# Largest absolute difference to sklearn's predictions accepted at export
+TOLERANCE = 1e-9
+
+
+def round_down_float32(values: np.ndarray) -> np.ndarray:
+    """
+    Largest float32 not above each value: for a float32 x,
+    x <= value exactly when x <= round_down_float32(value)
+    """
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def sequential_sum(leaves: np.ndarray) -> np.ndarray:
+    """
+    Sum over the trees (axis 0) strictly one after another, as sklearn
+    accumulates them. ndarray.sum may use pairwise summation instead, which
+    can differ in the last bit.
+    """
+    return np.cumsum(leaves, axis=0)[-1]
+
+
+class CompiledTrees:
+    """
+    Flat node arrays of a tree ensemble.
+
+    `children` holds the (left, right) pair of every node; leaves point at
+    themselves, so rows that reach a leaf early just stay there for the
+    remaining levels. The prediction of a row is `base` plus the sum of
+    `scale` times its leaf value in every tree.
+    """
+
+    def __init__(self, feature, threshold, children, value, roots, max_depth: int,
+                 base: float = 0.0, scale: float = 1.0, feature_names=PERFORMANCE_ORDER):
+        self.feature = np.asarray(feature, dtype=np.intp)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.children = np.asarray(children, dtype=np.intp).reshape(-1)
+        self.value = np.asarray(value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.max_depth = int(max_depth)
+        self.base = float(base)
+        self.scale = float(scale)
+        self.feature_names_in_ = np.array(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+
+    @classmethod
+    def from_estimators(cls, trees, base: float = 0.0, scale: float = 1.0, **kwargs):
+        features, thresholds, children, values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+        for tree in trees:
+            t = tree.tree_
+            if t.n_outputs != 1:
+                raise ValueError("Only single-output trees can be compiled")
+            nodes = np.arange(t.node_count)
+            leaf = t.children_left == -1
+
+            features.append(np.where(leaf, 0, t.feature))
+            thresholds.append(round_down_float32(np.where(leaf, 0.0, t.threshold)))
+            children.append(np.stack([
+                np.where(leaf, nodes, t.children_left),
+                np.where(leaf, nodes, t.children_right),
+            ], axis=1) + offset)
+            values.append(t.value[:, 0, 0])
+            roots.append(offset)
+            offset += t.node_count
+            max_depth = max(max_depth, t.max_depth)
+
+        return cls(
+            np.concatenate(features), np.concatenate(thresholds), np.concatenate(children),
+            np.concatenate(values), np.array(roots), max_depth, base=base, scale=scale, **kwargs
+        )
+
+    def predict(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_rows, n_features = X.shape
+        flat = X.reshape(-1)
+
+        nodes = np.repeat(self.roots[:, None], n_rows, axis=1)
+        row_start = np.arange(n_rows) * n_features
+        for _ in range(self.max_depth):
+            go_right = flat[row_start + self.feature[nodes]] > self.threshold[nodes]
+            nodes = self.children[2 * nodes + go_right]
+
+        leaves = self.value[nodes]
+        if self.scale != 1.0:
+            leaves *= self.scale
+        return self._combine(leaves)
+
+    def _combine(self, leaves: np.ndarray) -> np.ndarray:
+        if self.base:
+            leaves = np.concatenate([np.full((1, leaves.shape[1]), self.base), leaves])
+        return sequential_sum(leaves)
+
+    def arrays(self) -> dict:
+        return {
+            "feature": self.feature.astype(np.int32),
+            "threshold": self.threshold,
+            "children": self.children.astype(np.int32),
+            "value": self.value,
+            "roots": self.roots.astype(np.int32),
+            "max_depth": np.array(self.max_depth),
+            "base": np.array(self.base),
+            "scale": np.array(self.scale),
+        }
+
+
+class CompiledForest(CompiledTrees):
+    """
+    Averaging ensemble: the sum over trees is divided by their number
+    """
+
+    def _combine(self, leaves: np.ndarray) -> np.ndarray:
+        return sequential_sum(leaves) / len(self.roots)
+
+
+class CompiledLinear:
+    """
+    Linear model as a coefficient vector and an intercept
+    """
+
+    def __init__(self, coef, intercept: float, feature_names=PERFORMANCE_ORDER):
+        self.coef = np.asarray(coef, dtype=np.float64).reshape(-1)
+        self.intercept = float(intercept)
+        self.feature_names_in_ = np.array(feature_names, dtype=object)
+        self.n_features_in_ = len(feature_names)
+
+    def predict(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def arrays(self) -> dict:
+        return {"coef": self.coef, "intercept": np.array(self.intercept)}
+
+
+KINDS = {"trees": CompiledTrees, "forest": CompiledForest, "linear": CompiledLinear}
+
+
+def compile_model(model):
+    """
+    Compiled counterpart of a fitted sklearn regressor. Raises TypeError for
+    model types that cannot be compiled.
+    """
+    from sklearn.ensemble import ExtraTreesRegressor, GradientBoostingRegressor, RandomForestRegressor
+    from sklearn.linear_model._base import LinearModel
+    from sklearn.tree import BaseDecisionTree
+
+    if isinstance(model, (RandomForestRegressor, ExtraTreesRegressor)):
+        return CompiledForest.from_estimators(model.estimators_)
+    if isinstance(model, BaseDecisionTree):
+        return CompiledTrees.from_estimators([model])
+    if isinstance(model, GradientBoostingRegressor):
+        if model.init_ == "zero":
+            base = 0.0
+        elif hasattr(model.init_, "constant_"):
+            base = float(np.ravel(model.init_.constant_)[0])
+        else:
+            raise TypeError("Gradient boosting with a non-constant init estimator cannot be compiled")
+        return CompiledTrees.from_estimators(model.estimators_[:, 0], base=base, scale=model.learning_rate)
+    if isinstance(model, LinearModel) and np.ndim(model.coef_) == 1:
+        return CompiledLinear(model.coef_, model.intercept_)
+    raise TypeError(f"Cannot compile {type(model).__name__}")
+
+
+def kind_of(compiled) -> str:
+    return next(kind for kind, cls in KINDS.items() if type(compiled) is cls)
+
+
+def parity_inputs(compiled, n_random: int = 2000, seed: int = 0) -> np.ndarray:
+    """
+    Rows to compare on: random rows spanning every feature's split range,
+    plus rows sitting exactly on split thresholds
+    """
+    rng = np.random.default_rng(seed)
+    n_features = compiled.n_features_in_
+    X = rng.uniform(0, 1, (n_random, n_features))
+    if isinstance(compiled, CompiledTrees):
+        for f in range(n_features):
+            splits = compiled.threshold[(compiled.feature == f) & (compiled.threshold != 0)]
+            if splits.size:
+                low, high = float(splits.min()), float(splits.max())
+                X[:, f] = low + X[:, f] * (high - low) * 1.2 - (high - low) * 0.1
+                on_split = rng.choice(splits, n_random // 2)
+                X[: n_random // 2, f] = on_split
+    return X
+
+
+def check_parity(model, compiled, X=None) -> float:
+    """
+    Largest absolute difference to sklearn on X (or parity_inputs), raising
+    ValueError above TOLERANCE
+    """
+    X = parity_inputs(compiled) if X is None else X
+    expected = model.predict(X)
+    diff = float(np.max(np.abs(compiled.predict(X) - expected)))
+    if not diff <= TOLERANCE:
+        raise ValueError(f"Compiled model differs from sklearn by up to {diff}, tolerance is {TOLERANCE}")
+    return diff
+
+
+def export_performance_model(model_dir: str = "models", path: str | None = None):
+    """
+    Compile the performance model in model_dir, check it against sklearn
+    and write it. Returns the path and the largest difference seen.
+    """
+    import joblib
+
+    model = joblib.load(os.path.join(model_dir, "performance_predictor_model.pkl"))
+    check_feature_names(model, PERFORMANCE_ORDER)
+    compiled = compile_model(model)
+    diff = check_parity(model, compiled)
+
+    path = path or os.path.join(model_dir, PERFORMANCE_BUNDLE)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            format_version=np.array(FORMAT_VERSION),
+            sources=np.array(digest_files(model_dir, PERFORMANCE_SOURCES)),
+            feature_names=np.array(PERFORMANCE_ORDER),
+            kind=np.array(kind_of(compiled)),
+            **compiled.arrays(),
+        )
+    return path, diff
+
+
+def load_performance_model(model_dir: str = "models"):
+    """
+    Compiled performance model from model_dir, or None when it is missing,
+    from an older format or stale
+    """
+    path = os.path.join(model_dir, PERFORMANCE_BUNDLE)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["format_version"]) != FORMAT_VERSION:
+            return None
+        if str(data["sources"]) != digest_files(model_dir, PERFORMANCE_SOURCES):
+            return None
+        if list(data["feature_names"]) != PERFORMANCE_ORDER:
+            raise ValueError(
+                f"{path} was exported with features {list(data['feature_names'])}, expected {PERFORMANCE_ORDER}"
+            )
+
+        kind = str(data["kind"])
+        if kind == "linear":
+            return CompiledLinear(data["coef"], float(data["intercept"]))
+        return KINDS[kind](
+            data["feature"], data["threshold"], data["children"], data["value"], data["roots"],
+            int(data["max_depth"]), base=float(data["base"]), scale=float(data["scale"])
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile the performance model to the native .npz format")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output", default=None, help=f"defaults to MODEL_DIR/{PERFORMANCE_BUNDLE}")
+    args = parser.parse_args(argv)
+
+    path, diff = export_performance_model(args.model_dir, args.output)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes), max difference to sklearn {diff:.3g}")
+
+
+if __name__ == "__main__":
+    main()
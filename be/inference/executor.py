@@ -0,0 +1,81 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from inference.metrics import observe_stage, stage_timing_enabled
+from inference.profiling import current_profile, profiling_active
+
+
+class ExecutorSaturated(Exception):
+    """
+    Raised when the inference pool already holds its maximum number of jobs
+    """
+
+
+class InferenceExecutor:
+    """
+    Bounded thread pool for blocking model calls.
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a free worker. Anything beyond that is rejected immediately with
+    ExecutorSaturated instead of piling up behind the event loop, so the
+    caller can shed load (HTTP 429). A slot is released only when the job has
+    actually finished, even if the awaiting request was cancelled meanwhile.
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.max_pending = max_workers + max_queue
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._rejected = 0
+
+    def _release(self, _future):
+        with self._lock:
+            self._pending -= 1
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise ExecutorSaturated(
+                    f"Inference queue is full ({self.max_pending} jobs pending)"
+                )
+            self._pending += 1
+
+        if profiling_active():
+            profile = current_profile.get()
+            if profile is not None:
+                fn, args = profile.run_job, (fn, args)
+        if stage_timing_enabled():
+            fn, args = self._timed, (time.perf_counter(), fn, args)
+
+        try:
+            future = self._pool.submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    @staticmethod
+    def _timed(submitted, fn, args):
+        observe_stage("executor_queue", time.perf_counter() - submitted)
+        return fn(*args)
+
+    def stats(self) -> dict:
+        with self._lock:
+            pending = self._pending
+            rejected = self._rejected
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": pending,
+            "rejected": rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=True, cancel_futures=True)
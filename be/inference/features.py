@@ -0,0 +1,86 @@
+import threading
+import warnings
+from operator import attrgetter
+
+import numpy as np
+
+# Ensure correct order for performance ML model
+PERFORMANCE_ORDER = [
+    "total_activities",
+    "avg_minutes_per_module",
+    "consistency_score",
+    "weekend_ratio",
+    "study_time_category",
+    "total_active_days",
+]
+
+# Ensure correct order for clustering model/scaler
+CLUSTER_ORDER = [
+    "total_activities",
+    "avg_minutes_per_module",
+    "consistency_score",
+    "weekend_ratio"
+]
+
+# Feature names are validated once when an assembler is bound to an estimator,
+# after which rows are passed as plain arrays. sklearn would otherwise warn on
+# every call that the array carries no column names.
+warnings.filterwarnings(
+    "ignore",
+    message="X does not have valid feature names",
+    category=UserWarning,
+)
+
+
+def check_feature_names(estimator, order):
+    """
+    Make sure a fitted estimator expects exactly the given feature order
+    """
+    names = getattr(estimator, "feature_names_in_", None)
+    if names is not None and list(names) != list(order):
+        raise ValueError(
+            f"{type(estimator).__name__} was fitted with features {list(names)}, "
+            f"expected {list(order)}"
+        )
+
+    n_features = getattr(estimator, "n_features_in_", None)
+    if n_features is not None and n_features != len(order):
+        raise ValueError(
+            f"{type(estimator).__name__} expects {n_features} features, got {len(order)}"
+        )
+
+
+class FeatureAssembler:
+    """
+    Turn pydantic feature models into contiguous float64 arrays in model order.
+
+    `row` fills a preallocated (1, n_features) buffer owned by the calling
+    thread, so the returned array is only valid until the next `row` call on
+    that thread. Copy it if it has to outlive the model call.
+    """
+
+    def __init__(self, order, *estimators):
+        self.order = tuple(order)
+        self.n_features = len(self.order)
+        self._getter = attrgetter(*self.order)
+        self._local = threading.local()
+
+        for estimator in estimators:
+            check_feature_names(estimator, self.order)
+
+    def values(self, features) -> tuple:
+        return self._getter(features)
+
+    def row(self, features) -> np.ndarray:
+        buf = getattr(self._local, "row", None)
+        if buf is None:
+            buf = self._local.row = np.empty((1, self.n_features), dtype=np.float64)
+        buf[0] = self._getter(features)
+        return buf
+
+    def matrix(self, records) -> np.ndarray:
+        X = np.empty((len(records), self.n_features), dtype=np.float64)
+        getter = self._getter
+        for i, record in enumerate(records):
+            X[i] = getter(record)
+        return X
@@ -0,0 +1,285 @@
+"""
+Per-learner activity aggregates in an embedded SQLite database.
+
+Raw learning-activity events are folded into running counters as they are
+ingested: one upsert of the learner row plus one insert into the set of
+active days, whatever the length of the learner's history. The model
+features are derived from those counters on read, so scoring a stored
+learner never looks at past events.
+
+Feature definitions:
+
+- total_activities: number of events
+- avg_minutes_per_module: mean minutes per event
+- weekend_ratio: share of events on a Saturday or Sunday
+- total_active_days: number of distinct days with at least one event
+- consistency_score: 1-10, from the share of days between the first and
+  the last active day on which the learner was active
+- study_time_category: 1, 2 or 3 for an average of under 15, 15 to 30 or
+  over 30 minutes of study per active day
+"""
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS learners (
+    learner_id TEXT PRIMARY KEY,
+    events INTEGER NOT NULL,
+    minutes REAL NOT NULL,
+    weekend_events INTEGER NOT NULL,
+    active_days INTEGER NOT NULL,
+    first_day INTEGER NOT NULL,
+    last_day INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS learner_days (
+    learner_id TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    PRIMARY KEY (learner_id, day)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS learner_insights (
+    learner_id TEXT NOT NULL,
+    model_version TEXT NOT NULL,
+    learner_updated_at REAL NOT NULL,
+    computed_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (learner_id, model_version)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS leases (
+    name TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+UPSERT_LEARNER = """
+INSERT INTO learners (learner_id, events, minutes, weekend_events, active_days, first_day, last_day, updated_at)
+VALUES (?, 1, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (learner_id) DO UPDATE SET
+    events = events + 1,
+    minutes = minutes + excluded.minutes,
+    weekend_events = weekend_events + excluded.weekend_events,
+    active_days = active_days + excluded.active_days,
+    first_day = min(first_day, excluded.first_day),
+    last_day = max(last_day, excluded.last_day),
+    updated_at = excluded.updated_at
+"""
+
+LEARNER_COLUMNS = "events, minutes, weekend_events, active_days, first_day, last_day, updated_at"
+
+# Learners without an insight for the version, or whose counters changed
+# since it was computed. Keyset-paginated on learner_id.
+STALE_LEARNERS = f"""
+SELECT l.learner_id, {", ".join("l." + c for c in LEARNER_COLUMNS.split(", "))}
+FROM learners l
+LEFT JOIN learner_insights i ON i.learner_id = l.learner_id AND i.model_version = ?
+WHERE (i.learner_updated_at IS NULL OR i.learner_updated_at != l.updated_at) AND l.learner_id > ?
+ORDER BY l.learner_id
+LIMIT ?
+"""
+
+# A materialized insight counts only while the learner is unchanged
+FRESH_INSIGHT = """
+SELECT i.payload
+FROM learner_insights i
+JOIN learners l ON l.learner_id = i.learner_id AND l.updated_at = i.learner_updated_at
+WHERE i.learner_id = ? AND i.model_version = ?
+"""
+
+ACQUIRE_LEASE = """
+INSERT INTO leases (name, owner, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+WHERE leases.owner = excluded.owner OR leases.expires_at < ?
+"""
+
+
+def study_time_category(minutes_per_day: float) -> int:
+    if minutes_per_day < 15:
+        return 1
+    if minutes_per_day <= 30:
+        return 2
+    return 3
+
+
+def learner_features(events: int, minutes: float, weekend_events: int, active_days: int,
+                     first_day: int, last_day: int) -> dict:
+    """
+    Model features from a learner's counters, keyed by feature name
+    """
+    span = last_day - first_day + 1
+    return {
+        "total_activities": float(events),
+        "avg_minutes_per_module": minutes / events,
+        "consistency_score": 1 + 9 * active_days / span,
+        "weekend_ratio": weekend_events / events,
+        "study_time_category": float(study_time_category(minutes / active_days)),
+        "total_active_days": float(active_days),
+    }
+
+
+class LearnerStore:
+    """
+    SQLite-backed learner aggregates and materialized insights.
+
+    Every thread opens its own connection on first use (and again after a
+    fork), so reads never wait on each other or on a writer: the database
+    runs in WAL mode. Writes from one process are serialized by a lock and
+    take the database lock up front. ":memory:" is a shared in-process
+    database that lives as long as the store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _connect(self):
+        if self.path == ":memory:":
+            conn = sqlite3.connect(
+                f"file:learner-store-{id(self)}?mode=memory&cache=shared",
+                uri=True, check_same_thread=False, isolation_level=None
+            )
+            conn.execute("PRAGMA read_uncommitted=1")
+        else:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._write_lock:
+            conn.executescript(SCHEMA)
+        return conn
+
+    def _connection(self):
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.conn, local.pid = self._connect(), os.getpid()
+            with self._connections_lock:
+                self._connections.append((local.pid, local.conn))
+        return local.conn
+
+    @contextmanager
+    def _transaction(self):
+        """
+        Write transaction holding the database lock from the start
+        """
+        conn = self._connection()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def ingest(self, events) -> int:
+        """
+        Fold (learner_id, timestamp, minutes) events into the aggregates in
+        one transaction. Returns the number of distinct learners touched.
+        """
+        now = time.time()
+        learners = set()
+        with self._transaction() as conn:
+            for learner_id, timestamp, minutes in events:
+                day = timestamp.date()
+                ordinal = day.toordinal()
+                new_day = conn.execute(
+                    "INSERT OR IGNORE INTO learner_days (learner_id, day) VALUES (?, ?)",
+                    (learner_id, ordinal)
+                ).rowcount
+                conn.execute(UPSERT_LEARNER, (
+                    learner_id, minutes, int(day.weekday() >= 5), new_day, ordinal, ordinal, now
+                ))
+                learners.add(learner_id)
+        return len(learners)
+
+    def counters(self, learner_id: str):
+        """
+        Raw counters of one learner as a dict, or None if it has no events
+        """
+        row = self._connection().execute(
+            f"SELECT {LEARNER_COLUMNS} FROM learners WHERE learner_id = ?", (learner_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(LEARNER_COLUMNS.split(", "), row))
+
+    def features(self, learner_id: str):
+        """
+        Model features of one learner, or None if it has no events
+        """
+        counters = self.counters(learner_id)
+        if counters is None:
+            return None
+        counters.pop("updated_at")
+        return learner_features(**counters)
+
+    def stale_learners(self, version: str, chunk_size: int = 1000):
+        """
+        Yield lists of (learner_id, features, updated_at) for every learner
+        whose insight for `version` is missing or out of date
+        """
+        after = ""
+        while True:
+            rows = self._connection().execute(STALE_LEARNERS, (version, after, chunk_size)).fetchall()
+            if not rows:
+                return
+            yield [(row[0], learner_features(*row[1:7]), row[7]) for row in rows]
+            after = rows[-1][0]
+
+    def save_insights(self, version: str, rows):
+        """
+        Store (learner_id, learner updated_at, JSON payload) rows as the
+        insights of `version`
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO learner_insights "
+                "(learner_id, model_version, learner_updated_at, computed_at, payload) VALUES (?, ?, ?, ?, ?)",
+                [(learner_id, version, updated_at, now, payload) for learner_id, updated_at, payload in rows]
+            )
+
+    def insight(self, learner_id: str, version: str):
+        """
+        Materialized insight payload of a learner for `version`, or None
+        when it is missing or older than the learner's last event
+        """
+        row = self._connection().execute(FRESH_INSIGHT, (learner_id, version)).fetchone()
+        return row[0] if row is not None else None
+
+    def prune_insights(self, keep_versions) -> int:
+        """
+        Drop materialized insights of model versions no longer loaded
+        """
+        keep = list(keep_versions)
+        with self._transaction() as conn:
+            return conn.execute(
+                f"DELETE FROM learner_insights WHERE model_version NOT IN ({', '.join('?' * len(keep))})", keep
+            ).rowcount
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """
+        Take or renew the named lease for `ttl` seconds. False while
+        another owner holds an unexpired lease, so only one of several
+        processes sharing the database runs a scheduled job.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            return conn.execute(ACQUIRE_LEASE, (name, owner, now + ttl, now)).rowcount == 1
+
+    def count(self) -> int:
+        return self._connection().execute("SELECT count(*) FROM learners").fetchone()[0]
+
+    def close(self):
+        pid = os.getpid()
+        with self._connections_lock:
+            for owner, conn in self._connections:
+                if owner == pid:
+                    conn.close()
+            self._connections = []
+        self._local = threading.local()
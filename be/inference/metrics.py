@@ -0,0 +1,229 @@
+import bisect
+import contextlib
+import threading
+import time
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed upper bounds, safe to observe from any thread
+    """
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+
+        cumulative = {}
+        running = 0
+        for bound, n in zip(self.buckets, counts):
+            running += n
+            cumulative[str(bound)] = running
+        cumulative["+Inf"] = count
+
+        return {"buckets": cumulative, "count": count, "sum": total}
+
+
+class Counter:
+    """
+    Monotonic counter, safe to increment from any thread
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down, e.g. requests in flight
+    """
+
+    def dec(self, amount=1):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value):
+        with self._lock:
+            self.value = value
+
+
+def format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        f'{k}="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in labels.items()
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+def format_value(value) -> str:
+    if isinstance(value, float):
+        if value == float("inf"):
+            return "+Inf"
+        return repr(value)
+    return str(value)
+
+
+def histogram_lines(name: str, labels: dict, histogram: Histogram):
+    """
+    Prometheus samples of one histogram: cumulative buckets, sum and count
+    """
+    snapshot = histogram.snapshot()
+    lines = [
+        f"{name}_bucket{format_labels({**labels, 'le': bound})} {count}"
+        for bound, count in snapshot["buckets"].items()
+    ]
+    lines.append(f"{name}_sum{format_labels(labels)} {format_value(snapshot['sum'])}")
+    lines.append(f"{name}_count{format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+class MetricFamily:
+    """
+    One named metric with a fixed set of label names. Children are created
+    on first use of a label combination and live for the process lifetime,
+    so labels must come from a small, bounded set of values.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, labelnames=(), factory=Counter):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self._factory = factory
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.get(values)
+                if child is None:
+                    child = self._children[values] = self._factory()
+        return child
+
+    def lines(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            labels = dict(zip(self.labelnames, values))
+            if self.kind == "histogram":
+                lines.extend(histogram_lines(self.name, labels, child))
+            else:
+                lines.append(f"{self.name}{format_labels(labels)} {format_value(child.value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Metric families plus collectors, rendered in the Prometheus text format.
+
+    Collectors are callables returning ready-made exposition lines; they
+    report state that already lives elsewhere (executor queue, caches,
+    micro-batchers) at scrape time instead of mirroring it on every update.
+    """
+
+    def __init__(self):
+        self._families = []
+        self._collectors = []
+
+    def _add(self, family: MetricFamily) -> MetricFamily:
+        self._families.append(family)
+        return family
+
+    def counter(self, name: str, help: str, labelnames=()) -> MetricFamily:
+        return self._add(MetricFamily(name, help, "counter", labelnames, Counter))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> MetricFamily:
+        return self._add(MetricFamily(name, help, "gauge", labelnames, Gauge))
+
+    def histogram(self, name: str, help: str, buckets, labelnames=()) -> MetricFamily:
+        return self._add(MetricFamily(name, help, "histogram", labelnames, lambda: Histogram(buckets)))
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for family in self._families:
+            lines.extend(family.lines())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --------------------
+# STAGE TIMING
+# --------------------
+# Per-stage timing of the inference path. Until enable_stage_timing() is
+# called, stage() returns a shared no-op context manager.
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0,
+)
+
+_stage_family = None
+_no_stage = contextlib.nullcontext()
+
+
+class StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+def enable_stage_timing(family: MetricFamily):
+    """
+    Record stage() timings into `family`, a histogram labelled by stage
+    """
+    global _stage_family
+    _stage_family = family
+
+
+def stage_timing_enabled() -> bool:
+    return _stage_family is not None
+
+
+def stage(name: str):
+    """
+    Context manager timing one inference stage
+    """
+    if _stage_family is None:
+        return _no_stage
+    return StageTimer(_stage_family.labels(name))
+
+
+def observe_stage(name: str, seconds: float):
+    if _stage_family is not None:
+        _stage_family.labels(name).observe(seconds)
@@ -0,0 +1,113 @@
+"""
+Compact, sklearn-free format for the persona models.
+
+The KMeans centroids, scaler parameters and persona mapping are exported
+once into a single uncompressed .npz next to the pickles. Serving loads it
+with NumPy alone, so neither joblib nor sklearn has to be imported to assign
+personas. The file records a hash of the pickles it was exported from and
+is ignored once they change.
+
+Export from the `be` directory:
+
+    python -m inference.native [--model-dir models]
+"""
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from inference.features import CLUSTER_ORDER, check_feature_names
+from inference.persona import PersonaAssigner
+
+PERSONA_BUNDLE = "persona_bundle.npz"
+PERSONA_SOURCES = (
+    "kmeans_persona_model.pkl",
+    "scaler_clustering.pkl",
+    "persona_mapping.json",
+)
+FORMAT_VERSION = 1
+
+
+def digest_files(model_dir: str, names) -> str:
+    """
+    Short sha256 over the contents of the given files, in order
+    """
+    digest = hashlib.sha256()
+    for name in names:
+        with open(os.path.join(model_dir, name), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def export_persona_bundle(model_dir: str = "models", path: str | None = None) -> str:
+    """
+    Write the native persona bundle for the pickles in model_dir. The
+    compiled assigner is checked against sklearn before anything is written.
+    """
+    import joblib
+
+    kmeans_model = joblib.load(os.path.join(model_dir, "kmeans_persona_model.pkl"))
+    scaler = joblib.load(os.path.join(model_dir, "scaler_clustering.pkl"))
+    with open(os.path.join(model_dir, "persona_mapping.json"), "r") as f:
+        persona_mapping = json.load(f)
+
+    check_feature_names(scaler, CLUSTER_ORDER)
+    assigner = PersonaAssigner.from_models(scaler, kmeans_model)
+    assigner.check_parity(scaler, kmeans_model)
+
+    path = path or os.path.join(model_dir, PERSONA_BUNDLE)
+    with open(path, "wb") as f:
+        np.savez(
+            f,
+            format_version=np.array(FORMAT_VERSION),
+            sources=np.array(digest_files(model_dir, PERSONA_SOURCES)),
+            feature_names=np.array(CLUSTER_ORDER),
+            raw_centroids=assigner.raw_centroids,
+            inv_variance=assigner.inv_variance,
+            cluster_centers=np.asarray(kmeans_model.cluster_centers_, dtype=np.float64),
+            persona_mapping=np.array(json.dumps(persona_mapping)),
+        )
+    return path
+
+
+def load_persona_bundle(model_dir: str = "models"):
+    """
+    (PersonaAssigner, cluster_centers, persona_mapping) from the native
+    bundle, or None when it is missing, from an older format or stale
+    """
+    path = os.path.join(model_dir, PERSONA_BUNDLE)
+    if not os.path.exists(path):
+        return None
+
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["format_version"]) != FORMAT_VERSION:
+            return None
+        if str(data["sources"]) != digest_files(model_dir, PERSONA_SOURCES):
+            return None
+        if list(data["feature_names"]) != CLUSTER_ORDER:
+            raise ValueError(
+                f"{path} was exported with features {list(data['feature_names'])}, expected {CLUSTER_ORDER}"
+            )
+
+        assigner = PersonaAssigner(data["raw_centroids"], data["inv_variance"])
+        cluster_centers = np.array(data["cluster_centers"])
+        persona_mapping = json.loads(str(data["persona_mapping"]))
+
+    return assigner, cluster_centers, persona_mapping
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the persona models to the native .npz format")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output", default=None, help=f"defaults to MODEL_DIR/{PERSONA_BUNDLE}")
+    args = parser.parse_args(argv)
+
+    path = export_persona_bundle(args.model_dir, args.output)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+
+
+class PersonaAssigner:
+    """
+    Closed-form KMeans persona assignment with the scaler folded in.
+
+    KMeans centroids live in scaled space, z = (x - mean) / scale. Mapping the
+    centroids back to raw feature space once (m = mean + c * scale) gives
+
+        ||z - c||^2 = sum(((x - m) / scale) ** 2)
+
+    so raw rows can be assigned with a single broadcasted distance computation
+    weighted by 1 / scale**2, with no per-call scaler or sklearn overhead.
+    Distances are reported in scaled space, exactly as KMeans sees them.
+    """
+
+    def __init__(self, raw_centroids: np.ndarray, inv_variance: np.ndarray):
+        self.raw_centroids = np.ascontiguousarray(raw_centroids, dtype=np.float64)
+        self.inv_variance = np.ascontiguousarray(inv_variance, dtype=np.float64)
+        self.n_clusters, self.n_features = self.raw_centroids.shape
+
+    @classmethod
+    def from_models(cls, scaler, kmeans_model):
+        centers = np.asarray(kmeans_model.cluster_centers_, dtype=np.float64)
+        n_features = centers.shape[1]
+
+        mean = np.zeros(n_features)
+        if getattr(scaler, "with_mean", True) and scaler.mean_ is not None:
+            mean = np.asarray(scaler.mean_, dtype=np.float64)
+
+        scale = np.ones(n_features)
+        if getattr(scaler, "with_std", True) and scaler.scale_ is not None:
+            scale = np.asarray(scaler.scale_, dtype=np.float64)
+
+        return cls(mean + centers * scale, 1.0 / (scale * scale))
+
+    def squared_distances(self, X: np.ndarray) -> np.ndarray:
+        """
+        Squared scaled-space distance from every row to every centroid, (n, k)
+        """
+        diff = X[:, None, :] - self.raw_centroids[None, :, :]
+        return (diff * diff) @ self.inv_variance
+
+    def assign(self, X: np.ndarray):
+        """
+        Return (cluster labels, centroid distances) for a raw feature matrix
+        """
+        d2 = self.squared_distances(X)
+        return d2.argmin(axis=1), np.sqrt(d2)
+
+    def check_parity(self, scaler, kmeans_model, n_samples: int = 1000, seed: int = 0):
+        """
+        Compare against scaler.transform + kmeans_model.predict on random
+        rows drawn around the centroids. Disagreement is only accepted where
+        the two nearest centroids are tied within floating point error.
+        """
+        rng = np.random.default_rng(seed)
+        spread = np.sqrt(1.0 / self.inv_variance)
+        picks = rng.integers(0, self.n_clusters, n_samples)
+        X = self.raw_centroids[picks] + rng.normal(size=(n_samples, self.n_features)) * spread * 2
+
+        expected = kmeans_model.predict(scaler.transform(X))
+        d2 = self.squared_distances(X)
+        labels = d2.argmin(axis=1)
+
+        rows = np.flatnonzero(labels != expected)
+        if rows.size:
+            ours = d2[rows, labels[rows]]
+            theirs = d2[rows, expected[rows]]
+            if not np.allclose(ours, theirs, rtol=1e-9, atol=1e-12):
+                raise ValueError(
+                    f"Compiled persona assigner disagrees with KMeans on {rows.size} of {n_samples} rows"
+                )
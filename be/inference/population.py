@@ -0,0 +1,136 @@
+"""
+Percentile index over a reference population of learners.
+
+The predicted performance of every learner in a reference feature file,
+and the raw values of the features the comparison talks about, are each
+sorted once offline and saved as one .npy array next to the models. Serving
+memory-maps it and answers a percentile with a binary search per column.
+A JSON sidecar records a hash of the performance model the predictions
+came from; the index is ignored once that model changes.
+
+Build from the `be` directory, with any CSV or Parquet file that has the
+performance feature columns:
+
+    python -m inference.population learners.parquet [--model-dir models]
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+from inference.features import PERFORMANCE_ORDER
+from inference.native import digest_files
+
+POPULATION_INDEX = "population_index.npy"
+POPULATION_META = "population_index.json"
+POPULATION_SOURCES = ("performance_predictor_model.pkl",)
+FORMAT_VERSION = 1
+
+# One sorted row per column, in this order
+COLUMNS = (
+    "predicted_performance",
+    "total_activities",
+    "consistency_score",
+    "avg_minutes_per_module",
+)
+FEATURE_COLUMNS = COLUMNS[1:]
+
+
+class PopulationIndex:
+    """
+    Sorted values of every COLUMNS entry over the reference population
+    """
+
+    def __init__(self, values: np.ndarray):
+        if values.ndim != 2 or values.shape[0] != len(COLUMNS) or values.shape[1] == 0:
+            raise ValueError(f"Population index must have shape ({len(COLUMNS)}, n > 0), got {values.shape}")
+        self.values = values
+        self.size = int(values.shape[1])
+        self._rows = {name: values[i] for i, name in enumerate(COLUMNS)}
+
+    def percentile(self, column: str, value: float) -> float:
+        """
+        Share of the population strictly below value, in percent
+        """
+        below = int(np.searchsorted(self._rows[column], value, side="left"))
+        return below / self.size * 100
+
+    def feature_percentiles(self, features: dict) -> dict:
+        return {name: round(self.percentile(name, features[name]), 1) for name in FEATURE_COLUMNS}
+
+
+def build_population_index(source: str, model_dir: str = "models", path: str | None = None,
+                           chunk_size: int = 100_000) -> str:
+    """
+    Score every learner in source with the performance model in model_dir
+    and write the sorted index
+    """
+    from inference.bulk import read_chunks
+    from inference.bundle import ModelBundle
+
+    bundle = ModelBundle.load(model_dir)
+    columns = []
+    for chunk in read_chunks(source, chunk_size, PERFORMANCE_ORDER):
+        X = chunk[PERFORMANCE_ORDER].to_numpy(dtype=np.float64)
+        X = X[np.isfinite(X).all(axis=1)]
+        if not len(X):
+            continue
+        columns.append(np.vstack([
+            bundle.performance_model.predict(X),
+            *(X[:, PERFORMANCE_ORDER.index(name)] for name in FEATURE_COLUMNS),
+        ]))
+    if not columns:
+        raise ValueError(f"No complete learner rows in {source}")
+
+    values = np.concatenate(columns, axis=1)
+    values.sort(axis=1)
+
+    path = path or os.path.join(model_dir, POPULATION_INDEX)
+    np.save(path, np.ascontiguousarray(values))
+    with open(os.path.splitext(path)[0] + ".json", "w") as f:
+        json.dump({
+            "format_version": FORMAT_VERSION,
+            "sources": digest_files(model_dir, POPULATION_SOURCES),
+            "columns": list(COLUMNS),
+            "size": int(values.shape[1]),
+            "built_from": os.path.basename(source),
+        }, f, indent=2)
+    return path
+
+
+def load_population_index(model_dir: str = "models"):
+    """
+    Memory-mapped PopulationIndex from model_dir, or None when it is
+    missing, from an older format or built with another performance model
+    """
+    path = os.path.join(model_dir, POPULATION_INDEX)
+    meta_path = os.path.join(model_dir, POPULATION_META)
+    if not (os.path.exists(path) and os.path.exists(meta_path)):
+        return None
+
+    with open(meta_path, "r") as f:
+        meta = json.load(f)
+    if meta.get("format_version") != FORMAT_VERSION:
+        return None
+    if meta.get("sources") != digest_files(model_dir, POPULATION_SOURCES):
+        return None
+    if meta.get("columns") != list(COLUMNS):
+        raise ValueError(f"{meta_path} lists columns {meta.get('columns')}, expected {list(COLUMNS)}")
+
+    return PopulationIndex(np.load(path, mmap_mode="r", allow_pickle=False))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the population percentile index")
+    parser.add_argument("source", help="CSV or Parquet file of learner features")
+    parser.add_argument("--model-dir", default="models")
+    parser.add_argument("--output", default=None, help=f"defaults to MODEL_DIR/{POPULATION_INDEX}")
+    args = parser.parse_args(argv)
+
+    path = build_population_index(args.source, args.model_dir, args.output)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+"""
+On-demand profiles of single requests.
+
+A profile follows one request wherever its work runs: its task on the event
+loop and the jobs it submits to the inference pool. Two modes:
+
+- "sample": a background thread samples the stacks of those threads every
+  interval (wall clock), counted as collapsed stacks ready for flame graph
+  tools. Loop samples are only taken while the request's own task is running.
+- "cprofile": the request's inference jobs additionally run under cProfile,
+  giving exact call counts and times for the model code. Only one job is
+  profiled at a time process-wide, since newer Pythons allow a single active
+  profiler per interpreter; jobs that find it busy run unprofiled and are
+  counted.
+
+A micro-batch job is attributed to the request that opened its batch window.
+
+Nothing is instrumented until a profile starts: the executor only checks
+profiling_active(), a module global.
+"""
+import asyncio
+import collections
+import contextvars
+import cProfile
+import itertools
+import marshal
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+
+MODES = ("sample", "cprofile")
+
+# Number of functions listed in a profile's summary
+TOP_FUNCTIONS = 20
+
+current_profile = contextvars.ContextVar("current_profile", default=None)
+
+_active = 0
+_cprofile_lock = threading.Lock()
+_ids = itertools.count(1)
+
+
+def profiling_active() -> bool:
+    return _active > 0
+
+
+def frame_name(code) -> str:
+    return f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def collapse(frame, root: str) -> str:
+    """
+    `root;outermost;...;innermost` for a frame and its callers
+    """
+    names = []
+    while frame is not None:
+        names.append(frame_name(frame.f_code))
+        frame = frame.f_back
+    names.append(root)
+    return ";".join(reversed(names))
+
+
+class Profile:
+    """
+    One profiled request: its samples, cProfile stats and tags
+    """
+
+    def __init__(self, route: str, method: str, mode: str):
+        self.id = f"{int(time.time())}-{next(_ids)}"
+        self.route = route
+        self.method = method
+        self.mode = mode
+        self.model_version = None
+        self.status = None
+        self.started_at = time.time()
+        self.duration = None
+
+        self.loop = asyncio.get_running_loop()
+        self.task = asyncio.current_task()
+        self.loop_thread = threading.get_ident()
+
+        self.token = None
+        self.samples = collections.Counter()
+        self.stats = None
+        self.jobs = 0
+        self.unprofiled_jobs = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+
+    def sample(self, frames: dict):
+        """
+        Record the stacks of this request's threads from sys._current_frames()
+        """
+        loop, task = self.loop, self.task
+        if loop is None:
+            return
+        if asyncio.current_task(loop) is task:
+            frame = frames.get(self.loop_thread)
+            if frame is not None:
+                self.samples[collapse(frame, "event_loop")] += 1
+        with self._lock:
+            threads = list(self._threads)
+        for ident in threads:
+            frame = frames.get(ident)
+            if frame is not None:
+                self.samples[collapse(frame, "inference_pool")] += 1
+
+    def run_job(self, fn, args):
+        """
+        Run an inference job on behalf of this request (on the worker thread)
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads.add(ident)
+            self.jobs += 1
+        try:
+            if self.mode == "cprofile" and _cprofile_lock.acquire(blocking=False):
+                try:
+                    profiler = cProfile.Profile()
+                    try:
+                        return profiler.runcall(fn, *args)
+                    finally:
+                        self._add_stats(profiler)
+                finally:
+                    _cprofile_lock.release()
+            if self.mode == "cprofile":
+                with self._lock:
+                    self.unprofiled_jobs += 1
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._threads.discard(ident)
+
+    def _add_stats(self, profiler: cProfile.Profile):
+        with self._lock:
+            if self.stats is None:
+                self.stats = pstats.Stats(profiler)
+            else:
+                self.stats.add(profiler)
+
+    def finish(self, status: int, model_version: str):
+        self.duration = time.perf_counter() - self._started
+        self.status = status
+        self.model_version = model_version
+        # Drop the references that would keep the request's task alive
+        self.loop = self.task = self.token = None
+
+    def collapsed(self) -> str:
+        """
+        Samples as collapsed stacks, one `stack count` line each
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def pstats_dump(self) -> bytes:
+        """
+        cProfile stats in the format of pstats.Stats.dump_stats
+        """
+        return marshal.dumps(self.stats.stats)
+
+    def top_functions(self) -> list:
+        """
+        Functions taking the most time: cumulative cProfile time when
+        available, else the share of samples with the function on top
+        """
+        if self.stats is not None:
+            rows = sorted(self.stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            return [
+                {
+                    "function": f"{name} ({os.path.basename(filename)}:{line})",
+                    "calls": calls,
+                    "total_time": total,
+                    "cumulative_time": cumulative,
+                }
+                for (filename, line, name), (_, calls, total, cumulative, _) in rows[:TOP_FUNCTIONS]
+            ]
+
+        leaves = collections.Counter()
+        for stack, count in self.samples.items():
+            leaves[stack.rsplit(";", 1)[-1]] += count
+        n = sum(leaves.values())
+        return [
+            {"function": name, "samples": count, "share": count / n}
+            for name, count in leaves.most_common(TOP_FUNCTIONS)
+        ]
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "route": self.route,
+            "method": self.method,
+            "mode": self.mode,
+            "model_version": self.model_version,
+            "status": self.status,
+            "started_at": self.started_at,
+            "duration_ms": None if self.duration is None else self.duration * 1000,
+            "samples": sum(self.samples.values()),
+            "inference_jobs": self.jobs,
+            "unprofiled_jobs": self.unprofiled_jobs,
+        }
+
+
+class StackSampler:
+    """
+    Background thread sampling the stacks of all running profiles. It runs
+    only while at least one profile is active.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(self.interval)
+
+
+class Profiler:
+    """
+    Starts and keeps request profiles. Requests are picked by the caller
+    (explicit request) or by the admin settings: the next `requests`
+    requests and/or a `rate` fraction of traffic, optionally only on some
+    routes. The last `history` profiles are kept.
+    """
+
+    def __init__(self, history: int, sample_interval: float):
+        self.profiles = collections.OrderedDict()
+        self.history = history
+        self.sampler = StackSampler(sample_interval)
+        self.armed = False
+        self.configure()
+
+    def configure(self, mode: str = "sample", rate: float = 0.0, requests: int = 0, routes=None):
+        self.mode = mode
+        self.rate = rate
+        self.remaining = requests
+        self.routes = set(routes) if routes else None
+        self.armed = rate > 0 or requests > 0
+
+    def settings(self) -> dict:
+        return {
+            "mode": self.mode,
+            "rate": self.rate,
+            "remaining_requests": self.remaining,
+            "routes": sorted(self.routes) if self.routes else None,
+            "armed": self.armed,
+        }
+
+    def pick(self, route: str):
+        """
+        Mode to profile a request on `route` with under the admin settings,
+        or None
+        """
+        if self.routes is not None and route not in self.routes:
+            return None
+        if self.remaining > 0:
+            self.remaining -= 1
+            if self.remaining == 0 and self.rate == 0:
+                self.armed = False
+            return self.mode
+        if self.rate > 0 and random.random() < self.rate:
+            return self.mode
+        return None
+
+    def start(self, route: str, method: str, mode: str) -> Profile:
+        """
+        Start profiling the current request. Call from its task.
+        """
+        global _active
+        profile = Profile(route, method, mode)
+        profile.token = current_profile.set(profile)
+        _active += 1
+        self.sampler.add(profile)
+        return profile
+
+    def finish(self, profile: Profile, status: int, model_version: str):
+        global _active
+        self.sampler.remove(profile)
+        _active -= 1
+        current_profile.reset(profile.token)
+        profile.finish(status, model_version)
+        self.profiles[profile.id] = profile
+        while len(self.profiles) > self.history:
+            self.profiles.popitem(last=False)
+
+    def get(self, profile_id: str):
+        return self.profiles.get(profile_id)
+
+    def list(self) -> list:
+        return [profile.summary() for profile in reversed(self.profiles.values())]
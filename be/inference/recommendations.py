@@ -0,0 +1,326 @@
+import sys
+from collections import namedtuple
+from types import MappingProxyType
+
+import numpy as np
+
+from inference.serialization import fragment
+
+PRIORITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def template(category, priority, title, description, action, expected_impact):
+    """
+    Immutable recommendation with interned strings, shared by every response
+    """
+    return MappingProxyType({
+        "category": sys.intern(category),
+        "priority": sys.intern(priority),
+        "title": sys.intern(title),
+        "description": sys.intern(description),
+        "action": sys.intern(action),
+        "expected_impact": sys.intern(expected_impact),
+    })
+
+
+# A rule reads one input column. Its conditions are tried in order like an
+# if/elif chain (op, threshold, template); `default` is the else branch, or
+# None when the rule may produce nothing.
+Rule = namedtuple("Rule", "input conditions default")
+
+# Columns of the matrix passed to RecommendationEngine.evaluate. The persona
+# column holds RecommendationEngine.persona_code(persona).
+INPUTS = (
+    "consistency_score",
+    "total_activities",
+    "avg_minutes_per_module",
+    "weekend_ratio",
+    "predicted_performance",
+    "persona",
+)
+
+RULES = (
+    # 1. Consistency-based recommendations
+    Rule("consistency_score", (
+        ("lt", 5, template(
+            "Consistency", "high",
+            "Tingkatkan Konsistensi Belajar",
+            "Konsistensi belajar kamu masih rendah. Coba tetapkan jadwal belajar rutin setiap hari.",
+            "Buat jadwal belajar 30 menit setiap hari pada waktu yang sama",
+            "Dapat meningkatkan consistency score hingga 40%")),
+        ("lt", 7, template(
+            "Consistency", "medium",
+            "Pertahankan Ritme Belajar",
+            "Konsistensi kamu cukup baik, tapi masih bisa ditingkatkan.",
+            "Tambahkan sesi review mingguan untuk memperkuat pemahaman",
+            "Meningkatkan retensi materi hingga 25%")),
+    ), template(
+        "Consistency", "low",
+        "Konsistensi Excellent!",
+        "Kamu sudah memiliki pola belajar yang sangat konsisten.",
+        "Fokus pada materi yang lebih advanced untuk tantangan baru",
+        "Mempercepat progress pembelajaran 30%")),
+
+    # 2. Activity-based recommendations
+    Rule("total_activities", (
+        ("lt", 20, template(
+            "Activity", "high",
+            "Perbanyak Latihan",
+            "Jumlah aktivitas belajar kamu masih minim. Semakin banyak latihan, semakin baik pemahamanmu.",
+            "Target minimal 3-5 aktivitas belajar per hari",
+            "Meningkatkan pemahaman materi hingga 50%")),
+        ("lt", 35, template(
+            "Activity", "medium",
+            "Tingkatkan Aktivitas Belajar",
+            "Kamu sudah aktif, tapi masih bisa lebih optimal.",
+            "Coba tambah 2-3 aktivitas per hari dengan fokus pada area yang lemah",
+            "Percepatan progress hingga 30%")),
+    ), template(
+        "Activity", "low",
+        "Aktivitas Sangat Baik!",
+        "Kamu sangat aktif dalam belajar.",
+        "Fokus pada kualitas daripada kuantitas, pastikan setiap aktivitas bermakna",
+        "Optimalisasi waktu belajar hingga 20%")),
+
+    # 3. Study time recommendations
+    Rule("avg_minutes_per_module", (
+        ("lt", 15, template(
+            "Study Time", "high",
+            "Tambah Durasi Belajar",
+            "Waktu belajar per modul terlalu singkat untuk pemahaman mendalam.",
+            "Tingkatkan durasi belajar menjadi minimal 20-30 menit per modul",
+            "Meningkatkan pemahaman materi hingga 60%")),
+        ("lt", 25, template(
+            "Study Time", "medium",
+            "Optimalkan Waktu Belajar",
+            "Durasi belajar sudah cukup, tapi bisa lebih efektif.",
+            "Gunakan teknik Pomodoro: 25 menit fokus + 5 menit istirahat",
+            "Meningkatkan fokus dan retensi hingga 35%")),
+        ("gt", 45, template(
+            "Study Time", "medium",
+            "Perhatikan Efisiensi Belajar",
+            "Durasi belajar cukup lama, pastikan tetap efektif.",
+            "Break down materi menjadi bagian kecil dan ambil break teratur",
+            "Mencegah burnout dan meningkatkan produktivitas 25%")),
+    ), template(
+        "Study Time", "low",
+        "Durasi Belajar Ideal!",
+        "Waktu belajar kamu sudah optimal.",
+        "Pertahankan pola ini dan fokus pada variasi metode belajar",
+        "Mempertahankan performa optimal")),
+
+    # 4. Weekend learning recommendations
+    Rule("weekend_ratio", (
+        ("lt", 0.2, template(
+            "Schedule", "medium",
+            "Manfaatkan Waktu Weekend",
+            "Kamu jarang belajar di weekend. Weekend bisa jadi waktu efektif untuk review.",
+            "Alokasikan 1-2 jam di weekend untuk review materi mingguan",
+            "Meningkatkan retensi materi hingga 30%")),
+        ("gt", 0.5, template(
+            "Schedule", "low",
+            "Balance Weekend & Weekday",
+            "Kamu lebih banyak belajar di weekend.",
+            "Seimbangkan dengan aktivitas weekday untuk konsistensi lebih baik",
+            "Meningkatkan konsistensi harian 20%")),
+    ), None),
+
+    # 5. Persona-specific recommendations
+    Rule("persona", (
+        ("eq", "The Consistent", template(
+            "Persona", "low",
+            "Leverage Konsistensi Kamu",
+            "Sebagai consistent learner, kamu punya fondasi yang kuat.",
+            "Mulai tackle materi advanced dan jadi mentor untuk teman",
+            "Memperdalam pemahaman melalui teaching 40%")),
+        ("eq", "The Sprinter", template(
+            "Persona", "medium",
+            "Balance Speed dengan Depth",
+            "Kamu cepat memahami, tapi pastikan tidak skip detail penting.",
+            "Tambahkan sesi review untuk memastikan pemahaman mendalam",
+            "Meningkatkan retensi jangka panjang 35%")),
+        ("eq", "The Warrior", template(
+            "Persona", "medium",
+            "Channel Energy ke Strategi",
+            "Semangat tinggi perlu diarahkan dengan strategi yang tepat.",
+            "Fokus pada materi yang challenging dan buat study plan terstruktur",
+            "Maksimalkan hasil belajar hingga 45%")),
+    ), None),
+
+    # 6. Performance-based overall recommendation
+    Rule("predicted_performance", (
+        ("lt", 2.5, template(
+            "Overall", "high",
+            "Action Plan untuk Improvement",
+            "Performa kamu perlu ditingkatkan secara menyeluruh.",
+            "Fokus pada 2-3 rekomendasi prioritas tinggi di atas, lakukan selama 2 minggu",
+            "Peningkatan performa hingga 50% dalam 1 bulan")),
+        ("lt", 3.5, template(
+            "Overall", "medium",
+            "Push ke Level Selanjutnya",
+            "Performa sudah cukup baik, saatnya naik level.",
+            "Pilih 1-2 area untuk improvement dan konsisten lakukan 3 minggu",
+            "Mencapai performa excellent dalam 1 bulan")),
+    ), template(
+        "Overall", "low",
+        "Maintain Excellence",
+        "Performa kamu sudah sangat baik!",
+        "Fokus pada continuous improvement dan explore materi advanced",
+        "Menjadi top performer dan role model")),
+)
+
+OPS = {"lt": np.less, "gt": np.greater, "eq": np.equal}
+
+# Insight messages
+PERSONA_INSIGHTS = MappingProxyType({
+    "The Consistent": (
+        "Kamu memiliki pola belajar yang stabil.",
+        "Kedisiplinan kamu membantu progresmu meningkat.",
+        "Pertahankan ritme belajar kamu!"
+    ),
+    "The Sprinter": (
+        "Kamu cepat memahami materi.",
+        "Tingkatkan konsistensi agar makin maksimal.",
+        "Metode sprint cocok untukmu."
+    ),
+    "The Warrior": (
+        "Kamu punya semangat tinggi dalam menyelesaikan tugas.",
+        "Tipe pembelajar yang cepat adaptasi di materi sulit.",
+        "Terus gunakan momentum ini untuk menyelesaikan lebih banyak modul."
+    ),
+})
+DEFAULT_PERSONA_INSIGHT = ("Belum ada insight.",)
+
+
+def performance_message(perf_pred: float) -> str:
+    return (
+        "Performa belajar kamu sangat baik."
+        if perf_pred > 3 else
+        "Performa kamu cukup stabil."
+        if perf_pred > 2 else
+        "Performa perlu ditingkatkan."
+    )
+
+
+_insight_fragments = {}
+
+
+def insight_fragment(persona: str, perf_pred: float):
+    """
+    Pre-serialized "insights" object for a persona and predicted performance.
+    There is one per persona and performance message, built on first use.
+    """
+    message = performance_message(perf_pred)
+    key = (persona, message)
+    encoded = _insight_fragments.get(key)
+    if encoded is None:
+        encoded = _insight_fragments[key] = fragment({
+            "persona_based": PERSONA_INSIGHTS.get(persona, DEFAULT_PERSONA_INSIGHT),
+            "performance_based": message,
+        })
+    return encoded
+
+
+class RecommendationEngine:
+    """
+    Evaluates the rule table over a whole batch at once.
+
+    Rules are compiled into column indices, comparison ufuncs, thresholds and
+    template indices. Persona rules compare integer persona codes, so every
+    input, including the persona, is a column of one float matrix. The
+    result is one template index per rule and row (-1 where a rule produced
+    nothing), stably sorted by priority, which matches the original
+    append-then-sort behaviour.
+    """
+
+    def __init__(self, rules=RULES):
+        self.templates = []
+        self.persona_codes = {}
+        self._compiled = []
+
+        for rule in rules:
+            column = INPUTS.index(rule.input)
+            conditions = []
+            for op, threshold, tmpl in rule.conditions:
+                if rule.input == "persona":
+                    threshold = self.persona_codes.setdefault(threshold, len(self.persona_codes))
+                conditions.append((OPS[op], threshold, self._add(tmpl)))
+            default = self._add(rule.default) if rule.default is not None else -1
+            self._compiled.append((column, tuple(conditions), default))
+
+        self.templates = tuple(self.templates)
+
+        # Every template serialized once, spliced into responses as bytes
+        self._fragments = {id(t): fragment(t) for t in self.templates}
+
+        # Priority rank per template index; the extra last entry is picked up
+        # by index -1 and sorts "no recommendation" after everything else
+        self._priority = np.array(
+            [PRIORITY_ORDER[t["priority"]] for t in self.templates] + [len(PRIORITY_ORDER)]
+        )
+
+    def _add(self, tmpl) -> int:
+        self.templates.append(tmpl)
+        return len(self.templates) - 1
+
+    def persona_code(self, persona: str) -> float:
+        return float(self.persona_codes.get(persona, -1))
+
+    def evaluate(self, X: np.ndarray) -> np.ndarray:
+        """
+        Template indices, shape (n_rows, n_rules), sorted by priority per row
+        """
+        n = X.shape[0]
+        chosen = np.empty((n, len(self._compiled)), dtype=np.intp)
+
+        for j, (column, conditions, default) in enumerate(self._compiled):
+            x = X[:, column]
+            result = np.full(n, default, dtype=np.intp)
+            # Walk the chain backwards so earlier conditions win, like elif
+            for op, threshold, index in reversed(conditions):
+                result = np.where(op(x, threshold), index, result)
+            chosen[:, j] = result
+
+        order = np.argsort(self._priority[chosen], axis=1, kind="stable")
+        return np.take_along_axis(chosen, order, axis=1)
+
+    def templates_for(self, indices: np.ndarray):
+        """
+        Map evaluated template indices to lists of templates, one per row
+        """
+        templates = self.templates
+        return [
+            [templates[i] for i in row if i >= 0]
+            for row in indices.tolist()
+        ]
+
+    def fragments(self, templates):
+        """
+        Pre-serialized form of a list of templates
+        """
+        fragments = self._fragments
+        return [fragments[id(t)] for t in templates]
+
+    def recommend(self, X: np.ndarray):
+        """
+        Recommendation templates for every row of X
+        """
+        return self.templates_for(self.evaluate(X))
+
+
+recommendation_engine = RecommendationEngine()
+
+
+def generate_recommendations(perf_dict: dict, cluster_dict: dict, perf_pred: float, persona: str):
+    """
+    Generate actionable recommendations based on performance and persona
+    """
+    X = np.array([[
+        float(perf_dict.get("consistency_score", 0)),
+        float(perf_dict.get("total_activities", 0)),
+        float(perf_dict.get("avg_minutes_per_module", 0)),
+        float(cluster_dict.get("weekend_ratio", 0)),
+        float(perf_pred),
+        recommendation_engine.persona_code(persona),
+    ]])
+    return recommendation_engine.recommend(X)[0]
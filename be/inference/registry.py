@@ -0,0 +1,105 @@
+import os
+import threading
+from collections import OrderedDict
+
+from inference.bundle import MODEL_FILES, ModelBundle, model_fingerprint
+
+
+class ModelRegistry:
+    """
+    Versioned model bundles with exactly one active version.
+
+    Request handlers read `current` once and use that bundle for the whole
+    request, so swapping the reference never affects requests in flight:
+    they finish on the bundle they started with. The last `history` bundles
+    stay loaded for rollback; older ones are dropped once nothing uses them.
+
+    load() blocks (file I/O, unpickling, warm-up) and is meant to run off the
+    event loop. Loads are serialized; activation is a single reference swap.
+    """
+
+    def __init__(self, bundle: ModelBundle, history: int = 3, **bundle_kwargs):
+        self.history = max(1, history)
+        self.bundle_kwargs = bundle_kwargs
+        self.current = bundle
+        self._bundles = OrderedDict([(bundle.version, bundle)])
+        self._listeners = []
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    def on_activate(self, listener):
+        """
+        Register listener(previous, bundle), called after every swap
+        """
+        self._listeners.append(listener)
+
+    def get(self, version: str):
+        return self._bundles.get(version)
+
+    def versions(self):
+        return [
+            {
+                "version": b.version,
+                "model_dir": b.model_dir,
+                "loaded_at": b.loaded_at,
+                "active": b is self.current,
+            }
+            for b in list(self._bundles.values())
+        ]
+
+    def activate(self, bundle: ModelBundle):
+        """
+        Make `bundle` the active version
+        """
+        with self._lock:
+            previous = self.current
+            self._bundles[bundle.version] = bundle
+            self._bundles.move_to_end(bundle.version)
+            while len(self._bundles) > self.history:
+                self._bundles.popitem(last=False)
+            self.current = bundle
+
+        if previous is not bundle:
+            for listener in self._listeners:
+                listener(previous, bundle)
+        return bundle
+
+    def activate_version(self, version: str):
+        """
+        Roll back (or forward) to a bundle that is still loaded
+        """
+        bundle = self._bundles.get(version)
+        if bundle is None:
+            raise KeyError(version)
+        return self.activate(bundle)
+
+    def load(self, model_dir: str):
+        """
+        Load, warm up and activate the bundle in `model_dir`. Returns
+        (bundle, swapped); files identical to the active version are not
+        loaded again.
+        """
+        with self._load_lock:
+            version = model_fingerprint(model_dir)
+            if version == self.current.version:
+                return self.current, False
+
+            bundle = self._bundles.get(version)
+            if bundle is None:
+                bundle = ModelBundle.load(model_dir, **self.bundle_kwargs)
+                bundle.warm_up()
+            return self.activate(bundle), True
+
+
+def model_signature(model_dir: str):
+    """
+    Cheap change detector for the model files: (mtime, size) of each one,
+    or None while any of them is missing
+    """
+    try:
+        return tuple(
+            (st.st_mtime_ns, st.st_size)
+            for st in (os.stat(os.path.join(model_dir, name)) for name in MODEL_FILES)
+        )
+    except FileNotFoundError:
+        return None
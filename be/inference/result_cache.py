@@ -0,0 +1,152 @@
+import json
+import logging
+import math
+import time
+
+from inference.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """
+    In-process stand-in for a shared Redis-compatible store. Implements the
+    same async get/set interface as RedisBackend, for development and tests.
+    """
+
+    def __init__(self):
+        self._data = {}
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: float):
+        self._data[key] = (time.monotonic() + ttl, value)
+
+
+class RedisBackend:
+    """
+    Shared cache on a Redis-compatible server, so several workers can reuse
+    each other's results. Requires the optional `redis` package.
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError("RESULT_CACHE_BACKEND points at Redis but the 'redis' package is not installed")
+
+        self._client = redis.Redis.from_url(url)
+
+    async def get(self, key: str):
+        value = await self._client.get(key)
+        return value.decode() if value is not None else None
+
+    async def set(self, key: str, value: str, ttl: float):
+        await self._client.set(key, value, px=int(ttl * 1000))
+
+
+def make_backend(spec: str):
+    """
+    Build a shared backend from RESULT_CACHE_BACKEND ("", "memory" or a redis:// URL)
+    """
+    if not spec:
+        return None
+    if spec == "memory":
+        return MemoryBackend()
+    if spec.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown result cache backend: {spec}")
+
+
+class ResultCache:
+    """
+    Cache of model outputs keyed on the quantized, order-normalized feature
+    tuple and the model version.
+
+    Feature values are read in model order and rounded to multiples of
+    `quantum`, so the same learner sent with a different JSON key order or
+    with float noise below the quantum hits the same entry. Lookups go to the
+    local TTL/LRU first, then to the optional shared backend. Backend errors
+    are logged and treated as misses; they never fail a request.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, quantum: float, backend=None):
+        self.ttl = ttl
+        self.quantum = quantum
+        self.backend = backend
+        self._local = LRUCache(maxsize, ttl=ttl)
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.backend_errors = 0
+
+    def key(self, namespace: str, version: str, values):
+        """
+        Cache key for the given feature values, or None if they can't be cached
+        """
+        quantized = []
+        for value in values:
+            if not math.isfinite(value):
+                return None
+            quantized.append(str(round(value / self.quantum)))
+        return f"{namespace}:{version}:{','.join(quantized)}"
+
+    async def get(self, key: str):
+        value = self._local.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+
+        if self.backend is not None:
+            try:
+                raw = await self.backend.get(key)
+            except Exception:
+                self.backend_errors += 1
+                logger.exception("Result cache backend lookup failed")
+                raw = None
+
+            if raw is not None:
+                value = json.loads(raw)
+                self._local.put(key, value)
+                self.shared_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def put(self, key: str, value):
+        self._local.put(key, value)
+
+        if self.backend is not None:
+            try:
+                await self.backend.set(key, json.dumps(value), self.ttl)
+            except Exception:
+                self.backend_errors += 1
+                logger.exception("Result cache backend write failed")
+
+    def clear(self):
+        self._local.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "size": len(self._local),
+            "max_size": self._local.maxsize,
+            "ttl_seconds": self.ttl,
+            "quantum": self.quantum,
+            "shared_backend": type(self.backend).__name__ if self.backend is not None else None,
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "backend_errors": self.backend_errors,
+            "hit_ratio": round((self.hits + self.shared_hits) / lookups, 4) if lookups else 0.0,
+        }
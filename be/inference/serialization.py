@@ -0,0 +1,73 @@
+"""
+JSON encoding for the hot endpoints.
+
+orjson is used when installed (it serializes slotted dataclasses natively
+and splices pre-serialized fragments in as raw bytes); otherwise the
+standard library produces the same JSON, just slower.
+"""
+import dataclasses
+import json
+from types import MappingProxyType
+
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class _Fragment:
+    """
+    Stand-in for orjson.Fragment: keeps the value and re-encodes it
+    """
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def fragment(value):
+    """
+    Serialize `value` once; dumps() then copies the bytes instead of
+    encoding the value again. Meant for static text shared by many responses.
+    """
+    if orjson is not None:
+        return orjson.Fragment(orjson.dumps(value, default=_orjson_default))
+    return _Fragment(value)
+
+
+def _orjson_default(obj):
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def _json_default(obj):
+    if isinstance(obj, _Fragment):
+        return obj.value
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, default=_orjson_default)
+    return json.dumps(
+        obj, default=_json_default, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONResponse(Response):
+    """
+    JSON response rendered with dumps(). Handlers return it directly so
+    FastAPI skips jsonable_encoder and response-model validation; the
+    route's response_model is then only documentation.
+    """
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
@@ -0,0 +1,78 @@
+"""
+Pre-rendered responses for endpoints that only depend on the model version.
+
+The body is serialized and gzip-compressed once; each variant gets a strong
+ETag derived from its bytes. Requests are then answered from memory: 304
+when If-None-Match matches, the gzip variant when the client accepts it,
+the plain body otherwise.
+"""
+import gzip
+import hashlib
+
+from starlette.responses import Response
+
+from inference.serialization import dumps
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """
+    True when Accept-Encoding lists gzip (or *) without q=0
+    """
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        if coding.strip() not in ("gzip", "*"):
+            continue
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        return True
+    return False
+
+
+def etag_matches(if_none_match: str, etags) -> bool:
+    """
+    Weak comparison of an If-None-Match header against our ETags
+    """
+    if if_none_match.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+class PrerenderedResponse:
+    """
+    One JSON body in plain and gzip form, with an ETag for each
+    """
+
+    def __init__(self, content, max_age: int = 300):
+        self.body = dumps(content)
+        self.gzip_body = gzip.compress(self.body, compresslevel=9, mtime=0)
+        digest = hashlib.sha256(self.body).hexdigest()[:20]
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'
+        self.cache_control = f"public, max-age={max_age}, must-revalidate"
+
+    def respond(self, headers) -> Response:
+        """
+        The response for a request with the given headers
+        """
+        use_gzip = accepts_gzip(headers.get("accept-encoding", ""))
+        etag = self.gzip_etag if use_gzip else self.etag
+        response_headers = {
+            "ETag": etag,
+            "Cache-Control": self.cache_control,
+            "Vary": "Accept-Encoding",
+        }
+
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag_matches(if_none_match, (self.etag, self.gzip_etag)):
+            return Response(status_code=304, headers=response_headers)
+
+        if use_gzip:
+            response_headers["Content-Encoding"] = "gzip"
+            return Response(self.gzip_body, media_type="application/json", headers=response_headers)
+        return Response(self.body, media_type="application/json", headers=response_headers)
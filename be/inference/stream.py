@@ -0,0 +1,140 @@
+"""
+NDJSON scoring for /predict/stream.
+
+The request body is split into lines on the event loop and handed over in
+chunks; parsing, scoring and encoding of a chunk happen in one call on the
+inference executor. Every input line produces exactly one output line, in
+input order, so callers can zip results back onto their records.
+"""
+import json
+import math
+
+import numpy as np
+
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER
+from inference.recommendations import recommendation_engine
+from inference.serialization import dumps
+
+_CLUSTER_COLUMNS = [PERFORMANCE_ORDER.index(name) for name in CLUSTER_ORDER]
+
+# Integer ids are echoed back as JSON numbers; orjson encodes up to 64 bits
+ID_MIN = -2 ** 63
+ID_MAX = 2 ** 64 - 1
+
+
+async def split_lines(stream, chunk_size: int, max_line_bytes: int):
+    """
+    Group the lines of a byte stream into lists of (line number, bytes).
+    Blank lines are skipped; a line longer than max_line_bytes is reported
+    as (line number, None) and its bytes are dropped, so at most one chunk
+    of lines plus max_line_bytes is ever held in memory.
+    """
+    chunk = []
+    buffer = b""
+    line_no = 0
+    oversized = False
+
+    async for data in stream:
+        buffer += data
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_no += 1
+            if oversized:
+                chunk.append((line_no, None))
+                oversized = False
+            elif line.strip():
+                chunk.append((line_no, line))
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+
+        if len(buffer) > max_line_bytes:
+            buffer = b""
+            oversized = True
+
+    if oversized or buffer.strip():
+        line_no += 1
+        chunk.append((line_no, None if oversized else buffer))
+    if chunk:
+        yield chunk
+
+
+def parse_line(line: bytes):
+    """
+    (id, feature values in PERFORMANCE_ORDER) of one flat JSON record
+    """
+    try:
+        record = json.loads(line)
+    except RecursionError:
+        raise ValueError("record is nested too deeply")
+    if not isinstance(record, dict):
+        raise ValueError("record must be a JSON object")
+
+    record_id = record.get("id")
+    if not (record_id is None or isinstance(record_id, str) or
+            (type(record_id) is int and ID_MIN <= record_id <= ID_MAX)):
+        raise ValueError("id must be a string, a 64-bit integer or null")
+
+    values = []
+    for name in PERFORMANCE_ORDER:
+        if name not in record:
+            raise ValueError(f"missing field {name}")
+        try:
+            value = float(record[name])
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be a number")
+        except OverflowError:
+            raise ValueError(f"{name} must be finite")
+        if not math.isfinite(value):
+            raise ValueError(f"{name} must be finite")
+        values.append(value)
+    return record_id, values
+
+
+def score_lines(bundle, entries, max_line_bytes: int) -> bytes:
+    """
+    Parse, score and encode one chunk of (line number, bytes) entries.
+    Invalid lines become {"line", "error"} objects in place.
+    """
+    outputs = [None] * len(entries)
+    ids, rows, positions = [], [], []
+
+    for i, (line_no, line) in enumerate(entries):
+        if line is None:
+            outputs[i] = {"line": line_no, "error": f"line exceeds {max_line_bytes} bytes"}
+            continue
+        try:
+            record_id, values = parse_line(line)
+        except ValueError as e:
+            outputs[i] = {"line": line_no, "error": str(e)}
+            continue
+        ids.append(record_id)
+        rows.append(values)
+        positions.append(i)
+
+    if rows:
+        perf_X = np.array(rows, dtype=np.float64)
+        cluster_X = np.ascontiguousarray(perf_X[:, _CLUSTER_COLUMNS])
+        preds, labels, _, recommendations = bundle.score_matrices(perf_X, cluster_X)
+        templates = recommendation_engine.templates_for(recommendations)
+
+        for i, record_id, pred, label, recs in zip(positions, ids, preds.tolist(), labels.tolist(), templates):
+            result = {} if record_id is None else {"id": record_id}
+            result["predicted_performance"] = pred
+            result["persona_cluster"] = label
+            result["persona_label"] = bundle.persona_mapping.get(str(label), "Unknown Persona")
+            result["recommendations"] = [t["title"] for t in recs]
+            outputs[i] = result
+
+    return b"".join(encode_line(entry[0], output) for entry, output in zip(entries, outputs))
+
+
+def encode_line(line_no: int, output: dict) -> bytes:
+    """
+    One NDJSON output line; a result that cannot be encoded becomes an error
+    line so the rest of the stream is unaffected
+    """
+    try:
+        return dumps(output) + b"\n"
+    except (TypeError, ValueError, OverflowError, RecursionError) as e:
+        return dumps({"line": line_no, "error": f"result cannot be encoded: {e}"}) + b"\n"
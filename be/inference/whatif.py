@@ -0,0 +1,72 @@
+"""
+Counterfactual sweeps over one or two features.
+
+The whole grid, plus the unchanged base learner, is built as one feature
+matrix per model: a single performance prediction and a single persona
+assignment pass score every point. Swept features that the persona models
+also use are varied in the clustering matrix too.
+"""
+import numpy as np
+
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER
+from inference.metrics import stage
+
+
+def sweep_values(start: float, stop: float, steps: int, values=None) -> np.ndarray:
+    """
+    Sorted, distinct axis values: the given list, or `steps` evenly spaced
+    points from start to stop
+    """
+    if values is not None:
+        axis = np.unique(np.asarray(values, dtype=np.float64))
+    else:
+        axis = np.linspace(start, stop, steps)
+    if axis.size < 2 or not np.isfinite(axis).all() or (np.diff(axis) <= 0).any():
+        raise ValueError("A sweep needs at least two distinct, finite values")
+    return axis
+
+
+def marginal_effects(preds: np.ndarray, axes) -> list:
+    """
+    Per swept feature: partial dependence (prediction averaged over the
+    other axis), its slope at every axis value, the mean slope and the
+    spread of the partial dependence
+    """
+    effects = []
+    for i, axis in enumerate(axes):
+        other = tuple(j for j in range(preds.ndim) if j != i)
+        dependence = preds.mean(axis=other) if other else preds
+        slope = np.gradient(dependence, axis)
+        effects.append({
+            "partial_dependence": dependence.tolist(),
+            "slope": slope.tolist(),
+            "average_slope": float((dependence[-1] - dependence[0]) / (axis[-1] - axis[0])),
+            "range": float(dependence.max() - dependence.min()),
+        })
+    return effects
+
+
+def score_what_if(bundle, perf_row: np.ndarray, cluster_row: np.ndarray, features, axes):
+    """
+    Score the grid spanned by `axes` around the base rows. Returns
+    predictions and cluster labels shaped like the grid, plus the base
+    learner's prediction and label.
+    """
+    shape = tuple(len(axis) for axis in axes)
+    grid = np.meshgrid(*axes, indexing="ij")
+    n = grid[0].size
+
+    # Row n is the base learner
+    perf_X = np.repeat(perf_row.reshape(1, -1), n + 1, axis=0)
+    cluster_X = np.repeat(cluster_row.reshape(1, -1), n + 1, axis=0)
+    for name, values in zip(features, grid):
+        perf_X[:n, PERFORMANCE_ORDER.index(name)] = values.ravel()
+        if name in CLUSTER_ORDER:
+            cluster_X[:n, CLUSTER_ORDER.index(name)] = values.ravel()
+
+    with stage("performance_predict"):
+        preds = np.asarray(bundle.performance_model.predict(perf_X), dtype=np.float64)
+    with stage("persona_assign"):
+        labels, _ = bundle.persona_assigner.assign(cluster_X)
+
+    return preds[:n].reshape(shape), labels[:n].reshape(shape), float(preds[n]), int(labels[n])
@@ -1,18 +1,123 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-import joblib
+import asyncio
+import contextvars
+import hmac
 import json
-import pandas as pd
+import logging
+import os
+import socket
+import time
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import Annotated
+import numpy as np
+from fastapi import Body, FastAPI, Header, HTTPException, Request, Response
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.routing import APIRoute
+from starlette.requests import ClientDisconnect
+from starlette.routing import Match
+from config import (
+    ADMIN_TOKEN,
+    CENTROID_CACHE_SIZE,
+    INFERENCE_QUEUE_DEPTH,
+    INFERENCE_WORKERS,
+    INSIGHT_PRECOMPUTE_CHUNK,
+    INSIGHT_PRECOMPUTE_INTERVAL,
+    LEARNER_DB,
+    MAX_BATCH_SIZE,
+    METRICS_ENABLED,
+    MICROBATCH_MAX_SIZE,
+    MICROBATCH_WINDOW_MS,
+    MODEL_DIR,
+    MODEL_FORMAT,
+    MODEL_HISTORY,
+    MODEL_WATCH_INTERVAL,
+    PROFILE_HISTORY,
+    PROFILE_SAMPLE_INTERVAL_MS,
+    RESULT_CACHE_BACKEND,
+    RESULT_CACHE_QUANTUM,
+    RESULT_CACHE_SIZE,
+    RESULT_CACHE_TTL,
+    STATIC_MAX_AGE,
+    STREAM_CHUNK_SIZE,
+    STREAM_MAX_LINE_BYTES
+)
+from inference.batcher import MicroBatcher
+from inference import columnar
+from inference.bundle import ModelBundle
+from inference.executor import ExecutorSaturated, InferenceExecutor
+from inference.features import CLUSTER_ORDER, PERFORMANCE_ORDER
+from inference.learners import LearnerStore, learner_features
+from inference.metrics import (
+    LATENCY_BUCKETS,
+    STAGE_BUCKETS,
+    MetricsRegistry,
+    enable_stage_timing,
+    format_labels,
+    histogram_lines,
+    observe_stage,
+    stage
+)
+from inference.profiling import MODES as PROFILE_MODES, Profiler
+from inference.recommendations import generate_recommendations, insight_fragment, recommendation_engine
+from inference.registry import ModelRegistry, model_signature
+from inference.result_cache import ResultCache, make_backend
+from inference.serialization import FastJSONResponse, dumps
+from inference.static import PrerenderedResponse
+from inference.stream import score_lines, split_lines
+from inference.whatif import marginal_effects, score_what_if, sweep_values
+from schema.responses import (
+    AnalysisResult,
+    BatchResult,
+    BenchmarkComparison,
+    ComparisonResult,
+    InsightResult,
+    LearnerInsightResult,
+    PerformanceResult,
+    PersonaResult,
+    WhatIfResult
+)
 from schema.user_features import (
+    ActivityEvent,
     ClusteringFeatures,
+    InsightFeatures,
+    PerformanceBatchPrediction,
     PerformanceFeatures,
     PerformancePrediction,
-    PersonaPrediction
+    PersonaBatchPrediction,
+    PersonaPrediction,
+    ProfilingSettings,
+    WhatIfRequest
 )
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start accepting traffic right away and unpickle the performance model
+    # in the background; performance requests arriving earlier wait for it
+    preload = asyncio.create_task(preload_models())
+    watcher = None
+    if MODEL_WATCH_INTERVAL > 0:
+        watcher = asyncio.create_task(watch_models(MODEL_DIR, MODEL_WATCH_INTERVAL))
+    precompute = None
+    if INSIGHT_PRECOMPUTE_INTERVAL > 0:
+        precompute = asyncio.create_task(schedule_precompute(INSIGHT_PRECOMPUTE_INTERVAL))
+    yield
+    preload.cancel()
+    if watcher is not None:
+        watcher.cancel()
+    if precompute is not None:
+        precompute.cancel()
+    inference_executor.shutdown()
+    learner_store.close()
+
+
 app = FastAPI(
     title="AI Learning Insight API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # --------------------
@@ -29,227 +134,380 @@ app.add_middleware(
 # LOAD MODELS
 # --------------------
 try:
-    performance_model = joblib.load("models/performance_predictor_model.pkl")
-    kmeans_model = joblib.load("models/kmeans_persona_model.pkl")
-    scaler = joblib.load("models/scaler_clustering.pkl")
-
-    with open("models/persona_mapping.json", "r") as f:
-        persona_mapping = json.load(f)
-
+    registry = ModelRegistry(
+        ModelBundle.load(MODEL_DIR, native=MODEL_FORMAT == "native", centroid_cache_size=CENTROID_CACHE_SIZE),
+        history=MODEL_HISTORY,
+        native=MODEL_FORMAT == "native",
+        centroid_cache_size=CENTROID_CACHE_SIZE
+    )
 except Exception as e:
     raise RuntimeError(f"Failed to load models: {str(e)}")
 
-# Ensure correct order for performance ML model
-PERFORMANCE_ORDER = [
-    "total_activities",
-    "avg_minutes_per_module",
-    "consistency_score",
-    "weekend_ratio",
-    "study_time_category",
-    "total_active_days",
-]
 
-# Ensure correct order for clustering model/scaler
-CLUSTER_ORDER = [
-    "total_activities",
-    "avg_minutes_per_module",
-    "consistency_score",
-    "weekend_ratio"
-]
+# --------------------
+# REQUEST CONTEXT & METRICS
+# --------------------
+class RequestState:
+    """
+    Per-request values filled in by the handler and read by the middleware.
+    Shared by reference, so values set inside the handler are visible there
+    even when the handler runs in another context.
+    """
+    __slots__ = ("handler_started", "version")
+
+    def __init__(self):
+        self.version = None
+        self.handler_started = None
+
+
+request_state = contextvars.ContextVar("request_state", default=None)
+
+metrics = None
+if METRICS_ENABLED:
+    metrics = MetricsRegistry()
+    http_requests = metrics.counter(
+        "http_requests_total", "HTTP requests by route, method and status", ("route", "method", "status")
+    )
+    http_latency = metrics.histogram(
+        "http_request_duration_seconds", "HTTP request latency by route and method",
+        LATENCY_BUCKETS, ("route", "method")
+    )
+    http_in_flight = metrics.gauge(
+        "http_requests_in_flight", "HTTP requests currently being served by route", ("route",)
+    )
+    stage_latency = metrics.histogram(
+        "inference_stage_duration_seconds", "Time spent in each stage of the inference path",
+        STAGE_BUCKETS, ("stage",)
+    )
+    enable_stage_timing(stage_latency)
+
+
+# Methods used as metric labels as they are; anything else counts as OTHER
+HTTP_METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+
+def active_bundle() -> ModelBundle:
+    """
+    The bundle this request is served by. Handlers call this once and use
+    the result throughout, so a concurrent reload cannot mix two versions
+    in one response.
+    """
+    bundle = registry.current
+    state = request_state.get()
+    if state is not None:
+        state.version = bundle.version
+        if metrics is not None and state.handler_started is None:
+            state.handler_started = time.perf_counter()
+    return bundle
+
+
+static_routes = None
+dynamic_routes = None
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the route serving this request, used as a bounded
+    metrics label instead of the raw path
+    """
+    global static_routes, dynamic_routes
+    if static_routes is None:
+        static_routes = {r.path: r.path for r in app.routes if "{" not in r.path}
+        dynamic_routes = [r for r in app.routes if "{" in r.path]
+
+    path = scope["path"]
+    if path in static_routes:
+        return path
+    for route in dynamic_routes:
+        match, _ = route.matches(scope)
+        if match != Match.NONE:
+            return route.path
+    return "unmatched"
+
+
+profiler = Profiler(PROFILE_HISTORY, PROFILE_SAMPLE_INTERVAL_MS / 1000)
+
+
+def requested_profile(scope):
+    """
+    Profile mode asked for by an X-Profile header sent with a valid admin
+    token, or None
+    """
+    mode = token = None
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            mode = value.decode("latin-1").strip().lower()
+        elif name == b"x-admin-token":
+            token = value
+    if mode is None or token is None or not hmac.compare_digest(token, ADMIN_TOKEN.encode()):
+        return None
+    return mode if mode in PROFILE_MODES else "sample"
+
+
+def start_profile(scope):
+    """
+    Start profiling this request if its headers or the admin settings ask for it
+    """
+    mode = requested_profile(scope)
+    if mode is None and not profiler.armed:
+        return None
+    route = route_template(scope)
+    if mode is None:
+        # Reading profiles should not push them out of the history
+        if route.startswith("/admin/profiling"):
+            return None
+        mode = profiler.pick(route)
+        if mode is None:
+            return None
+    return profiler.start(route, scope["method"], mode)
+
+
+class RequestMiddleware:
+    """
+    Add X-Model-Version to every HTTP response and, when metrics are
+    enabled, record request counts, latency, in-flight requests and the
+    time spent before the handler runs (body parsing and validation).
+    Requests picked for profiling also get X-Profile-Id.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        state = RequestState()
+        token = request_state.set(state)
+        status = 500
+        # Without an admin token nobody can ask for a profile
+        profile = start_profile(scope) if ADMIN_TOKEN else None
+
+        async def send_with_version(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                version = state.version or registry.current.version
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-model-version", version.encode())
+                ]
+                if profile is not None:
+                    message["headers"].append((b"x-profile-id", profile.id.encode()))
+            await send(message)
+
+        if metrics is None:
+            try:
+                return await self.app(scope, receive, send_with_version)
+            finally:
+                if profile is not None:
+                    profiler.finish(profile, status, state.version or registry.current.version)
+                request_state.reset(token)
+
+        route = route_template(scope)
+        in_flight = http_in_flight.labels(route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_version)
+        finally:
+            elapsed = time.perf_counter() - started
+            in_flight.dec()
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "OTHER"
+            http_requests.labels(route, method, str(status)).inc()
+            http_latency.labels(route, method).observe(elapsed)
+            if state.handler_started is not None:
+                observe_stage("request_parsing", state.handler_started - started)
+            if profile is not None:
+                profiler.finish(profile, status, state.version or registry.current.version)
+            request_state.reset(token)
+
+
+app.add_middleware(RequestMiddleware)
 
 
 # --------------------
-# RECOMMENDATION ENGINE
+# INFERENCE
 # --------------------
-def generate_recommendations(perf_dict: dict, cluster_dict: dict, perf_pred: float, persona: str):
+# Blocking model calls run on a bounded thread pool so the event loop stays
+# free for lightweight endpoints. Inputs are assembled inside the worker
+# thread, which keeps the per-thread row buffers private to each job.
+inference_executor = InferenceExecutor(INFERENCE_WORKERS, INFERENCE_QUEUE_DEPTH)
+
+
+def saturated(e: ExecutorSaturated) -> HTTPException:
+    return HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+
+
+async def run_inference(fn, *args):
     """
-    Generate actionable recommendations based on performance and persona
+    Run a scoring function on the inference pool, shedding load with 429
     """
-    recommendations = []
-    
-    # 1. Consistency-based recommendations
-    consistency = float(perf_dict.get("consistency_score", 0))
-    if consistency < 5:
-        recommendations.append({
-            "category": "Consistency",
-            "priority": "high",
-            "title": "Tingkatkan Konsistensi Belajar",
-            "description": "Konsistensi belajar kamu masih rendah. Coba tetapkan jadwal belajar rutin setiap hari.",
-            "action": "Buat jadwal belajar 30 menit setiap hari pada waktu yang sama",
-            "expected_impact": "Dapat meningkatkan consistency score hingga 40%"
-        })
-    elif consistency < 7:
-        recommendations.append({
-            "category": "Consistency",
-            "priority": "medium",
-            "title": "Pertahankan Ritme Belajar",
-            "description": "Konsistensi kamu cukup baik, tapi masih bisa ditingkatkan.",
-            "action": "Tambahkan sesi review mingguan untuk memperkuat pemahaman",
-            "expected_impact": "Meningkatkan retensi materi hingga 25%"
-        })
-    else:
-        recommendations.append({
-            "category": "Consistency",
-            "priority": "low",
-            "title": "Konsistensi Excellent!",
-            "description": "Kamu sudah memiliki pola belajar yang sangat konsisten.",
-            "action": "Fokus pada materi yang lebih advanced untuk tantangan baru",
-            "expected_impact": "Mempercepat progress pembelajaran 30%"
-        })
-    
-    # 2. Activity-based recommendations
-    total_activities = float(perf_dict.get("total_activities", 0))
-    if total_activities < 20:
-        recommendations.append({
-            "category": "Activity",
-            "priority": "high",
-            "title": "Perbanyak Latihan",
-            "description": "Jumlah aktivitas belajar kamu masih minim. Semakin banyak latihan, semakin baik pemahamanmu.",
-            "action": "Target minimal 3-5 aktivitas belajar per hari",
-            "expected_impact": "Meningkatkan pemahaman materi hingga 50%"
-        })
-    elif total_activities < 35:
-        recommendations.append({
-            "category": "Activity",
-            "priority": "medium",
-            "title": "Tingkatkan Aktivitas Belajar",
-            "description": "Kamu sudah aktif, tapi masih bisa lebih optimal.",
-            "action": "Coba tambah 2-3 aktivitas per hari dengan fokus pada area yang lemah",
-            "expected_impact": "Percepatan progress hingga 30%"
-        })
-    else:
-        recommendations.append({
-            "category": "Activity",
-            "priority": "low",
-            "title": "Aktivitas Sangat Baik!",
-            "description": "Kamu sangat aktif dalam belajar.",
-            "action": "Fokus pada kualitas daripada kuantitas, pastikan setiap aktivitas bermakna",
-            "expected_impact": "Optimalisasi waktu belajar hingga 20%"
-        })
-    
-    # 3. Study time recommendations
-    avg_minutes = float(perf_dict.get("avg_minutes_per_module", 0))
-    if avg_minutes < 15:
-        recommendations.append({
-            "category": "Study Time",
-            "priority": "high",
-            "title": "Tambah Durasi Belajar",
-            "description": "Waktu belajar per modul terlalu singkat untuk pemahaman mendalam.",
-            "action": "Tingkatkan durasi belajar menjadi minimal 20-30 menit per modul",
-            "expected_impact": "Meningkatkan pemahaman materi hingga 60%"
-        })
-    elif avg_minutes < 25:
-        recommendations.append({
-            "category": "Study Time",
-            "priority": "medium",
-            "title": "Optimalkan Waktu Belajar",
-            "description": "Durasi belajar sudah cukup, tapi bisa lebih efektif.",
-            "action": "Gunakan teknik Pomodoro: 25 menit fokus + 5 menit istirahat",
-            "expected_impact": "Meningkatkan fokus dan retensi hingga 35%"
-        })
-    elif avg_minutes > 45:
-        recommendations.append({
-            "category": "Study Time",
-            "priority": "medium",
-            "title": "Perhatikan Efisiensi Belajar",
-            "description": "Durasi belajar cukup lama, pastikan tetap efektif.",
-            "action": "Break down materi menjadi bagian kecil dan ambil break teratur",
-            "expected_impact": "Mencegah burnout dan meningkatkan produktivitas 25%"
-        })
-    else:
-        recommendations.append({
-            "category": "Study Time",
-            "priority": "low",
-            "title": "Durasi Belajar Ideal!",
-            "description": "Waktu belajar kamu sudah optimal.",
-            "action": "Pertahankan pola ini dan fokus pada variasi metode belajar",
-            "expected_impact": "Mempertahankan performa optimal"
-        })
-    
-    # 4. Weekend learning recommendations
-    weekend_ratio = float(cluster_dict.get("weekend_ratio", 0))
-    if weekend_ratio < 0.2:
-        recommendations.append({
-            "category": "Schedule",
-            "priority": "medium",
-            "title": "Manfaatkan Waktu Weekend",
-            "description": "Kamu jarang belajar di weekend. Weekend bisa jadi waktu efektif untuk review.",
-            "action": "Alokasikan 1-2 jam di weekend untuk review materi mingguan",
-            "expected_impact": "Meningkatkan retensi materi hingga 30%"
-        })
-    elif weekend_ratio > 0.5:
-        recommendations.append({
-            "category": "Schedule",
-            "priority": "low",
-            "title": "Balance Weekend & Weekday",
-            "description": "Kamu lebih banyak belajar di weekend.",
-            "action": "Seimbangkan dengan aktivitas weekday untuk konsistensi lebih baik",
-            "expected_impact": "Meningkatkan konsistensi harian 20%"
-        })
-    
-    # 5. Persona-specific recommendations
-    if persona == "The Consistent":
-        recommendations.append({
-            "category": "Persona",
-            "priority": "low",
-            "title": "Leverage Konsistensi Kamu",
-            "description": "Sebagai consistent learner, kamu punya fondasi yang kuat.",
-            "action": "Mulai tackle materi advanced dan jadi mentor untuk teman",
-            "expected_impact": "Memperdalam pemahaman melalui teaching 40%"
-        })
-    elif persona == "The Sprinter":
-        recommendations.append({
-            "category": "Persona",
-            "priority": "medium",
-            "title": "Balance Speed dengan Depth",
-            "description": "Kamu cepat memahami, tapi pastikan tidak skip detail penting.",
-            "action": "Tambahkan sesi review untuk memastikan pemahaman mendalam",
-            "expected_impact": "Meningkatkan retensi jangka panjang 35%"
-        })
-    elif persona == "The Warrior":
-        recommendations.append({
-            "category": "Persona",
-            "priority": "medium",
-            "title": "Channel Energy ke Strategi",
-            "description": "Semangat tinggi perlu diarahkan dengan strategi yang tepat.",
-            "action": "Fokus pada materi yang challenging dan buat study plan terstruktur",
-            "expected_impact": "Maksimalkan hasil belajar hingga 45%"
-        })
-    
-    # 6. Performance-based overall recommendation
-    if perf_pred < 2.5:
-        recommendations.append({
-            "category": "Overall",
-            "priority": "high",
-            "title": "Action Plan untuk Improvement",
-            "description": "Performa kamu perlu ditingkatkan secara menyeluruh.",
-            "action": "Fokus pada 2-3 rekomendasi prioritas tinggi di atas, lakukan selama 2 minggu",
-            "expected_impact": "Peningkatan performa hingga 50% dalam 1 bulan"
-        })
-    elif perf_pred < 3.5:
-        recommendations.append({
-            "category": "Overall",
-            "priority": "medium",
-            "title": "Push ke Level Selanjutnya",
-            "description": "Performa sudah cukup baik, saatnya naik level.",
-            "action": "Pilih 1-2 area untuk improvement dan konsisten lakukan 3 minggu",
-            "expected_impact": "Mencapai performa excellent dalam 1 bulan"
-        })
-    else:
-        recommendations.append({
-            "category": "Overall",
-            "priority": "low",
-            "title": "Maintain Excellence",
-            "description": "Performa kamu sudah sangat baik!",
-            "action": "Fokus pada continuous improvement dan explore materi advanced",
-            "expected_impact": "Menjadi top performer dan role model"
-        })
-    
-    # Sort by priority
-    priority_order = {"high": 0, "medium": 1, "low": 2}
-    recommendations.sort(key=lambda x: priority_order[x["priority"]])
-    
-    return recommendations
+    try:
+        return await inference_executor.run(fn, *args)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+
+
+async def infer_centroid_performance(bundle: ModelBundle, features: PerformanceFeatures):
+    """
+    Centroid predictions for the user's study_time_category and
+    total_active_days. Cache hits are answered without leaving the event loop.
+    """
+    key = (features.study_time_category, features.total_active_days)
+    cached = bundle.cached_centroid_performance(*key)
+    if cached is not None:
+        return cached
+    return await run_inference(bundle.centroid_performance, *key)
+
+
+# --------------------
+# MICRO-BATCHING
+# --------------------
+# Single-record requests that arrive together are scored in one model call.
+# Batchers are kept per model version so a batch never mixes two bundles.
+def score_performance_records(bundle: ModelBundle, records: list[PerformanceFeatures]):
+    return bundle.score_performance_batch(records).tolist()
+
+
+def score_persona_records(bundle: ModelBundle, records: list[ClusteringFeatures]):
+    labels, distances = bundle.score_persona_batch(records)
+    return list(zip(labels.tolist(), distances.tolist()))
+
+
+microbatchers = {}
+
+
+def batchers_for(bundle: ModelBundle):
+    """
+    (performance, persona) micro-batchers of a bundle, or None when
+    micro-batching is disabled
+    """
+    if MICROBATCH_WINDOW_MS <= 0:
+        return None
+
+    batchers = microbatchers.get(bundle.version)
+    if batchers is None:
+        # Drop batchers of versions the registry no longer holds; windows
+        # still open keep a reference to their batcher and flush normally
+        for version in [v for v in microbatchers if registry.get(v) is None]:
+            del microbatchers[version]
+
+        batchers = microbatchers[bundle.version] = (
+            MicroBatcher(partial(score_performance_records, bundle), inference_executor.run,
+                         MICROBATCH_MAX_SIZE, MICROBATCH_WINDOW_MS),
+            MicroBatcher(partial(score_persona_records, bundle), inference_executor.run,
+                         MICROBATCH_MAX_SIZE, MICROBATCH_WINDOW_MS)
+        )
+    return batchers
+
+
+async def batched_performance(bundle: ModelBundle, features: PerformanceFeatures) -> float:
+    batchers = batchers_for(bundle)
+    if batchers is None:
+        return await run_inference(bundle.score_performance, features)
+    try:
+        return await batchers[0].submit(features)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+
+
+async def batched_persona(bundle: ModelBundle, features: ClusteringFeatures):
+    batchers = batchers_for(bundle)
+    if batchers is None:
+        return await run_inference(bundle.score_persona, features)
+    try:
+        return await batchers[1].submit(features)
+    except ExecutorSaturated as e:
+        raise saturated(e)
+
+
+# --------------------
+# RESULT CACHE
+# --------------------
+# Repeated inputs (auto-fill samples, re-run analyses) skip the models entirely
+result_cache = None
+if RESULT_CACHE_SIZE > 0 or RESULT_CACHE_BACKEND:
+    result_cache = ResultCache(
+        RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_QUANTUM, make_backend(RESULT_CACHE_BACKEND)
+    )
+
+
+async def cached_inference(namespace: str, bundle: ModelBundle, assembler, features, infer):
+    key = None
+    if result_cache is not None:
+        with stage("result_cache"):
+            key = result_cache.key(namespace, bundle.version, assembler.values(features))
+            cached = await result_cache.get(key) if key is not None else None
+        if cached is not None:
+            return cached
+
+    result = await infer(bundle, features)
+
+    if key is not None:
+        await result_cache.put(key, result)
+    return result
+
+
+async def infer_performance(bundle: ModelBundle, features: PerformanceFeatures) -> float:
+    return await cached_inference(
+        "performance", bundle, bundle.performance_features, features, batched_performance
+    )
+
+
+async def infer_persona(bundle: ModelBundle, features: ClusteringFeatures):
+    return await cached_inference(
+        "persona", bundle, bundle.cluster_features, features, batched_persona
+    )
+
+
+# --------------------
+# MODEL RELOAD
+# --------------------
+def on_models_activated(previous: ModelBundle, bundle: ModelBundle):
+    # Keys carry the version, so this only frees memory held by the old one
+    if result_cache is not None:
+        result_cache.clear()
+    logger.info("Model version %s activated (was %s)", bundle.version, previous.version)
+
+
+registry.on_activate(on_models_activated)
+
+
+async def reload_models(model_dir: str = MODEL_DIR):
+    """
+    Load, warm up and activate the bundle in model_dir off the event loop.
+    Requests keep being served by the previous version until the swap.
+    """
+    return await asyncio.to_thread(registry.load, model_dir)
+
+
+async def preload_models():
+    """
+    Warm up the active bundle, loading a lazily loaded performance model
+    """
+    try:
+        await asyncio.to_thread(registry.current.warm_up)
+    except Exception:
+        logger.exception("Warming up model version %s failed", registry.current.version)
+
+
+async def watch_models(model_dir: str, interval: float):
+    """
+    Poll the model files and reload when they change
+    """
+    signature = await asyncio.to_thread(model_signature, model_dir)
+    while True:
+        await asyncio.sleep(interval)
+        current = await asyncio.to_thread(model_signature, model_dir)
+        if current is None or current == signature:
+            continue
+        signature = current
+        try:
+            await reload_models(model_dir)
+        except Exception:
+            # Keep serving the active version; a fixed copy changes the
+            # signature again and is picked up on the next poll
+            logger.exception("Reloading models from %s failed", model_dir)
 
 
 @app.get("/")
@@ -257,41 +515,72 @@ async def root():
     return {"message": "API OK", "status": "healthy"}
 
 
+# --------------------
+# STATIC RESPONSES
+# --------------------
+# Endpoints that depend only on the model version are rendered and gzipped
+# once per version and revalidated by ETag, so browsers and CDNs can cache them.
+static_responses = {}
+
+
+def static_response(request: Request, name: str, build):
+    """
+    Pre-rendered response `name` of the active bundle, built by
+    build(bundle) on first use
+    """
+    bundle = active_bundle()
+    key = (bundle.version, name)
+    prerendered = static_responses.get(key)
+    if prerendered is None:
+        # Drop responses of versions the registry no longer holds
+        for stale in [k for k in static_responses if registry.get(k[0]) is None]:
+            del static_responses[stale]
+        prerendered = static_responses[key] = PrerenderedResponse(build(bundle), STATIC_MAX_AGE)
+    return prerendered.respond(request.headers)
+
+
 # --------------------
 # GET SAMPLE DATA FOR AUTO-FILL
 # --------------------
-@app.get("/sample-data")
-async def get_sample_data():
+def build_sample_data(bundle: ModelBundle):
     """
     Return sample data untuk auto-fill di frontend
     """
+    # Get centroids of the KMeans model
+    centroids = bundle.cluster_centers
+
+    # Use first centroid as default sample - ensure all positive values
+    sample_cluster = {
+        "total_activities": max(round(float(centroids[0][0]), 2), 1),  # minimum 1
+        "avg_minutes_per_module": max(round(float(centroids[0][1]), 2), 1),  # minimum 1
+        "consistency_score": max(round(float(centroids[0][2]), 2), 1),  # minimum 1
+        "weekend_ratio": max(round(float(centroids[0][3]), 2), 0.01),  # minimum 0.01
+    }
+
+    # Sample performance data - ensure all positive values
+    sample_performance = {
+        "avg_minutes_per_module": max(round(float(centroids[0][1]), 2), 1),
+        "consistency_score": max(round(float(centroids[0][2]), 2), 1),
+        "total_activities": max(round(float(centroids[0][0]), 2), 1),
+        "weekend_ratio": max(round(float(centroids[0][3]), 2), 0.01),
+        "study_time_category": 2,
+        "total_active_days": 15,
+    }
+
+    return {
+        "performance": sample_performance,
+        "clustering": sample_cluster,
+        "message": "Sample data for auto-fill"
+    }
+
+
+@app.get("/sample-data")
+async def get_sample_data(request: Request):
+    """
+    Auto-fill sample, pre-rendered per model version
+    """
     try:
-        # Get centroids from KMeans model
-        centroids = kmeans_model.cluster_centers_
-        
-        # Use first centroid as default sample - ensure all positive values
-        sample_cluster = {
-            "total_activities": max(round(float(centroids[0][0]), 2), 1),  # minimum 1
-            "avg_minutes_per_module": max(round(float(centroids[0][1]), 2), 1),  # minimum 1
-            "consistency_score": max(round(float(centroids[0][2]), 2), 1),  # minimum 1
-            "weekend_ratio": max(round(float(centroids[0][3]), 2), 0.01),  # minimum 0.01
-        }
-        
-        # Sample performance data - ensure all positive values
-        sample_performance = {
-            "avg_minutes_per_module": max(round(float(centroids[0][1]), 2), 1),
-            "consistency_score": max(round(float(centroids[0][2]), 2), 1),
-            "total_activities": max(round(float(centroids[0][0]), 2), 1),
-            "weekend_ratio": max(round(float(centroids[0][3]), 2), 0.01),
-            "study_time_category": 2,
-            "total_active_days": 15,
-        }
-        
-        return {
-            "performance": sample_performance,
-            "clustering": sample_cluster,
-            "message": "Sample data for auto-fill"
-        }
+        return static_response(request, "sample-data", build_sample_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -299,43 +588,50 @@ async def get_sample_data():
 # --------------------
 # GET ALL PERSONA SAMPLES
 # --------------------
-@app.get("/persona-samples")
-async def get_persona_samples():
+def build_persona_samples(bundle: ModelBundle):
     """
     Return semua sample data untuk setiap persona
     """
-    try:
-        centroids = kmeans_model.cluster_centers_.tolist()
-        
-        samples = []
-        for cluster_id, centroid in enumerate(centroids):
-            persona_label = persona_mapping.get(str(cluster_id), "Unknown")
-            
-            # Ensure all values are positive
-            sample = {
-                "cluster_id": cluster_id,
-                "persona_label": persona_label,
-                "performance": {
-                    "avg_minutes_per_module": max(round(centroid[1], 2), 1),
-                    "consistency_score": max(round(centroid[2], 2), 1),
-                    "total_activities": max(round(centroid[0], 2), 1),
-                    "weekend_ratio": max(round(centroid[3], 2), 0.01),
-                    "study_time_category": 2,
-                    "total_active_days": 15,
-                },
-                "clustering": {
-                    "total_activities": max(round(centroid[0], 2), 1),
-                    "avg_minutes_per_module": max(round(centroid[1], 2), 1),
-                    "consistency_score": max(round(centroid[2], 2), 1),
-                    "weekend_ratio": max(round(centroid[3], 2), 0.01),
-                }
+    centroids = bundle.cluster_centers.tolist()
+
+    samples = []
+    for cluster_id, centroid in enumerate(centroids):
+        persona_label = bundle.persona_mapping.get(str(cluster_id), "Unknown")
+
+        # Ensure all values are positive
+        sample = {
+            "cluster_id": cluster_id,
+            "persona_label": persona_label,
+            "performance": {
+                "avg_minutes_per_module": max(round(centroid[1], 2), 1),
+                "consistency_score": max(round(centroid[2], 2), 1),
+                "total_activities": max(round(centroid[0], 2), 1),
+                "weekend_ratio": max(round(centroid[3], 2), 0.01),
+                "study_time_category": 2,
+                "total_active_days": 15,
+            },
+            "clustering": {
+                "total_activities": max(round(centroid[0], 2), 1),
+                "avg_minutes_per_module": max(round(centroid[1], 2), 1),
+                "consistency_score": max(round(centroid[2], 2), 1),
+                "weekend_ratio": max(round(centroid[3], 2), 0.01),
             }
-            samples.append(sample)
-        
-        return {
-            "samples": samples,
-            "total_personas": len(samples)
         }
+        samples.append(sample)
+
+    return {
+        "samples": samples,
+        "total_personas": len(samples)
+    }
+
+
+@app.get("/persona-samples")
+async def get_persona_samples(request: Request):
+    """
+    Samples of every persona, pre-rendered per model version
+    """
+    try:
+        return static_response(request, "persona-samples", build_persona_samples)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -346,13 +642,12 @@ async def get_persona_samples():
 @app.post("/predict/performance", response_model=PerformancePrediction)
 async def predict_performance(features: PerformanceFeatures):
     try:
-        df = pd.DataFrame([[features.dict()[col] for col in PERFORMANCE_ORDER]],
-                          columns=PERFORMANCE_ORDER)
-
-        pred = performance_model.predict(df)[0]
+        pred = await infer_performance(active_bundle(), features)
 
-        return PerformancePrediction(predicted_performance=float(pred))
+        return FastJSONResponse(PerformanceResult(predicted_performance=pred))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -363,18 +658,18 @@ async def predict_performance(features: PerformanceFeatures):
 @app.post("/predict/persona", response_model=PersonaPrediction)
 async def predict_persona(features: ClusteringFeatures):
     try:
-        df = pd.DataFrame(
-            [[features.dict()[col] for col in CLUSTER_ORDER]],
-            columns=CLUSTER_ORDER
-        )
-
-        scaled = scaler.transform(df)
+        bundle = active_bundle()
+        cluster, distances = await infer_persona(bundle, features)
+        persona = bundle.persona_mapping.get(str(cluster), "Unknown Persona")
 
-        cluster = int(kmeans_model.predict(scaled)[0])
-        persona = persona_mapping.get(str(cluster), "Unknown Persona")
-
-        return PersonaPrediction(cluster=cluster, persona=persona)
+        return FastJSONResponse(PersonaResult(
+            cluster=cluster,
+            persona=persona,
+            centroid_distances=distances
+        ))
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -382,6 +677,36 @@ async def predict_persona(features: ClusteringFeatures):
 # --------------------
 # INSIGHT (PERFORMANCE + PERSONA)
 # --------------------
+def build_insight(bundle: ModelBundle, perf: PerformanceFeatures, cluster: ClusteringFeatures,
+                  perf_pred: float, cluster_id: int, recommendations=None, result=InsightResult, **extra):
+    """
+    Assemble the insight payload for one learner from its model outputs.
+    Batch callers pass recommendations already evaluated for the whole batch.
+    Insight and recommendation text is spliced in pre-serialized; `result`
+    and `extra` let /analyze extend the payload.
+    """
+    persona = bundle.persona_mapping.get(str(cluster_id), "Unknown Persona")
+
+    # Generate actionable recommendations
+    if recommendations is None:
+        with stage("recommendations"):
+            recommendations = generate_recommendations(
+                perf_dict=perf.dict(),
+                cluster_dict=cluster.dict(),
+                perf_pred=perf_pred,
+                persona=persona
+            )
+
+    return result(
+        predicted_performance=perf_pred,
+        persona_cluster=cluster_id,
+        persona_label=persona,
+        insights=insight_fragment(persona, perf_pred),
+        recommendations=recommendation_engine.fragments(recommendations),
+        **extra
+    )
+
+
 @app.post("/predict/insight")
 async def predict_insight(body: dict):
     try:
@@ -389,120 +714,392 @@ async def predict_insight(body: dict):
         perf = PerformanceFeatures(**body["perf"])
         cluster = ClusteringFeatures(**body["cluster"])
 
-        # Rebuild DataFrame with correct order
-        perf_df = pd.DataFrame(
-            [[perf.dict()[col] for col in PERFORMANCE_ORDER]],
-            columns=PERFORMANCE_ORDER
+        # Predictions
+        bundle = active_bundle()
+        perf_pred, (cluster_id, _) = await asyncio.gather(
+            infer_performance(bundle, perf),
+            infer_persona(bundle, cluster)
         )
 
-        cluster_df = pd.DataFrame(
-            [[cluster.dict()[col] for col in CLUSTER_ORDER]],
-            columns=CLUSTER_ORDER
+        return FastJSONResponse(build_insight(bundle, perf, cluster, perf_pred, cluster_id))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------
+# BATCH PREDICTION
+# --------------------
+def check_batch_size(records):
+    """
+    Reject batches that are empty or larger than MAX_BATCH_SIZE
+    """
+    if not len(records):
+        raise HTTPException(status_code=422, detail="Batch must contain at least one record")
+    if len(records) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size {len(records)} exceeds the maximum of {MAX_BATCH_SIZE}"
         )
 
-        # Predictions
-        perf_pred = float(performance_model.predict(perf_df)[0])
-        scaled = scaler.transform(cluster_df)
-        cluster_id = int(kmeans_model.predict(scaled)[0])
-        persona = persona_mapping.get(str(cluster_id), "Unknown Persona")
-
-        # Insight messages
-        persona_insight = {
-            "The Consistent": [
-                "Kamu memiliki pola belajar yang stabil.",
-                "Kedisiplinan kamu membantu progresmu meningkat.",
-                "Pertahankan ritme belajar kamu!"
-            ],
-            "The Sprinter": [
-                "Kamu cepat memahami materi.",
-                "Tingkatkan konsistensi agar makin maksimal.",
-                "Metode sprint cocok untukmu."
+
+# Columnar handlers by path, for bodies sent as Arrow IPC or MessagePack
+columnar_handlers = {}
+
+
+class ColumnarRoute(APIRoute):
+    """
+    Batch route that also accepts columnar bodies. JSON requests go through
+    the regular FastAPI handler and its validation; Arrow and MessagePack
+    requests skip it and go to the columnar handler registered for the path.
+    """
+
+    def get_route_handler(self):
+        json_handler = super().get_route_handler()
+
+        async def handler(request: Request) -> Response:
+            fmt = columnar.request_format(request.headers.get("content-type"))
+            if fmt is None:
+                return await json_handler(request)
+            return await columnar_handlers[self.path](request, fmt)
+
+        return handler
+
+
+def batch_route(path: str, order, score, **kwargs):
+    """
+    Register a POST batch route together with its columnar handler: the body
+    is decoded into a feature matrix in `order`, then scored and encoded by
+    `score` on the inference pool
+    """
+
+    async def handler(request: Request, fmt: str) -> Response:
+        out = columnar.response_format(request.headers.get("accept"), fmt)
+        if not columnar.available(fmt):
+            raise HTTPException(
+                status_code=415,
+                detail=f"{columnar.MEDIA_TYPES[fmt]} bodies need the {columnar.PACKAGES[fmt]} package"
+            )
+        if not columnar.available(out):
+            raise HTTPException(
+                status_code=406,
+                detail=f"{columnar.MEDIA_TYPES[out]} responses need the {columnar.PACKAGES[out]} package"
+            )
+
+        body = await request.body()
+        try:
+            X = await run_inference(columnar.read_matrix, body, fmt, order)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        check_batch_size(X)
+
+        try:
+            content = await run_inference(score, active_bundle(), X, out)
+            return Response(content, media_type=columnar.MEDIA_TYPES[out])
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+
+    columnar_handlers[path] = handler
+
+    def register(endpoint):
+        app.router.add_api_route(path, endpoint, methods=["POST"], route_class_override=ColumnarRoute, **kwargs)
+        return endpoint
+
+    return register
+
+
+@batch_route(
+    "/predict/performance/batch", PERFORMANCE_ORDER, columnar.score_performance,
+    response_model=PerformanceBatchPrediction
+)
+async def predict_performance_batch(records: list[PerformanceFeatures]):
+    """
+    Predict performance for many learners with a single model call.
+    Results are returned in input order. Also accepts Arrow IPC or
+    MessagePack columns of the performance features, answered with a
+    predicted_performance column.
+    """
+    check_batch_size(records)
+    try:
+        preds = await run_inference(active_bundle().score_performance_batch, records)
+
+        return FastJSONResponse(BatchResult(
+            predictions=[PerformanceResult(predicted_performance=p) for p in preds.tolist()],
+            total=len(records)
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@batch_route(
+    "/predict/persona/batch", CLUSTER_ORDER, columnar.score_persona,
+    response_model=PersonaBatchPrediction
+)
+async def predict_persona_batch(records: list[ClusteringFeatures]):
+    """
+    Assign personas for many learners in a single persona assignment pass.
+    Results are returned in input order. Also accepts Arrow IPC or
+    MessagePack columns of the clustering features, answered with cluster,
+    persona and centroid_distances columns.
+    """
+    check_batch_size(records)
+    try:
+        bundle = active_bundle()
+        clusters, distances = await run_inference(bundle.score_persona_batch, records)
+
+        predictions = []
+        for cluster, dist in zip(clusters.tolist(), distances.tolist()):
+            predictions.append(PersonaResult(
+                cluster=cluster,
+                persona=bundle.persona_mapping.get(str(cluster), "Unknown Persona"),
+                centroid_distances=dist
+            ))
+
+        return FastJSONResponse(BatchResult(predictions=predictions, total=len(records)))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@batch_route("/predict/insight/batch", PERFORMANCE_ORDER, columnar.score_insight)
+async def predict_insight_batch(records: list[InsightFeatures]):
+    """
+    Generate insights for many learners. Performance and persona models are
+    each called once for the whole batch; results are returned in input order.
+    Also accepts Arrow IPC or MessagePack columns of the performance features
+    (cluster features are taken from the same values, as for /predict/stream),
+    answered with predicted_performance, persona_cluster, persona_label and
+    recommendation title columns.
+    """
+    check_batch_size(records)
+    try:
+        bundle = active_bundle()
+        perf_preds, cluster_ids, recommendations = await run_inference(bundle.score_insight_batch, records)
+
+        return FastJSONResponse(BatchResult(
+            predictions=[
+                build_insight(bundle, r.perf, r.cluster, p, c, recs)
+                for r, p, c, recs in zip(records, perf_preds.tolist(), cluster_ids.tolist(), recommendations)
             ],
-            "The Warrior": [
-                "Kamu punya semangat tinggi dalam menyelesaikan tugas.",
-                "Tipe pembelajar yang cepat adaptasi di materi sulit.",
-                "Terus gunakan momentum ini untuk menyelesaikan lebih banyak modul."
-            ]
-        }
+            total=len(records)
+        ))
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
-        perf_msg = (
-            "Performa belajar kamu sangat baik."
-            if perf_pred > 3 else
-            "Performa kamu cukup stabil."
-            if perf_pred > 2 else
-            "Performa perlu ditingkatkan."
+# --------------------
+# WHAT-IF ANALYSIS
+# --------------------
+@app.post("/predict/what-if")
+async def predict_what_if(body: WhatIfRequest):
+    """
+    Sweep one or two features around a learner and score the whole grid in
+    one performance prediction and one persona assignment pass. Each sweep
+    gives either explicit `values` or `start`, `stop` and `steps`.
+    """
+    if not 1 <= len(body.sweeps) <= 2:
+        raise HTTPException(status_code=422, detail="Give one or two sweeps")
+    features = [s.feature for s in body.sweeps]
+    unknown = [name for name in features if name not in PERFORMANCE_ORDER]
+    if unknown:
+        raise HTTPException(status_code=422, detail=f"Unknown features {unknown}, expected one of {PERFORMANCE_ORDER}")
+    if len(set(features)) != len(features):
+        raise HTTPException(status_code=422, detail="Each feature can be swept only once")
+
+    axes = []
+    for s in body.sweeps:
+        if s.values is None and (s.start is None or s.stop is None):
+            raise HTTPException(status_code=422, detail=f"Sweep of {s.feature} needs values or start and stop")
+        if s.values is None and not 2 <= s.steps <= MAX_BATCH_SIZE:
+            raise HTTPException(status_code=422, detail=f"Sweep of {s.feature} needs 2 to {MAX_BATCH_SIZE} steps")
+        try:
+            axes.append(sweep_values(s.start, s.stop, s.steps, s.values))
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=f"Sweep of {s.feature}: {e}")
+
+    total = int(np.prod([len(axis) for axis in axes]))
+    if total > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Grid of {total} points exceeds the maximum of {MAX_BATCH_SIZE}"
         )
 
-        # Generate actionable recommendations
-        recommendations = generate_recommendations(
-            perf_dict=perf.dict(),
-            cluster_dict=cluster.dict(),
-            perf_pred=perf_pred,
-            persona=persona
+    try:
+        bundle = active_bundle()
+        cluster = body.cluster or ClusteringFeatures(**{name: getattr(body.perf, name) for name in CLUSTER_ORDER})
+        with stage("feature_assembly"):
+            perf_row = bundle.performance_features.row(body.perf).copy()
+            cluster_row = bundle.cluster_features.row(cluster).copy()
+
+        preds, labels, base_pred, base_label = await run_inference(
+            score_what_if, bundle, perf_row, cluster_row, features, axes
         )
 
-        return {
-            "predicted_performance": perf_pred,
-            "persona_cluster": cluster_id,
-            "persona_label": persona,
-            "insights": {
-                "persona_based": persona_insight.get(persona, ["Belum ada insight."]),
-                "performance_based": perf_msg,
+        mapping = bundle.persona_mapping
+        return FastJSONResponse(WhatIfResult(
+            base_performance=base_pred,
+            base_cluster=base_label,
+            base_persona=mapping.get(str(base_label), "Unknown Persona"),
+            features=features,
+            axes=[axis.tolist() for axis in axes],
+            predicted_performance=preds.tolist(),
+            persona_cluster=labels.tolist(),
+            personas={
+                str(c): mapping.get(str(c), "Unknown Persona")
+                for c in np.unique(np.append(labels, base_label)).tolist()
             },
-            "recommendations": recommendations
-        }
-
+            marginal_effects=dict(zip(features, marginal_effects(preds, axes))),
+            total=total
+        ))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# --------------------
+# STREAMING PREDICTION
+# --------------------
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that leaves receive() to the body generator.
+
+    Below ASGI spec 2.4 Starlette listens for disconnects by reading
+    receive() while streaming, which would swallow the request body that
+    /predict/stream is still reading. Disconnects surface in the body
+    generator (ClientDisconnect) or on send instead.
+    """
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.stream_response(send)
+        except OSError:
+            raise ClientDisconnect()
+        if self.background is not None:
+            await self.background()
+
+
+async def run_inference_waiting(fn, *args):
+    """
+    Like run_inference, but waits for room in the inference queue instead of
+    failing: a stream cannot turn into a 429 once it has started
+    """
+    delay = 0.005
+    while True:
+        try:
+            return await inference_executor.run(fn, *args)
+        except ExecutorSaturated:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+
+
+@app.post("/predict/stream")
+async def predict_stream(request: Request):
+    """
+    Score newline-delimited JSON records as they arrive and stream NDJSON
+    results back. Each input line is a flat object with the performance
+    features (cluster features are taken from the same values) and an
+    optional "id". Each produces one output line in the same order, with
+    predicted_performance, persona_cluster, persona_label and recommendation
+    titles, or {"line", "error"} for an invalid record.
+
+    Input is scored in chunks of STREAM_CHUNK_SIZE lines, one chunk scoring
+    while the next is read. Nothing more is read until the client has taken
+    the previous results, so memory stays bounded and a slow reader slows
+    the upload down.
+    """
+    bundle = active_bundle()
+
+    async def results():
+        pending = None
+        try:
+            async for entries in split_lines(request.stream(), STREAM_CHUNK_SIZE, STREAM_MAX_LINE_BYTES):
+                scoring = asyncio.ensure_future(
+                    run_inference_waiting(score_lines, bundle, entries, STREAM_MAX_LINE_BYTES)
+                )
+                if pending is not None:
+                    yield await pending
+                pending = scoring
+            if pending is not None:
+                yield await pending
+                pending = None
+        except ClientDisconnect:
+            return
+        except Exception as e:
+            yield (json.dumps({"error": str(e)}) + "\n").encode("utf-8")
+        finally:
+            if pending is not None:
+                pending.cancel()
+
+    return NDJSONStreamingResponse(results(), media_type="application/x-ndjson")
+
+
 # --------------------
 # AUTO-GENERATE TEST DATA FOR ALL PERSONAS
 # --------------------
-@app.get("/debug/generate-test-data")
-async def generate_test_data():
+def build_test_data(bundle: ModelBundle):
     """
     Generate sample input otomatis untuk mengetes semua persona.
     Nilai diambil dari centroid model KMeans agar hasil cluster akurat.
     """
-    try:
-        centroids = kmeans_model.cluster_centers_.tolist()
-
-        persona_samples = []
+    centroids = bundle.cluster_centers.tolist()
 
-        for cluster_id, centroid in enumerate(centroids):
-            sample_input = {
-                "total_activities": round(centroid[0], 2),
-                "avg_minutes_per_module": round(centroid[1], 2),
-                "consistency_score": round(centroid[2], 2),
-                "weekend_ratio": round(centroid[3], 2),
-            }
+    persona_samples = []
 
-            persona_samples.append({
-                "cluster_id": cluster_id,
-                "persona_label": persona_mapping.get(str(cluster_id), "Unknown"),
-                "sample_clustering_input": sample_input
-            })
-
-        # SAMPLE FOR PERFORMANCE MODEL
-        perf_sample = {
-            "avg_minutes_per_module": 20,
-            "consistency_score": 5,
-            "total_activities": 30,
-            "weekend_ratio": 0.3,
-            "study_time_category": 2,
-            "total_active_days": 15,
+    for cluster_id, centroid in enumerate(centroids):
+        sample_input = {
+            "total_activities": round(centroid[0], 2),
+            "avg_minutes_per_module": round(centroid[1], 2),
+            "consistency_score": round(centroid[2], 2),
+            "weekend_ratio": round(centroid[3], 2),
         }
 
-        return {
-            "persona_samples": persona_samples,
-            "default_performance_input": perf_sample,
-            "order_info": {
-                "performance_order": PERFORMANCE_ORDER,
-                "cluster_order": CLUSTER_ORDER
-            }
+        persona_samples.append({
+            "cluster_id": cluster_id,
+            "persona_label": bundle.persona_mapping.get(str(cluster_id), "Unknown"),
+            "sample_clustering_input": sample_input
+        })
+
+    # SAMPLE FOR PERFORMANCE MODEL
+    perf_sample = {
+        "avg_minutes_per_module": 20,
+        "consistency_score": 5,
+        "total_activities": 30,
+        "weekend_ratio": 0.3,
+        "study_time_category": 2,
+        "total_active_days": 15,
+    }
+
+    return {
+        "persona_samples": persona_samples,
+        "default_performance_input": perf_sample,
+        "order_info": {
+            "performance_order": PERFORMANCE_ORDER,
+            "cluster_order": CLUSTER_ORDER
         }
+    }
+
 
+@app.get("/debug/generate-test-data")
+async def generate_test_data(request: Request):
+    """
+    Test inputs for every persona, pre-rendered per model version
+    """
+    try:
+        return static_response(request, "test-data", build_test_data)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -516,15 +1113,20 @@ async def health_check():
     Check if all models are loaded properly
     """
     try:
+        bundle = active_bundle()
         return {
             "status": "healthy",
             "models": {
-                "performance_model": "loaded",
+                "performance_model": "loaded" if bundle.performance_model_loaded else "lazy",
                 "kmeans_model": "loaded",
                 "scaler": "loaded",
-                "persona_mapping": "loaded"
+                "persona_mapping": "loaded",
+                "population_index": bundle.population.size if bundle.population is not None else "missing"
             },
-            "total_personas": len(persona_mapping),
+            "model_version": bundle.version,
+            "loaded_versions": [v["version"] for v in registry.versions()],
+            "total_personas": len(bundle.persona_mapping),
+            "inference": inference_executor.stats(),
             "cluster_features": CLUSTER_ORDER,
             "performance_features": PERFORMANCE_ORDER
         }
@@ -532,126 +1134,547 @@ async def health_check():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# --------------------
+# CACHE STATS
+# --------------------
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """
+    Hit/miss counters of the prediction result cache
+    """
+    bundle = active_bundle()
+    return {
+        "result_cache": result_cache.stats() if result_cache is not None else {"enabled": False},
+        "materialized_insights": {
+            "interval": INSIGHT_PRECOMPUTE_INTERVAL,
+            **precompute_status
+        },
+        "centroid_performance_cache": {
+            "size": len(bundle.centroid_performance_cache),
+            "max_size": bundle.centroid_performance_cache.maxsize
+        }
+    }
+
+
+# --------------------
+# MICRO-BATCHING STATS
+# --------------------
+@app.get("/batching/stats")
+async def get_batching_stats():
+    """
+    Batch-size and queue-wait histograms of the micro-batchers
+    """
+    batchers = batchers_for(active_bundle())
+    if batchers is None:
+        return {"enabled": False}
+
+    return {
+        "enabled": True,
+        "performance": batchers[0].stats(),
+        "persona": batchers[1].stats()
+    }
+
+
+# --------------------
+# METRICS
+# --------------------
+def collect_runtime_metrics():
+    """
+    Executor, cache, micro-batching and model state at scrape time
+    """
+    bundle = registry.current
+    executor = inference_executor.stats()
+    lines = [
+        "# HELP model_info Active model version",
+        "# TYPE model_info gauge",
+        f"model_info{format_labels({'version': bundle.version})} 1",
+        "# HELP inference_executor_pending Inference jobs running or queued",
+        "# TYPE inference_executor_pending gauge",
+        f"inference_executor_pending {executor['pending']}",
+        "# HELP inference_executor_rejected_total Inference jobs rejected with 429",
+        "# TYPE inference_executor_rejected_total counter",
+        f"inference_executor_rejected_total {executor['rejected']}",
+    ]
+
+    if result_cache is not None:
+        stats = result_cache.stats()
+        lines += [
+            "# HELP result_cache_requests_total Result cache lookups by outcome",
+            "# TYPE result_cache_requests_total counter",
+            f'result_cache_requests_total{{outcome="hit"}} {stats["hits"]}',
+            f'result_cache_requests_total{{outcome="shared_hit"}} {stats["shared_hits"]}',
+            f'result_cache_requests_total{{outcome="miss"}} {stats["misses"]}',
+        ]
+
+    batchers = batchers_for(bundle)
+    if batchers is not None:
+        lines += [
+            "# HELP microbatch_size Records per micro-batch",
+            "# TYPE microbatch_size histogram",
+        ]
+        for model, batcher in zip(("performance", "persona"), batchers):
+            lines += histogram_lines("microbatch_size", {"model": model}, batcher.batch_size)
+        lines += [
+            "# HELP microbatch_queue_wait_seconds Time from submission until the batch starts scoring",
+            "# TYPE microbatch_queue_wait_seconds histogram",
+        ]
+        for model, batcher in zip(("performance", "persona"), batchers):
+            lines += histogram_lines("microbatch_queue_wait_seconds", {"model": model}, batcher.queue_wait)
+
+    return lines
+
+
+if metrics is not None:
+    metrics.add_collector(collect_runtime_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Prometheus metrics in the text exposition format
+    """
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Metrics are disabled (METRICS_ENABLED=0)")
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
 # --------------------
 # BENCHMARK & COMPARISON
 # --------------------
 @app.get("/benchmark/stats")
-async def get_benchmark_stats():
+async def get_benchmark_stats(request: Request):
     """
     Get benchmark statistics across all personas for comparison
     """
     try:
-        centroids = kmeans_model.cluster_centers_
-        
-        benchmark_data = []
-        
-        for cluster_id, centroid in enumerate(centroids):
-            persona_label = persona_mapping.get(str(cluster_id), "Unknown")
-            
-            benchmark_data.append({
-                "cluster_id": cluster_id,
-                "persona": persona_label,
-                "avg_activities": round(float(centroid[0]), 2),
-                "avg_minutes_per_module": round(float(centroid[1]), 2),
-                "avg_consistency": round(float(centroid[2]), 2),
-                "avg_weekend_ratio": round(float(centroid[3]), 2)
-            })
-        
-        # Calculate overall averages
-        overall_avg = {
-            "avg_activities": round(sum([b["avg_activities"] for b in benchmark_data]) / len(benchmark_data), 2),
-            "avg_minutes_per_module": round(sum([b["avg_minutes_per_module"] for b in benchmark_data]) / len(benchmark_data), 2),
-            "avg_consistency": round(sum([b["avg_consistency"] for b in benchmark_data]) / len(benchmark_data), 2),
-            "avg_weekend_ratio": round(sum([b["avg_weekend_ratio"] for b in benchmark_data]) / len(benchmark_data), 2)
-        }
-        
-        return {
-            "benchmark_by_persona": benchmark_data,
-            "overall_average": overall_avg,
-            "total_personas": len(benchmark_data)
-        }
+        # Computed once per model load, see CentroidStats
+        return static_response(request, "benchmark-stats", lambda bundle: bundle.centroids.benchmark_stats)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def build_comparison(bundle: ModelBundle, features: PerformanceFeatures, user_perf: float, bench_perfs):
+    """
+    Compare user's predicted performance and features with the personas
+    """
+    stats = bundle.centroids
+    benchmark_data = []
+    
+    for centroid, bench_perf in zip(stats.centroids, bench_perfs):
+        benchmark_data.append(BenchmarkComparison(
+            persona=centroid.persona,
+            benchmark_performance=round(bench_perf, 2),
+            difference=round(user_perf - bench_perf, 2)
+        ))
+    
+    # Calculate percentile: against the reference population when an index
+    # is loaded, otherwise against the persona benchmarks
+    user_data = features.dict()
+    population = bundle.population
+    if population is not None:
+        percentile = population.percentile("predicted_performance", user_perf)
+        feature_percentiles = population.feature_percentiles(user_data)
+    else:
+        all_perfs = [b.benchmark_performance for b in benchmark_data]
+        percentile = (sum(1 for p in all_perfs if p < user_perf) / len(all_perfs)) * 100
+        feature_percentiles = None
+    
+    # Comparison analysis
+    comparison_insights = []
+    
+    # Compare activities
+    avg_activities = stats.avg_activities
+    if user_data["total_activities"] > avg_activities * 1.2:
+        comparison_insights.append(" Kamu 20% lebih aktif dari rata-rata learner!")
+    elif user_data["total_activities"] < avg_activities * 0.8:
+        comparison_insights.append(" Tingkatkan aktivitas belajar untuk mencapai level rata-rata")
+    
+    # Compare consistency
+    avg_consistency = stats.avg_consistency
+    if user_data["consistency_score"] > avg_consistency * 1.2:
+        comparison_insights.append(" Konsistensi kamu 20% lebih baik dari average!")
+    elif user_data["consistency_score"] < avg_consistency * 0.8:
+        comparison_insights.append(" Fokus pada konsistensi untuk hasil lebih optimal")
+    
+    # Compare study time
+    avg_time = stats.avg_minutes_per_module
+    if user_data["avg_minutes_per_module"] > avg_time * 1.2:
+        comparison_insights.append(" Waktu belajar kamu lebih mendalam dari rata-rata")
+    elif user_data["avg_minutes_per_module"] < avg_time * 0.8:
+        comparison_insights.append(" Pertimbangkan menambah durasi per modul")
+    
+    return ComparisonResult(
+        user_performance=round(user_perf, 2),
+        percentile=round(percentile, 1),
+        benchmark_comparison=benchmark_data,
+        comparison_insights=comparison_insights,
+        performance_level=(
+            "Top Performer" if percentile >= 75 else
+            "Above Average" if percentile >= 50 else
+            "Average" if percentile >= 25 else
+            "Needs Improvement"
+        ),
+        feature_percentiles=feature_percentiles,
+        population_size=population.size if population is not None else None
+    )
+
+
 @app.post("/compare/performance")
 async def compare_performance(features: PerformanceFeatures):
     """
     Compare user's performance with benchmark averages
     """
     try:
-        # Get user's prediction
-        df = pd.DataFrame([[features.dict()[col] for col in PERFORMANCE_ORDER]],
-                          columns=PERFORMANCE_ORDER)
-        user_perf = float(performance_model.predict(df)[0])
-        
-        # Get benchmark stats
-        centroids = kmeans_model.cluster_centers_
-        benchmark_data = []
-        
-        for cluster_id, centroid in enumerate(centroids):
-            persona_label = persona_mapping.get(str(cluster_id), "Unknown")
-            
-            # Prepare benchmark features
-            bench_features = {
-                "total_activities": float(centroid[0]),
-                "avg_minutes_per_module": float(centroid[1]),
-                "consistency_score": float(centroid[2]),
-                "weekend_ratio": float(centroid[3]),
-                "study_time_category": features.study_time_category,
-                "total_active_days": features.total_active_days
-            }
-            
-            bench_df = pd.DataFrame([[bench_features[col] for col in PERFORMANCE_ORDER]],
-                                   columns=PERFORMANCE_ORDER)
-            bench_perf = float(performance_model.predict(bench_df)[0])
-            
-            benchmark_data.append({
-                "persona": persona_label,
-                "benchmark_performance": round(bench_perf, 2),
-                "difference": round(user_perf - bench_perf, 2)
-            })
-        
-        # Calculate percentile
-        all_perfs = [b["benchmark_performance"] for b in benchmark_data]
-        percentile = (sum(1 for p in all_perfs if p < user_perf) / len(all_perfs)) * 100
-        
-        # Comparison analysis
-        user_data = features.dict()
-        comparison_insights = []
-        
-        # Compare activities
-        avg_activities = sum([c[0] for c in centroids]) / len(centroids)
-        if user_data["total_activities"] > avg_activities * 1.2:
-            comparison_insights.append(" Kamu 20% lebih aktif dari rata-rata learner!")
-        elif user_data["total_activities"] < avg_activities * 0.8:
-            comparison_insights.append(" Tingkatkan aktivitas belajar untuk mencapai level rata-rata")
-        
-        # Compare consistency
-        avg_consistency = sum([c[2] for c in centroids]) / len(centroids)
-        if user_data["consistency_score"] > avg_consistency * 1.2:
-            comparison_insights.append(" Konsistensi kamu 20% lebih baik dari average!")
-        elif user_data["consistency_score"] < avg_consistency * 0.8:
-            comparison_insights.append(" Fokus pada konsistensi untuk hasil lebih optimal")
-        
-        # Compare study time
-        avg_time = sum([c[1] for c in centroids]) / len(centroids)
-        if user_data["avg_minutes_per_module"] > avg_time * 1.2:
-            comparison_insights.append(" Waktu belajar kamu lebih mendalam dari rata-rata")
-        elif user_data["avg_minutes_per_module"] < avg_time * 0.8:
-            comparison_insights.append(" Pertimbangkan menambah durasi per modul")
-        
-        return {
-            "user_performance": round(user_perf, 2),
-            "percentile": round(percentile, 1),
-            "benchmark_comparison": benchmark_data,
-            "comparison_insights": comparison_insights,
-            "performance_level": (
-                "Top Performer" if percentile >= 75 else
-                "Above Average" if percentile >= 50 else
-                "Average" if percentile >= 25 else
-                "Needs Improvement"
-            )
+        # Get user's prediction and the memoized benchmark predictions
+        bundle = active_bundle()
+        user_perf, bench_perfs = await asyncio.gather(
+            infer_performance(bundle, features),
+            infer_centroid_performance(bundle, features)
+        )
+
+        with stage("comparison"):
+            return FastJSONResponse(build_comparison(bundle, features, user_perf, bench_perfs))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------
+# COMBINED ANALYSIS
+# --------------------
+@app.post("/analyze")
+async def analyze(body: InsightFeatures):
+    """
+    Everything the Analysis page shows in one round trip: prediction,
+    persona, insights, recommendations and comparison. Each model output is
+    computed exactly once.
+    """
+    try:
+        bundle = active_bundle()
+        perf_pred, (cluster_id, distances), bench_perfs = await asyncio.gather(
+            infer_performance(bundle, body.perf),
+            infer_persona(bundle, body.cluster),
+            infer_centroid_performance(bundle, body.perf)
+        )
+
+        with stage("comparison"):
+            comparison = build_comparison(bundle, body.perf, perf_pred, bench_perfs)
+
+        return FastJSONResponse(build_insight(
+            bundle, body.perf, body.cluster, perf_pred, cluster_id,
+            result=AnalysisResult, centroid_distances=distances, comparison=comparison
+        ))
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------
+# LEARNER PROFILES
+# --------------------
+# Raw activity events are aggregated per learner as they arrive; insights for
+# a stored learner are scored from those aggregates alone.
+learner_store = LearnerStore(LEARNER_DB)
+
+
+@app.post("/learners/events")
+async def ingest_learner_events(events: list[ActivityEvent]):
+    """
+    Fold learning-activity events into the stored learner aggregates
+    """
+    check_batch_size(events)
+    try:
+        learners = await asyncio.to_thread(
+            learner_store.ingest, [(e.learner_id, e.timestamp, e.minutes) for e in events]
+        )
+        return {"accepted": len(events), "learners": learners}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/learners/{learner_id}/insight")
+async def learner_insight(learner_id: str):
+    """
+    Insight for a stored learner. Served from the materialized table when
+    it is current for the learner and the active model version; otherwise
+    scored live from the aggregated features and written back.
+    """
+    try:
+        bundle = active_bundle()
+        payload = await asyncio.to_thread(learner_store.insight, learner_id, bundle.version)
+        if payload is not None:
+            return Response(payload, media_type="application/json", headers={"X-Insight-Source": "precomputed"})
+
+        counters = await asyncio.to_thread(learner_store.counters, learner_id)
+        if counters is None:
+            raise HTTPException(status_code=404, detail=f"No activity recorded for learner {learner_id}")
+        updated_at = counters.pop("updated_at")
+        features = learner_features(**counters)
+
+        perf = PerformanceFeatures(**features)
+        cluster = ClusteringFeatures(**{name: features[name] for name in CLUSTER_ORDER})
+        perf_pred, (cluster_id, _) = await asyncio.gather(
+            infer_performance(bundle, perf),
+            infer_persona(bundle, cluster)
+        )
+
+        payload = dumps(build_insight(
+            bundle, perf, cluster, perf_pred, cluster_id,
+            result=LearnerInsightResult, learner_id=learner_id, features=features
+        ))
+        await asyncio.to_thread(learner_store.save_insights, bundle.version, [(learner_id, updated_at, payload)])
+        return Response(payload, media_type="application/json", headers={"X-Insight-Source": "live"})
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------
+# INSIGHT PRECOMPUTE
+# --------------------
+# A background job keeps the materialized insight table current, so dashboard
+# reads of stored learners rarely reach the models.
+PRECOMPUTE_LEASE = "insight_precompute"
+precompute_lock = asyncio.Lock()
+precompute_status = {"runs": 0, "last_run": None}
+
+
+def score_learner_chunk(bundle: ModelBundle, chunk) -> list:
+    """
+    Insight payloads for a chunk of (learner_id, features, updated_at)
+    rows, scored with one batch model call on feature matrices built
+    straight from the stored features
+    """
+    with stage("feature_assembly"):
+        perf_X = np.array([[features[name] for name in PERFORMANCE_ORDER] for _, features, _ in chunk])
+        cluster_X = perf_X[:, [PERFORMANCE_ORDER.index(name) for name in CLUSTER_ORDER]]
+
+    perf_preds, labels, _, recommendations = bundle.score_matrices(perf_X, cluster_X)
+    with stage("recommendations"):
+        recommendations = recommendation_engine.templates_for(recommendations)
+
+    return [
+        (learner_id, updated_at, dumps(build_insight(
+            bundle, None, None, p, c, recs,
+            result=LearnerInsightResult, learner_id=learner_id, features=features
+        )))
+        for (learner_id, features, updated_at), p, c, recs
+        in zip(chunk, perf_preds.tolist(), labels.tolist(), recommendations)
+    ]
+
+
+async def precompute_insights(bundle: ModelBundle, chunk_size: int = INSIGHT_PRECOMPUTE_CHUNK) -> int:
+    """
+    Score every learner whose materialized insight for the bundle is
+    missing or stale, one job on the inference pool per chunk, and drop
+    insights of versions that are no longer loaded
+    """
+    scored = 0
+    chunks = learner_store.stale_learners(bundle.version, chunk_size)
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        rows = await run_inference_waiting(score_learner_chunk, bundle, chunk)
+        await asyncio.to_thread(learner_store.save_insights, bundle.version, rows)
+        scored += len(chunk)
+
+    await asyncio.to_thread(learner_store.prune_insights, [v["version"] for v in registry.versions()])
+    return scored
+
+
+async def run_precompute() -> dict:
+    """
+    One precompute pass for the active bundle, off the event loop
+    """
+    async with precompute_lock:
+        bundle = registry.current
+        started = time.perf_counter()
+        scored = await precompute_insights(bundle)
+        precompute_status["runs"] += 1
+        precompute_status["last_run"] = {
+            "model_version": bundle.version,
+            "scored": scored,
+            "seconds": round(time.perf_counter() - started, 3),
+            "finished_at": time.time()
         }
+        if scored:
+            logger.info("Precomputed insights of %d learners for model version %s", scored, bundle.version)
+        return precompute_status["last_run"]
+
+
+async def schedule_precompute(interval: float):
+    """
+    Run a precompute pass every `interval` seconds while holding the lease.
+    The lease outlives one interval, so another worker only takes over once
+    its holder has stopped renewing it.
+    """
+    ttl = max(2 * interval, 60)
+    while True:
+        try:
+            owner = f"{socket.gethostname()}:{os.getpid()}"
+            if await asyncio.to_thread(learner_store.acquire_lease, PRECOMPUTE_LEASE, owner, ttl):
+                await run_precompute()
+        except Exception:
+            logger.exception("Precomputing learner insights failed")
+        await asyncio.sleep(interval)
+
+
+# --------------------
+# MODEL ADMIN
+# --------------------
+def require_admin(token: str | None):
+    """
+    Admin endpoints are disabled unless ADMIN_TOKEN is configured
+    """
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Model admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if token is None or not hmac.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+def resolve_model_dir(subdir: str | None) -> str:
+    """
+    MODEL_DIR itself, or a directory inside it holding a new model version
+    """
+    if not subdir:
+        return MODEL_DIR
+    root = os.path.realpath(MODEL_DIR)
+    path = os.path.realpath(os.path.join(root, subdir))
+    if os.path.commonpath([root, path]) != root:
+        raise HTTPException(status_code=400, detail="model_dir must be inside the model directory")
+    if not os.path.isdir(path):
+        raise HTTPException(status_code=404, detail=f"Model directory {subdir} not found")
+    return path
+
+
+@app.get("/admin/models")
+async def list_models(x_admin_token: str | None = Header(None)):
+    """
+    Loaded model versions and which one is serving
+    """
+    require_admin(x_admin_token)
+    return {
+        "active_version": registry.current.version,
+        "versions": registry.versions()
+    }
+
+
+@app.post("/admin/models/reload")
+async def reload_model_bundle(body: Annotated[dict | None, Body()] = None, x_admin_token: str | None = Header(None)):
+    """
+    Load the model files in the background, warm them up and swap them in.
+    In-flight requests finish on the version they started with.
+    """
+    require_admin(x_admin_token)
+    model_dir = resolve_model_dir((body or {}).get("model_dir"))
+    previous = registry.current.version
+    try:
+        bundle, swapped = await reload_models(model_dir)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to load models: {str(e)}")
+
+    return {
+        "active_version": bundle.version,
+        "previous_version": previous,
+        "swapped": swapped
+    }
+
+
+@app.post("/admin/models/activate/{version}")
+async def activate_model_version(version: str, x_admin_token: str | None = Header(None)):
+    """
+    Roll back (or forward) to a version that is still loaded
+    """
+    require_admin(x_admin_token)
+    previous = registry.current.version
+    try:
+        bundle = registry.activate_version(version)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Model version {version} is not loaded")
+
+    return {
+        "active_version": bundle.version,
+        "previous_version": previous,
+        "swapped": bundle.version != previous
+    }
+
+
+@app.post("/admin/insights/precompute")
+async def trigger_precompute(x_admin_token: str | None = Header(None)):
+    """
+    Run a materialized insight pass now instead of waiting for the schedule
+    """
+    require_admin(x_admin_token)
+    try:
+        return await run_precompute()
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# --------------------
+# PROFILING
+# --------------------
+def get_profile(profile_id: str):
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return profile
+
+
+@app.get("/admin/profiling")
+async def list_profiles(x_admin_token: str | None = Header(None)):
+    """
+    Profiling settings and the kept profiles, newest first
+    """
+    require_admin(x_admin_token)
+    return {"settings": profiler.settings(), "profiles": profiler.list()}
+
+
+@app.post("/admin/profiling")
+async def configure_profiling(body: ProfilingSettings, x_admin_token: str | None = Header(None)):
+    """
+    Profile the next `requests` requests and/or a `rate` fraction of traffic,
+    optionally only on `routes` (path templates). Zeros turn it off.
+    """
+    require_admin(x_admin_token)
+    profiler.configure(body.mode, body.rate, body.requests, body.routes)
+    return profiler.settings()
+
+
+@app.get("/admin/profiling/{profile_id}")
+async def profile_summary(profile_id: str, x_admin_token: str | None = Header(None)):
+    """
+    Tags of one profile and the functions it spent the most time in
+    """
+    require_admin(x_admin_token)
+    profile = get_profile(profile_id)
+    return {**profile.summary(), "top_functions": profile.top_functions()}
+
+
+@app.get("/admin/profiling/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def profile_collapsed(profile_id: str, x_admin_token: str | None = Header(None)):
+    """
+    Sampled stacks in collapsed format, for flamegraph.pl or speedscope
+    """
+    require_admin(x_admin_token)
+    return PlainTextResponse(get_profile(profile_id).collapsed())
+
+
+@app.get("/admin/profiling/{profile_id}/pstats")
+async def profile_pstats(profile_id: str, x_admin_token: str | None = Header(None)):
+    """
+    cProfile stats of a cprofile-mode profile, readable with pstats.Stats
+    or snakeviz
+    """
+    require_admin(x_admin_token)
+    profile = get_profile(profile_id)
+    if profile.stats is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} has no cProfile stats")
+    return Response(
+        profile.pstats_dump(),
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile_id}.prof"'}
+    )
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Any
+
+# Response bodies of the hot endpoints. Slotted dataclasses are cheap to
+# build and are serialized field by field, in declaration order, by
+# FastJSONResponse. Fields typed Any hold pre-serialized fragments.
+
+
+@dataclass(slots=True)
+class PerformanceResult:
+    predicted_performance: float
+
+
+@dataclass(slots=True)
+class PersonaResult:
+    cluster: int
+    persona: str
+    centroid_distances: list[float] | None = None
+
+
+@dataclass(slots=True)
+class InsightResult:
+    predicted_performance: float
+    persona_cluster: int
+    persona_label: str
+    insights: Any
+    recommendations: list[Any]
+
+
+@dataclass(slots=True)
+class BenchmarkComparison:
+    persona: str
+    benchmark_performance: float
+    difference: float
+
+
+@dataclass(slots=True)
+class ComparisonResult:
+    user_performance: float
+    percentile: float
+    benchmark_comparison: list[BenchmarkComparison]
+    comparison_insights: list[str]
+    performance_level: str
+    # Only set when a population index is loaded
+    feature_percentiles: dict[str, float] | None = None
+    population_size: int | None = None
+
+
+@dataclass(slots=True)
+class AnalysisResult(InsightResult):
+    centroid_distances: list[float]
+    comparison: ComparisonResult
+
+
+@dataclass(slots=True)
+class LearnerInsightResult(InsightResult):
+    learner_id: str
+    features: dict[str, float]
+
+
+@dataclass(slots=True)
+class WhatIfResult:
+    base_performance: float
+    base_cluster: int
+    base_persona: str
+    features: list[str]
+    axes: list[list[float]]
+    # Nested lists shaped like the grid, first feature outermost
+    predicted_performance: list
+    persona_cluster: list
+    personas: dict[str, str]
+    marginal_effects: dict[str, Any]
+    total: int
+
+
+@dataclass(slots=True)
+class BatchResult:
+    predictions: list
+    total: int
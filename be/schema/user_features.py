@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, Field
 
 class UserFeatures(BaseModel):
     total_courses: float
@@ -27,4 +30,40 @@ class PerformancePrediction(BaseModel):
 
 class PersonaPrediction(BaseModel):
     cluster: int
-    persona: str
\ No newline at end of file
+    persona: str
+    centroid_distances: list[float] | None = None
+
+class InsightFeatures(BaseModel):
+    perf: PerformanceFeatures
+    cluster: ClusteringFeatures
+
+class PerformanceBatchPrediction(BaseModel):
+    predictions: list[PerformancePrediction]
+    total: int
+
+class PersonaBatchPrediction(BaseModel):
+    predictions: list[PersonaPrediction]
+    total: int
+
+class ActivityEvent(BaseModel):
+    learner_id: str = Field(min_length=1)
+    timestamp: datetime
+    minutes: float = Field(ge=0, le=1440)
+
+class FeatureSweep(BaseModel):
+    feature: str
+    start: float | None = None
+    stop: float | None = None
+    steps: int = 10
+    values: list[float] | None = None
+
+class WhatIfRequest(BaseModel):
+    perf: PerformanceFeatures
+    cluster: ClusteringFeatures | None = None
+    sweeps: list[FeatureSweep]
+
+class ProfilingSettings(BaseModel):
+    mode: Literal["sample", "cprofile"] = "sample"
+    rate: float = Field(0.0, ge=0, le=1)
+    requests: int = Field(0, ge=0)
+    routes: list[str] | None = None
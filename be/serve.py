@@ -0,0 +1,114 @@
+"""
+Pre-fork launcher: load the models once, then fork the uvicorn workers.
+
+`uvicorn main:app --workers N` starts every worker as a fresh interpreter
+that imports main and unpickles its own copy of the models. Here the parent
+imports main, loads and warms up the active bundle, and only then forks the
+workers. They share the model memory copy-on-write: the tree nodes, centroid
+and scaler arrays are only ever read, so their pages are never copied.
+
+Run from the `be` directory:
+
+    python serve.py --workers 4 [--host 0.0.0.0] [--port 8000]
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+import main
+
+
+def load_shared_models():
+    """
+    Load everything the workers need before forking. Objects that exist at
+    fork time are moved out of the cyclic GC's reach, so collections in the
+    workers do not write to (and so copy) the shared pages.
+    """
+    main.registry.current.warm_up()
+    gc.collect()
+    gc.freeze()
+
+
+def run_worker(sock: socket.socket, args):
+    # Workers use the default signal handling; uvicorn installs its own
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    config = uvicorn.Config(main.app, log_level=args.log_level)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, args) -> int:
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            run_worker(sock, args)
+        except BaseException:
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+    return pid
+
+
+def main_launcher(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the API from pre-forked workers sharing one model copy")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    load_shared_models()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    workers = {spawn_worker(sock, args) for _ in range(args.workers)}
+    print(f"Serving model version {main.registry.current.version} on http://{args.host}:{args.port} "
+          f"with {len(workers)} pre-forked workers (parent pid {os.getpid()})", flush=True)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in workers:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    # Replace workers that die until asked to stop
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        workers.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {status}, restarting", file=sys.stderr, flush=True)
+            time.sleep(0.5)
+            workers.add(spawn_worker(sock, args))
+
+    sock.close()
+
+
+if __name__ == "__main__":
+    main_launcher()
@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from inference.batcher import MicroBatcher
+
+
+def make_batcher(window_ms: float, delay: float = 0.0):
+    batches = []
+
+    def score_batch(records):
+        batches.append(list(records))
+        time.sleep(delay)
+        return [r * 2 for r in records]
+
+    async def run(fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    return MicroBatcher(score_batch, run, max_batch_size=64, window_ms=window_ms), batches
+
+
+def test_lone_request_skips_the_window():
+    async def main():
+        batcher, batches = make_batcher(window_ms=10_000)
+        started = time.perf_counter()
+        results = [await batcher.submit(i) for i in range(3)]
+        return results, batches, time.perf_counter() - started
+
+    results, batches, elapsed = asyncio.run(main())
+
+    assert results == [0, 2, 4]
+    assert batches == [[0], [1], [2]]
+    assert elapsed < 1
+
+
+def test_requests_during_a_batch_share_the_next_one():
+    async def main():
+        batcher, batches = make_batcher(window_ms=20, delay=0.05)
+        first = asyncio.ensure_future(batcher.submit(0))
+        await asyncio.sleep(0)
+        rest = await asyncio.gather(*(batcher.submit(i) for i in range(1, 6)))
+        return [await first, *rest], batches
+
+    results, batches = asyncio.run(main())
+
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert batches == [[0], [1, 2, 3, 4, 5]]
@@ -0,0 +1,94 @@
+import os
+
+import joblib
+import numpy as np
+import pytest
+from sklearn.ensemble import (
+    ExtraTreesRegressor,
+    GradientBoostingRegressor,
+    RandomForestRegressor,
+)
+from sklearn.linear_model import Ridge
+from sklearn.tree import DecisionTreeRegressor
+
+from inference.compiled import (
+    TOLERANCE,
+    check_parity,
+    compile_model,
+    parity_inputs,
+    round_down_float32,
+)
+from inference.features import PERFORMANCE_ORDER
+
+MODEL_PATH = os.path.join(os.path.dirname(__file__), "..", "models", "performance_predictor_model.pkl")
+
+
+def max_diff(model, compiled, X) -> float:
+    return float(np.max(np.abs(compiled.predict(X) - model.predict(X))))
+
+
+def on_threshold_rows(compiled) -> np.ndarray:
+    """
+    One row per split, every feature sitting exactly on a split threshold
+    """
+    rng = np.random.default_rng(1)
+    splits = compiled.threshold[compiled.threshold != 0]
+    return rng.choice(splits, (len(splits), compiled.n_features_in_)).astype(np.float64)
+
+
+def fitted_models():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(0, 50, (500, len(PERFORMANCE_ORDER)))
+    y = X @ rng.uniform(-1, 1, len(PERFORMANCE_ORDER)) + rng.normal(size=500)
+    return [
+        model.fit(X, y) for model in (
+            RandomForestRegressor(n_estimators=20, random_state=0),
+            ExtraTreesRegressor(n_estimators=20, random_state=0),
+            GradientBoostingRegressor(n_estimators=30, random_state=0),
+            DecisionTreeRegressor(random_state=0),
+            Ridge(),
+        )
+    ]
+
+
+@pytest.mark.parametrize("model", fitted_models(), ids=lambda m: type(m).__name__)
+def test_compiled_matches_sklearn(model):
+    compiled = compile_model(model)
+    X = parity_inputs(compiled)
+    assert max_diff(model, compiled, X) <= TOLERANCE
+    if hasattr(compiled, "threshold"):
+        assert max_diff(model, compiled, on_threshold_rows(compiled)) <= TOLERANCE
+    assert check_parity(model, compiled) <= TOLERANCE
+
+
+@pytest.mark.skipif(not os.path.exists(MODEL_PATH), reason="performance model not available")
+def test_compiled_matches_shipped_model():
+    model = joblib.load(MODEL_PATH)
+    compiled = compile_model(model)
+    assert max_diff(model, compiled, parity_inputs(compiled)) <= TOLERANCE
+    assert max_diff(model, compiled, on_threshold_rows(compiled)) <= TOLERANCE
+
+
+def test_round_down_float32():
+    rng = np.random.default_rng(0)
+    values = np.concatenate([
+        rng.uniform(-100, 100, 10_000),
+        [0.1, 0.2, 1 / 3, -0.1, 2.5, 1e-8, 12345.678901],
+    ])
+    # Most of these are not representable in float32
+    assert (values.astype(np.float32).astype(np.float64) != values).mean() > 0.99
+
+    rounded = round_down_float32(values)
+    assert rounded.dtype == np.float32
+    assert (rounded.astype(np.float64) <= values).all()
+    # No float32 lies strictly between the rounded value and the original
+    above = np.nextafter(rounded, np.float32(np.inf))
+    assert (above.astype(np.float64) > values).all()
+    # For any float32 x: x <= value exactly when x <= rounded
+    for x in np.concatenate([rounded, above]):
+        assert ((x <= values) == (x <= rounded)).all()
+
+
+def test_round_down_float32_keeps_representable_values():
+    values = np.array([0.0, 0.5, -2.0, 1024.0, 0.25])
+    np.testing.assert_array_equal(round_down_float32(values), values.astype(np.float32))
@@ -0,0 +1,83 @@
+import itertools
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from inference.features import CLUSTER_ORDER
+from inference.native import load_persona_bundle
+from inference.persona import PersonaAssigner
+
+MODEL_DIR = os.path.join(os.path.dirname(__file__), "..", "models")
+
+# Steps past the midpoint of two centroids, as a fraction of their distance
+OFFSETS = np.array([-1e-3, -1e-6, -1e-9, 1e-9, 1e-6, 1e-3])
+
+
+@pytest.fixture(scope="module")
+def models():
+    scaler = joblib.load(os.path.join(MODEL_DIR, "scaler_clustering.pkl"))
+    kmeans_model = joblib.load(os.path.join(MODEL_DIR, "kmeans_persona_model.pkl"))
+    return scaler, kmeans_model
+
+
+@pytest.fixture(scope="module", params=["from_models", "native_bundle"])
+def assigner(request, models):
+    if request.param == "from_models":
+        return PersonaAssigner.from_models(*models)
+    bundle = load_persona_bundle(MODEL_DIR)
+    assert bundle is not None, "persona_bundle.npz is missing or stale"
+    return bundle[0]
+
+
+def random_rows(assigner, n: int = 5000, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    spread = np.sqrt(1.0 / assigner.inv_variance)
+    low = assigner.raw_centroids.min(axis=0) - 3 * spread
+    high = assigner.raw_centroids.max(axis=0) + 3 * spread
+    return rng.uniform(low, high, (n, assigner.n_features))
+
+
+def boundary_rows(assigner) -> np.ndarray:
+    """
+    Rows just either side of the midpoint of every pair of centroids
+    """
+    rows = []
+    for a, b in itertools.combinations(assigner.raw_centroids, 2):
+        for t in OFFSETS:
+            rows.append((a + b) / 2 + t * (b - a))
+    return np.array(rows)
+
+
+def sklearn_scaled(scaler, X: np.ndarray) -> np.ndarray:
+    return scaler.transform(pd.DataFrame(X, columns=CLUSTER_ORDER))
+
+
+def check_against_sklearn(assigner, scaler, kmeans_model, X):
+    scaled = sklearn_scaled(scaler, X)
+    expected = kmeans_model.predict(scaled)
+    labels, distances = assigner.assign(X)
+
+    np.testing.assert_allclose(distances, kmeans_model.transform(scaled), rtol=1e-9, atol=1e-9)
+    # A different label is only acceptable where the two centroids are tied
+    rows = np.flatnonzero(labels != expected)
+    np.testing.assert_allclose(
+        distances[rows, labels[rows]], distances[rows, expected[rows]], rtol=1e-9, atol=1e-12
+    )
+    return rows.size
+
+
+def test_matches_kmeans_on_random_rows(assigner, models):
+    assert check_against_sklearn(assigner, *models, random_rows(assigner)) == 0
+
+
+def test_matches_kmeans_near_decision_boundaries(assigner, models):
+    X = boundary_rows(assigner)
+    check_against_sklearn(assigner, *models, X)
+    # The rows 1e-3 of the way past a midpoint are not ties and must agree exactly
+    clear = np.abs(np.tile(OFFSETS, len(X) // len(OFFSETS))) == 1e-3
+    scaler, kmeans_model = models
+    labels, _ = assigner.assign(X[clear])
+    np.testing.assert_array_equal(labels, kmeans_model.predict(sklearn_scaled(scaler, X[clear])))
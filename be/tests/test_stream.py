@@ -0,0 +1,86 @@
+import json
+
+import numpy as np
+
+from inference.features import PERFORMANCE_ORDER
+from inference.stream import score_lines
+
+RECORD = {
+    "total_activities": 30,
+    "avg_minutes_per_module": 20,
+    "consistency_score": 5,
+    "weekend_ratio": 0.3,
+    "study_time_category": 2,
+    "total_active_days": 15,
+}
+
+
+class FakeBundle:
+    """
+    Scores every row as its total_activities, cluster 0, no recommendations
+    """
+
+    def __init__(self):
+        self.persona_mapping = {"0": "The Consistent"}
+
+    def score_matrices(self, perf_X, cluster_X):
+        n = len(perf_X)
+        preds = perf_X[:, PERFORMANCE_ORDER.index("total_activities")]
+        return preds, np.zeros(n, dtype=int), np.zeros((n, 1)), np.full((n, 1), -1)
+
+
+def score(lines):
+    entries = [(i + 1, line.encode()) for i, line in enumerate(lines)]
+    return [json.loads(line) for line in score_lines(FakeBundle(), entries, 1024).splitlines()]
+
+
+def test_invalid_values_become_per_line_errors():
+    lines = [json.dumps(dict(RECORD, id=i, total_activities=i)) for i in range(5)]
+    lines.insert(2, json.dumps(RECORD).replace('"total_activities": 30', '"total_activities": ' + "9" * 400))
+    lines.insert(4, json.dumps(RECORD).replace('"total_activities": 30', '"total_activities": NaN'))
+    lines.insert(5, json.dumps(RECORD).replace('"total_activities": 30', '"total_activities": 1e400'))
+
+    results = score(lines)
+
+    assert len(results) == len(lines)
+    assert results[2] == {"line": 3, "error": "total_activities must be finite"}
+    assert results[4] == {"line": 5, "error": "total_activities must be finite"}
+    assert results[5] == {"line": 6, "error": "total_activities must be finite"}
+    scored = [r for r in results if "error" not in r]
+    assert [r["id"] for r in scored] == [0, 1, 2, 3, 4]
+    assert [r["predicted_performance"] for r in scored] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+
+def test_bad_ids_and_nesting_become_per_line_errors():
+    lines = [
+        json.dumps(dict(RECORD, id=1)),
+        json.dumps(dict(RECORD, id=2 ** 70)),
+        json.dumps(RECORD).replace("{", '{"id": NaN, ', 1),
+        json.dumps(dict(RECORD, id=[1])),
+        "[" * 5000 + "]" * 5000,
+        json.dumps(dict(RECORD, id="last")),
+    ]
+
+    results = score(lines)
+
+    assert len(results) == len(lines)
+    assert results[0]["id"] == 1
+    for i in (1, 2, 3):
+        assert results[i] == {"line": i + 1, "error": "id must be a string, a 64-bit integer or null"}
+    assert results[4] == {"line": 5, "error": "record is nested too deeply"}
+    assert results[5]["id"] == "last"
+
+
+def test_unencodable_result_becomes_an_error_line(monkeypatch):
+    from inference import stream
+
+    def dumps(obj):
+        if obj.get("id") == "bad":
+            raise TypeError("cannot encode")
+        return json.dumps(obj).encode()
+
+    monkeypatch.setattr(stream, "dumps", dumps)
+    results = score([json.dumps(dict(RECORD, id="bad")), json.dumps(dict(RECORD, id="ok"))])
+
+    assert results[0] == {"line": 1, "error": "result cannot be encoded: cannot encode"}
+    assert results[1]["id"] == "ok"
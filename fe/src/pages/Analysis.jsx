@@ -76,37 +76,22 @@ export default function Analysis() {
     setError(null);
 
     try {
-      const perf = await fetch(`${API_BASE_URL}/predict/performance`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(perfInput),
-      }).then((res) => res.json());
-
-      const persona = await fetch(`${API_BASE_URL}/predict/persona`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(clusterInput),
-      }).then((res) => res.json());
-
-      const insight = await fetch(`${API_BASE_URL}/predict/insight`, {
+      const analysis = await fetch(`${API_BASE_URL}/analyze`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify({
           perf: perfInput,
           cluster: clusterInput,
         }),
-      }).then((res) => res.json());
-
-      const comparison = await fetch(`${API_BASE_URL}/compare/performance`, {
-        method: "POST",
-        headers: { "Content-Type": "application/json" },
-        body: JSON.stringify(perfInput),
-      }).then((res) => res.json());
-
-      setPerformanceData(perf);
-      setPersonaData(persona);
-      setInsightData(insight);
-      setComparisonData(comparison);
+      }).then((res) => {
+        if (!res.ok) throw new Error(`Analysis failed with status ${res.status}`);
+        return res.json();
+      });
+
+      setPerformanceData({ predicted_performance: analysis.predicted_performance });
+      setPersonaData({ cluster: analysis.persona_cluster, persona: analysis.persona_label });
+      setInsightData(analysis);
+      setComparisonData(analysis.comparison);
     } catch {
       setError("Failed to connect to API. Please make sure the backend is running.");
     } finally {